@@ -0,0 +1,157 @@
+"""
+Chunking throughput of the single-pass ChunkingEngine against running
+three token-aware LangChain splitters one after another, each of which
+tokenizes the documents again.
+
+Both produce token windows, sentence-packed and markdown section chunks.
+``--encoding words`` builds a word-level encoding from the corpus, for
+machines that cannot download tiktoken's encodings.
+
+Usage:
+    python -m benchmarks.bench_chunking --documents 2000
+"""
+
+import argparse
+import json
+import re
+import time
+
+import numpy as np
+import tiktoken
+from langchain_core.documents import Document
+from langchain_text_splitters import (
+    MarkdownTextSplitter,
+    RecursiveCharacterTextSplitter,
+)
+from langchain_text_splitters.base import Tokenizer, split_text_on_tokens
+
+from components.embedding.chunking import (
+    ChunkingEngine,
+    HeadingChunks,
+    SentenceChunks,
+    TokenWindows,
+)
+
+
+def make_documents(n: int, sections: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    documents = []
+    for i in range(n):
+        parts = []
+        for section in range(sections):
+            parts.append(f"## Section {section} of page {i}")
+            sentences = []
+            for _ in range(int(rng.integers(4, 12))):
+                words = " ".join(f"w{r}" for r in rng.zipf(1.3, rng.integers(6, 25)))
+                sentences.append(f"{words.capitalize()}.")
+            parts.append(" ".join(sentences))
+        documents.append(
+            Document(page_content="\n\n".join(parts), metadata={"source": str(i)})
+        )
+    return documents
+
+
+def word_encoding(documents):
+    ranks = {bytes([i]): i for i in range(256)}
+    for document in documents:
+        for word in set(re.findall(r" ?\w+", document.page_content)):
+            data = word.encode("utf-8")
+            for end in range(2, len(data) + 1):
+                ranks.setdefault(data[:end], len(ranks))
+    return tiktoken.Encoding(
+        name="words",
+        pat_str=r""" ?\w+| ?[^\s\w]+|\s+(?!\S)|\s+""",
+        mergeable_ranks=ranks,
+        special_tokens={},
+    )
+
+
+def langchain_chunks(documents, encoding, args):
+    def count(text):
+        return len(encoding.encode_ordinary(text))
+
+    tokenizer = Tokenizer(
+        chunk_overlap=args.overlap,
+        tokens_per_chunk=args.chunk_tokens,
+        decode=encoding.decode,
+        encode=encoding.encode_ordinary,
+    )
+    sentences = RecursiveCharacterTextSplitter(
+        separators=["\n\n", ". ", " "],
+        chunk_size=args.chunk_tokens,
+        chunk_overlap=0,
+        length_function=count,
+    )
+    sections = MarkdownTextSplitter(
+        chunk_size=2 * args.chunk_tokens, chunk_overlap=0, length_function=count
+    )
+    chunks = []
+    for document in documents:
+        chunks.extend(
+            split_text_on_tokens(text=document.page_content, tokenizer=tokenizer)
+        )
+    chunks.extend(sentences.split_documents(documents))
+    chunks.extend(sections.split_documents(documents))
+    return chunks
+
+
+def run(args):
+    documents = make_documents(args.documents, args.sections)
+    if args.encoding == "words":
+        encoding = word_encoding(documents)
+    else:
+        encoding = tiktoken.get_encoding(args.encoding)
+    tokens = sum(len(encoding.encode_ordinary(d.page_content)) for d in documents)
+    results = []
+
+    def record(method, seconds, chunks):
+        row = {
+            "method": method,
+            "seconds": round(seconds, 3),
+            "documents_per_s": round(len(documents) / seconds),
+            "tokens_per_s": round(tokens / seconds),
+            "chunks": len(chunks),
+        }
+        results.append(row)
+        print(row)
+
+    start = time.perf_counter()
+    chunks = langchain_chunks(documents, encoding, args)
+    record("langchain_3_splitters", time.perf_counter() - start, chunks)
+
+    for workers in args.workers:
+        engine = ChunkingEngine(
+            [
+                TokenWindows(args.chunk_tokens, args.overlap),
+                SentenceChunks(args.chunk_tokens),
+                HeadingChunks(2 * args.chunk_tokens),
+            ],
+            encoding=encoding,
+            max_workers=workers,
+        )
+        engine.tokenize("")  # builds the token length table once
+        start = time.perf_counter()
+        chunks, _ = engine.split_with_strategies(documents)
+        record(f"engine_{workers}_workers", time.perf_counter() - start, chunks)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--chunk-tokens", type=int, default=256)
+    parser.add_argument("--overlap", type=int, default=32)
+    parser.add_argument("--encoding", default="cl100k_base")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 4])
+    parser.add_argument("--json", help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
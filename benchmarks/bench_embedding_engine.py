@@ -0,0 +1,74 @@
+"""
+Throughput of the ParallelEmbeddings engine versus worker count.
+
+Usage:
+    python -m benchmarks.bench_embedding_engine --chunks 2000 --workers 0,1,2,4
+"""
+
+import argparse
+import json
+import random
+import time
+
+from components.embedding.embeddings import DEFAULT_MODEL_NAME
+from components.embedding.engine import ParallelEmbeddings
+
+WORDS = (
+    "vector index crawl chunk embedding model search query document page "
+    "token batch worker process memory latency throughput store retrieval"
+).split()
+
+
+def make_corpus(n_chunks: int, seed: int = 0):
+    rng = random.Random(seed)
+    # Mix of short and long chunks, as produced by the text splitters
+    return [
+        " ".join(rng.choices(WORDS, k=rng.randint(10, 300))) for _ in range(n_chunks)
+    ]
+
+
+def run(model_name: str, n_chunks: int, worker_counts, max_batch_size: int):
+    corpus = make_corpus(n_chunks)
+    results = []
+    for num_workers in worker_counts:
+        with ParallelEmbeddings(
+            model_name, num_workers=num_workers, max_batch_size=max_batch_size
+        ) as engine:
+            # Warm-up loads the model in every worker before timing starts
+            engine.embed_documents(corpus[: max(1, num_workers) * max_batch_size])
+            start = time.perf_counter()
+            engine.embed_documents(corpus)
+            elapsed = time.perf_counter() - start
+        results.append(
+            {
+                "workers": num_workers,
+                "chunks": n_chunks,
+                "seconds": round(elapsed, 3),
+                "chunks_per_sec": round(n_chunks / elapsed, 1),
+            }
+        )
+        print(
+            f"workers={num_workers:<3} {n_chunks / elapsed:>10.1f} chunks/sec "
+            f"({elapsed:.2f}s)"
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--workers", default="0,1,2,4")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--json", help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    worker_counts = [int(w) for w in args.workers.split(",")]
+    results = run(args.model, args.chunks, worker_counts, args.max_batch_size)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
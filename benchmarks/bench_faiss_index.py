@@ -0,0 +1,111 @@
+"""
+Recall@k, query latency and memory of the approximate FAISS index types
+against the exact flat baseline.
+
+Usage:
+    python -m benchmarks.bench_faiss_index --vectors 100000 --dim 768
+"""
+
+import argparse
+import json
+import time
+
+import faiss
+import numpy as np
+
+from components.embedding.vectorstore.faiss_store import (
+    build_faiss_index,
+    set_search_params,
+)
+
+
+def make_vectors(n: int, dim: int, n_clusters: int = 256, seed: int = 0):
+    # Clustered data behaves more like real embeddings than uniform noise
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, n)
+    noise = 0.3 * rng.standard_normal((n, dim)).astype(np.float32)
+    return centers[labels] + noise
+
+
+def measure(index, queries, k, truth):
+    latencies = []
+    found = []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        found.append(ids[0])
+    recall = np.mean(
+        [len(set(f) & set(t)) / k for f, t in zip(found, truth)]
+    )  # fraction of the exact top-k recovered
+    latencies = np.array(latencies) * 1000
+    return {
+        "recall": round(float(recall), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "memory_mb": round(len(faiss.serialize_index(index)) / 1e6, 2),
+    }
+
+
+def run(args):
+    vectors = make_vectors(args.vectors, args.dim)
+    queries = make_vectors(args.queries, args.dim, seed=1)
+
+    configs = [("flat", {}, {})]
+    for nprobe in args.nprobe:
+        configs.append(("ivf_flat", {"nlist": args.nlist}, {"nprobe": nprobe}))
+        configs.append(
+            ("ivf_pq", {"nlist": args.nlist, "pq_m": args.pq_m}, {"nprobe": nprobe})
+        )
+    for ef_search in args.ef_search:
+        configs.append(("hnsw", {}, {"ef_search": ef_search}))
+
+    built = {}
+    truth = None
+    results = []
+    for index_type, build_options, search_options in configs:
+        key = (index_type, tuple(sorted(build_options.items())))
+        if key not in built:
+            start = time.perf_counter()
+            index = build_faiss_index(vectors, index_type, **build_options)
+            index.add(vectors)
+            built[key] = (index, time.perf_counter() - start)
+        index, build_seconds = built[key]
+        set_search_params(index, **search_options)
+
+        if truth is None:
+            _, truth = index.search(queries, args.k)
+        row = {
+            "index_type": index_type,
+            **build_options,
+            **search_options,
+            "build_s": round(build_seconds, 2),
+            **measure(index, queries, args.k, truth),
+        }
+        results.append(row)
+        print(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--pq-m", type=int, default=64)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 32, 128])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[32, 64, 256])
+    parser.add_argument("--json", help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Startup time and per-worker memory of FAISSVectorStoreFactory.load_local,
+in-heap (pickle) versus memory-mapped (sqlite docstore) mode.
+
+Each worker is a separate process, like a gunicorn worker. PSS splits shared
+pages between the processes mapping them, so it shows the real per-worker
+cost of the mmap mode; RSS counts shared pages in full for every worker.
+
+Usage:
+    python -m benchmarks.bench_faiss_load --documents 200000 --workers 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+from langchain.schema import Document
+from langchain_community.embeddings import DeterministicFakeEmbedding
+
+from components.embedding.vectorstore import FAISSVectorStoreFactory
+
+
+def memory_kb():
+    """
+    Returns (rss, pss) of the current process in KB; pss is None off Linux.
+    """
+    rss = pss = None
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Rss:"):
+                    rss = int(line.split()[1])
+                elif line.startswith("Pss:"):
+                    pss = int(line.split()[1])
+    except FileNotFoundError:
+        import resource
+
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss, pss
+
+
+def worker(path, dim, mmap, ready, results):
+    baseline_rss, baseline_pss = memory_kb()
+    start = time.perf_counter()
+    store = FAISSVectorStoreFactory(DeterministicFakeEmbedding(size=dim))
+    store.load_local(path, mmap=mmap)
+    load_seconds = time.perf_counter() - start
+    store.similarity_search("document 1", k=10)
+
+    # Measure once every worker has loaded, so shared pages are split evenly
+    ready.wait()
+    rss, pss = memory_kb()
+    results.put(
+        {
+            "mode": "mmap" if mmap else "pickle",
+            "load_s": round(load_seconds, 3),
+            "rss_mb": round((rss - baseline_rss) / 1024, 1),
+            "pss_mb": round((pss - baseline_pss) / 1024, 1) if pss else None,
+        }
+    )
+    ready.wait()
+
+
+def build(path, n_documents, dim):
+    rng = np.random.default_rng(0)
+    documents = [
+        Document(page_content=f"document {i} " + "lorem ipsum " * 40, metadata={"i": i})
+        for i in range(n_documents)
+    ]
+    vectors = rng.standard_normal((n_documents, dim)).astype(np.float32)
+    store = FAISSVectorStoreFactory(DeterministicFakeEmbedding(size=dim))
+    store.add_embeddings(documents, vectors.tolist())
+    store.save_local(os.path.join(path, "pickle"))
+    store.save_local(os.path.join(path, "sqlite"), docstore_format="sqlite")
+
+
+def run(n_documents, dim, n_workers):
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with tempfile.TemporaryDirectory() as path:
+        build(path, n_documents, dim)
+        for mmap in (False, True):
+            folder = os.path.join(path, "sqlite" if mmap else "pickle")
+            ready = context.Barrier(n_workers)
+            queue = context.Queue()
+            processes = [
+                context.Process(target=worker, args=(folder, dim, mmap, ready, queue))
+                for _ in range(n_workers)
+            ]
+            for process in processes:
+                process.start()
+            rows = [queue.get() for _ in processes]
+            for process in processes:
+                process.join()
+            for row in rows:
+                print(row)
+            results.extend(rows)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--json", help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.documents, args.dim, args.workers)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Query latency of hybrid (dense + BM25, fused with RRF) search against
+dense-only search, plus the cost of keeping the BM25 index up to date.
+
+Usage:
+    python -m benchmarks.bench_hybrid_search --chunks 100000 --dim 384
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+from langchain.schema import Document
+from langchain_community.embeddings import DeterministicFakeEmbedding
+
+from components.embedding.vectorstore import FAISSVectorStoreFactory
+
+
+def make_chunks(n: int, vocabulary: int = 50_000, words: int = 60, seed: int = 0):
+    # Zipf-distributed words, plus one product code per chunk
+    rng = np.random.default_rng(seed)
+    ranks = np.minimum(rng.zipf(1.2, (n, words)), vocabulary)
+    return [
+        Document(
+            page_content=" ".join(f"w{r}" for r in row) + f" part PX-{i:07d}",
+            metadata={"i": i},
+        )
+        for i, row in enumerate(ranks)
+    ]
+
+
+def percentiles(latencies):
+    latencies = np.array(latencies) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+    }
+
+
+def measure(search, queries, k):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query, k=k)
+        latencies.append(time.perf_counter() - start)
+    return percentiles(latencies)
+
+
+def run(args):
+    chunks = make_chunks(args.chunks)
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((args.chunks, args.dim)).astype(np.float32)
+    embedding = DeterministicFakeEmbedding(size=args.dim)
+
+    results = []
+    stores = {}
+    for hybrid in (False, True):
+        store = FAISSVectorStoreFactory(
+            embedding, index_type=args.index_type, hybrid=hybrid
+        )
+        start = time.perf_counter()
+        for offset in range(0, args.chunks, args.batch_size):
+            store.add_embeddings(
+                chunks[offset : offset + args.batch_size],
+                vectors[offset : offset + args.batch_size],
+            )
+        stores[hybrid] = store
+        row = {"hybrid": hybrid, "add_s": round(time.perf_counter() - start, 2)}
+        results.append(row)
+        print(row)
+
+    query_rng = np.random.default_rng(2)
+    code_queries = [
+        f"PX-{i:07d}" for i in query_rng.integers(0, args.chunks, args.queries)
+    ]
+    text_queries = [
+        " ".join(f"w{r}" for r in query_rng.zipf(1.2, 5)) for _ in range(args.queries)
+    ]
+    for name, queries in (("code", code_queries), ("text", text_queries)):
+        for mode, search in (
+            ("dense", stores[False].similarity_search),
+            ("bm25", lambda q, k: stores[True].sparse_index.search(q, k)),
+            ("hybrid", stores[True].hybrid_search),
+        ):
+            row = {"queries": name, "mode": mode, **measure(search, queries, args.k)}
+            results.append(row)
+            print(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--index-type", default="flat")
+    parser.add_argument("--json", help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
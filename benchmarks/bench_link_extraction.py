@@ -0,0 +1,109 @@
+"""
+Document link extraction over many crawled pages: the original per-page
+BeautifulSoup html.parser scan with ``any(endswith)`` extension checks
+against find_document_links (lxml, set lookup) and the pooled, cross-page
+deduplicating extract_document_links.
+
+Usage:
+    python -m benchmarks.bench_link_extraction --pages 2000 --links 300
+"""
+
+import argparse
+import json
+import time
+from urllib.parse import urljoin
+
+import numpy as np
+from bs4 import BeautifulSoup
+
+from components.web.download import (
+    DEFAULT_EXTENSIONS,
+    extract_document_links,
+    find_document_links,
+)
+
+SUFFIXES = [".html", ".php", "/", ".png", ".css"] * 4 + DEFAULT_EXTENSIONS
+
+
+def make_pages(n: int, links: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    pages = []
+    for i in range(n):
+        anchors = []
+        for _ in range(links):
+            # Shared files (e.g. terms.pdf) appear on many pages
+            name = f"doc{rng.integers(0, n * links // 20)}"
+            suffix = SUFFIXES[rng.integers(0, len(SUFFIXES))]
+            anchors.append(
+                f'<li><a class="nav" href="/section/{name}{suffix}">{name}</a></li>'
+            )
+        body = "\n".join(anchors)
+        pages.append(
+            (
+                f"<html><head><title>Page {i}</title></head><body><ul>{body}</ul>"
+                f"<p>{'Lorem ipsum dolor sit amet. ' * 200}</p></body></html>",
+                f"https://example.com/page{i}/",
+            )
+        )
+    return pages
+
+
+def original_links(html_text, base_url, extensions=DEFAULT_EXTENSIONS):
+    soup = BeautifulSoup(html_text, "html.parser")
+    urls = []
+    for link in soup.find_all("a", href=True):
+        href = link["href"]
+        if any(href.lower().endswith(ext) for ext in extensions):
+            urls.append(urljoin(base_url, href))
+    return urls
+
+
+def run(args):
+    pages = make_pages(args.pages, args.links)
+    results = []
+
+    def record(method, seconds, urls):
+        row = {
+            "method": method,
+            "seconds": round(seconds, 3),
+            "pages_per_s": round(len(pages) / seconds),
+            "unique_urls": len(urls),
+        }
+        results.append(row)
+        print(row)
+
+    start = time.perf_counter()
+    urls = set()
+    for html_text, base_url in pages:
+        urls.update(original_links(html_text, base_url))
+    record("bs4_html_parser", time.perf_counter() - start, urls)
+
+    start = time.perf_counter()
+    urls = set()
+    for html_text, base_url in pages:
+        urls.update(find_document_links(html_text, base_url))
+    record("lxml_set_lookup", time.perf_counter() - start, urls)
+
+    for workers in args.workers:
+        start = time.perf_counter()
+        urls = extract_document_links(pages, max_workers=workers)
+        record(f"bulk_{workers}_workers", time.perf_counter() - start, urls)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--links", type=int, default=300)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 4])
+    parser.add_argument("--json", help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Storage size and recall@k of the MongoDB vector encodings ("double",
+"float32", "int8", "int1"), with and without full-precision rescoring.
+
+Search is simulated with exact NumPy scoring over the decoded vectors, which
+is what Atlas' ENN search computes on them; ANN adds its own recall loss on
+top of these numbers.
+
+Usage:
+    python -m benchmarks.bench_mongodb_vectors --vectors 20000 --dim 768
+"""
+
+import argparse
+import json
+
+import bson
+import numpy as np
+
+from benchmarks.bench_faiss_index import make_vectors
+from components.embedding.vectorstore.mongodb_store import (
+    VECTOR_DTYPES,
+    decode_vector,
+    encode_vector,
+)
+
+
+def normalize(vectors):
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def top_k(scores, k):
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def recall(found, truth):
+    k = truth.shape[1]
+    return round(
+        float(np.mean([len(set(f[:k]) & set(t)) / k for f, t in zip(found, truth)])),
+        4,
+    )
+
+
+def run(args):
+    vectors = normalize(make_vectors(args.vectors, args.dim))
+    # Queries are perturbed corpus vectors, so they have true near neighbours
+    rng = np.random.default_rng(1)
+    picks = rng.choice(args.vectors, args.queries, replace=False)
+    noise = 0.05 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    queries = normalize(vectors[picks] + noise)
+    truth = top_k(queries @ vectors.T, args.k)
+
+    results = []
+    for dtype in VECTOR_DTYPES:
+        stored = np.stack([decode_vector(encode_vector(v, dtype)) for v in vectors])
+        record_bytes = len(bson.encode({"embedding": encode_vector(vectors[0], dtype)}))
+        if dtype == "int1":
+            encoded_queries = np.where(queries > 0, 1.0, -1.0)
+        else:
+            encoded_queries = np.stack(
+                [decode_vector(encode_vector(q, dtype)) for q in queries]
+            )
+        # For +1/-1 bits, ranking by dot product equals ranking by Hamming distance
+        scores = encoded_queries @ normalize(stored).T
+
+        row = {
+            "vector_dtype": dtype,
+            "bytes_per_vector": record_bytes,
+            f"recall@{args.k}": recall(top_k(scores, args.k), truth),
+        }
+        for factor in args.rescore_factor:
+            candidates = top_k(scores, args.k * factor)
+            exact = np.einsum("qd,qcd->qc", queries, vectors[candidates])
+            reranked = np.take_along_axis(candidates, top_k(exact, args.k), axis=1)
+            row[f"rescored_x{factor}"] = recall(reranked, truth)
+        results.append(row)
+        print(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vectors", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rescore-factor", type=int, nargs="+", default=[2, 4, 10])
+    parser.add_argument("--json", help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Throughput, recall and memory of MinHash LSH near-duplicate detection
+against exact sha256 deduplication of crawled pages.
+
+A fraction of the pages are copies of earlier pages with a changed date,
+navigation item or tracking footer, which exact hashing never catches.
+
+Usage:
+    python -m benchmarks.bench_near_duplicates --pages 100000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from components.utils.hashing import hash_content
+from components.utils.near_duplicates import NearDuplicateIndex
+
+
+def make_pages(n: int, words: int, duplicate_rate: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    pages, originals = [], []
+    for i in range(n):
+        if pages and rng.random() < duplicate_rate:
+            original = int(rng.integers(0, len(pages)))
+            text = pages[original].rsplit(" | ", 1)[0]
+            pages.append(f"{text} | Updated 2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}")
+            originals.append(original)
+        else:
+            body = " ".join(f"w{r}" for r in rng.zipf(1.3, words))
+            pages.append(f"Home News About {body} | Updated 2023-01-01")
+            originals.append(None)
+    return pages, originals
+
+
+def run(args):
+    pages, originals = make_pages(args.pages, args.words, args.duplicate_rate)
+    duplicates = sum(original is not None for original in originals)
+    results = []
+
+    start = time.perf_counter()
+    seen = set()
+    exact = 0
+    for text in pages:
+        content_hash = hash_content(text.strip())
+        exact += content_hash in seen
+        seen.add(content_hash)
+    row = {
+        "method": "sha256",
+        "pages_per_s": round(args.pages / (time.perf_counter() - start)),
+        "duplicates": duplicates,
+        "found": exact,
+    }
+    results.append(row)
+    print(row)
+
+    index = NearDuplicateIndex(threshold=args.threshold, num_perm=args.num_perm)
+    start = time.perf_counter()
+    found = false_positives = 0
+    for i, text in enumerate(pages):
+        hit = index.find_or_add(str(i), text)
+        if hit is not None:
+            found += 1
+            false_positives += originals[i] is None
+    elapsed = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "index.npz")
+        index.save(path)
+        size_mb = os.path.getsize(path) / 2**20
+        start = time.perf_counter()
+        NearDuplicateIndex.load(path)
+        load_s = time.perf_counter() - start
+
+    row = {
+        "method": "minhash_lsh",
+        "threshold": args.threshold,
+        "bands": index.bands,
+        "rows": index.rows,
+        "pages_per_s": round(args.pages / elapsed),
+        "duplicates": duplicates,
+        "found": found,
+        "false_positives": false_positives,
+        "saved_mb": round(size_mb, 1),
+        "load_s": round(load_s, 2),
+    }
+    results.append(row)
+    print(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=100_000)
+    parser.add_argument("--words", type=int, default=600)
+    parser.add_argument("--duplicate-rate", type=float, default=0.2)
+    parser.add_argument("--threshold", type=float, default=0.9)
+    parser.add_argument("--num-perm", type=int, default=128)
+    parser.add_argument("--json", help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
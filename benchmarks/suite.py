@@ -0,0 +1,310 @@
+"""
+Offline regression benchmarks of the ingestion and search hot paths.
+
+Each case runs a fixed, seeded workload several times without network
+access or models:
+
+- crawl_dedup: crawl_website_for_documents over a fake crawler's pages,
+  with exact and near-duplicate detection
+- download: download_documents from a local HTTP server
+- index: chunking, embedding (a deterministic stub model) and FAISS upload
+  with index_documents
+- faiss_search_<n>: similarity_search on a flat FAISS store of n chunks
+
+The fastest run of every case is divided by the fastest run of a fixed
+calibration workload, so results from a faster or slower machine remain
+comparable; the fastest run is the one least disturbed by other load.
+Compared with ``--baseline``, a case whose normalized time grew by more
+than ``--tolerance`` is reported and the exit code is 1.
+
+Usage:
+    python -m benchmarks.suite --json results.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import logging
+import math
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import numpy as np
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.embeddings import DeterministicFakeEmbedding
+
+from benchmarks.bench_hybrid_search import make_chunks
+from benchmarks.bench_near_duplicates import make_pages
+from components.embedding.vectorstore import FAISSVectorStoreFactory, index_documents
+from components.utils.near_duplicates import NearDuplicateIndex
+from components.web.deep_crawler import crawl_website_for_documents
+from components.web.download import download_documents
+
+SUITE_VERSION = 1
+EMBEDDING_SIZE = 384
+MIN_SAMPLE_SECONDS = 0.25
+
+
+def calibration_workload():
+    """
+    A fixed mix of interpreter, hashing and NumPy work whose time is the
+    unit in which case timings are compared.
+    """
+    total = 0
+    for i in range(300_000):
+        total += len(str(i))
+    data = b"x" * 1_000_000
+    for _ in range(20):
+        hashlib.sha256(data).digest()
+    matrix = np.random.default_rng(0).standard_normal((300, 300))
+    for _ in range(10):
+        matrix = np.tanh(matrix @ matrix.T / 300)
+
+
+class FakeCrawler:
+    """
+    Stands in for AsyncWebCrawler: ``arun`` returns prebuilt page results.
+    """
+
+    def __init__(self, pages):
+        self.results = [
+            SimpleNamespace(
+                url=f"https://example.com/page/{i}",
+                markdown=text,
+                metadata={"depth": 1},
+            )
+            for i, text in enumerate(pages)
+        ]
+
+    async def arun(self, url, config):
+        return self.results
+
+
+def crawl_case(scale: float):
+    pages, _ = make_pages(int(2000 * scale), words=300, duplicate_rate=0.2)
+    pages += pages[: len(pages) // 10]  # exact duplicates
+    crawler = FakeCrawler(pages)
+
+    def run():
+        documents = asyncio.run(
+            crawl_website_for_documents(
+                "https://example.com",
+                crawler=crawler,
+                near_duplicates=NearDuplicateIndex(),
+            )
+        )
+        assert documents, "crawl produced no documents"
+
+    return run, len(pages), "pages"
+
+
+class FileHandler(BaseHTTPRequestHandler):
+    files = {}
+
+    def do_GET(self):
+        body = self.files.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextlib.contextmanager
+def file_server(files):
+    handler = type("Handler", (FileHandler,), {"files": files})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def download_case(scale: float, stack: contextlib.ExitStack):
+    count = int(100 * scale)
+    rng = np.random.default_rng(0)
+    files = {f"/files/doc{i}.pdf": rng.bytes(256 * 1024) for i in range(count)}
+    base_url = stack.enter_context(file_server(files))
+    html_text = "".join(f'<a href="{path}">doc</a>' for path in files)
+
+    def run():
+        with tempfile.TemporaryDirectory() as folder:
+            result = download_documents(
+                html_text, f"{base_url}/", folder, max_workers=8
+            )
+            assert len(result["downloaded"]) == count, result["failed"]
+
+    return run, count * 256 / 1024, "MB"
+
+
+def index_case(scale: float):
+    documents = make_chunks(int(2000 * scale), words=400)
+    chunker = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
+
+    def run():
+        store = FAISSVectorStoreFactory(DeterministicFakeEmbedding(size=EMBEDDING_SIZE))
+        with contextlib.redirect_stdout(io.StringIO()):
+            index_documents(documents, store, [chunker])
+
+    return run, len(documents), "documents"
+
+
+def search_case(size: int, queries: int = 200):
+    chunks = make_chunks(size)
+    vectors = np.random.default_rng(1).standard_normal((size, EMBEDDING_SIZE))
+    store = FAISSVectorStoreFactory(DeterministicFakeEmbedding(size=EMBEDDING_SIZE))
+    store.add_embeddings(chunks, vectors.astype(np.float32))
+    texts = [chunk.page_content for chunk in chunks[:queries]]
+
+    def run():
+        for text in texts:
+            store.similarity_search(text, k=10)
+
+    return run, queries, "queries"
+
+
+def measure(run, repeats: int, min_time: float = MIN_SAMPLE_SECONDS):
+    """
+    Returns the seconds per call of ``repeats`` samples. Short workloads are
+    called several times per sample, so that timer and scheduler noise stays
+    small against a sample of at least ``min_time`` seconds.
+    """
+    started = time.perf_counter()
+    run()  # warm up caches, imports and thread pools
+    number = max(1, math.ceil(min_time / (time.perf_counter() - started)))
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(number):
+            run()
+        timings.append((time.perf_counter() - started) / number)
+    return timings
+
+
+def run_suite(args):
+    calibration = min(measure(calibration_workload, args.repeats))
+    cases = {}
+    with contextlib.ExitStack() as stack:
+        factories = {
+            "crawl_dedup": lambda: crawl_case(args.scale),
+            "download": lambda: download_case(args.scale, stack),
+            "index": lambda: index_case(args.scale),
+        }
+        for size in args.search_sizes:
+            factories[f"faiss_search_{size}"] = lambda size=size: search_case(size)
+
+        for name, factory in factories.items():
+            if args.cases and name not in args.cases:
+                continue
+            run, work, unit = factory()
+            timings = measure(run, args.repeats)
+            median = statistics.median(timings)
+            cases[name] = {
+                "median_s": round(median, 4),
+                "min_s": round(min(timings), 4),
+                "normalized": round(min(timings) / calibration, 4),
+                "throughput": round(work / median, 2),
+                "unit": f"{unit}/s",
+            }
+            print(json.dumps({"case": name, **cases[name]}))
+    return {
+        "suite_version": SUITE_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": args.scale,
+        "repeats": args.repeats,
+        "calibration_s": round(calibration, 4),
+        "cases": cases,
+    }
+
+
+def compare(results, baseline, tolerance: float):
+    """
+    Returns the cases whose normalized time exceeds the baseline's by more
+    than ``tolerance`` (a fraction), as (case, baseline, current, change).
+    """
+    if baseline.get("scale") != results["scale"]:
+        raise ValueError(
+            f"Baseline was recorded with --scale {baseline.get('scale')}, "
+            f"not {results['scale']}"
+        )
+    regressions = []
+    for name, current in results["cases"].items():
+        reference = baseline["cases"].get(name)
+        if reference is None:
+            print(f"{name}: not in the baseline")
+            continue
+        change = current["normalized"] / reference["normalized"] - 1
+        print(f"{name}: {change:+.1%} normalized time vs baseline")
+        if change > tolerance:
+            regressions.append(
+                (name, reference["normalized"], current["normalized"], change)
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument(
+        "--search-sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000]
+    )
+    parser.add_argument("--cases", nargs="+", help="Only run these cases")
+    parser.add_argument("--json", help="Optional path to write results as JSON")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", help="Write the results as a baseline")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="Allowed growth of normalized time before failing (0.5 = 50%%)",
+    )
+    args = parser.parse_args()
+
+    # Per-file and per-batch progress logs would dominate the output
+    logging.disable(logging.INFO)
+    results = run_suite(args)
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            for name, reference, current, change in regressions:
+                print(
+                    f"REGRESSION {name}: {reference} -> {current} "
+                    f"({change:+.1%}, tolerance {args.tolerance:.0%})",
+                    file=sys.stderr,
+                )
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+
+from components.utils.hashing import hash_content
+from components.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SUPPORTED_DTYPES = {"float32": np.float32, "float16": np.float16}
+DEFAULT_SHARD_BYTES = 64 * 1024 * 1024
+INDEX_FILENAME = "index.sqlite"
+
+
+class EmbeddingCache:
+    """
+    Content-addressed, on-disk store of embedding vectors.
+
+    Vectors are appended to fixed-size binary shard files
+    (``shard-00000.bin``, ...) in float32 or float16. A SQLite index maps each
+    key to its shard, byte offset and dimension, and records a logical access
+    clock used for LRU eviction once ``max_bytes`` of live vectors is exceeded.
+    Shards left mostly empty by eviction are compacted or deleted.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: Optional[int] = None,
+        dtype: str = "float32",
+        shard_bytes: int = DEFAULT_SHARD_BYTES,
+    ):
+        """
+        :param cache_dir: Directory holding the shard files and the index
+        :param max_bytes: Upper bound on stored vector bytes (None = unbounded)
+        :param dtype: On-disk vector precision, "float32" or "float16"
+        :param shard_bytes: Size after which a new shard file is started
+        """
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported cache dtype: {dtype}")
+
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.dtype = np.dtype(SUPPORTED_DTYPES[dtype])
+        self.shard_bytes = shard_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.RLock()
+        self._readers = {}
+        self._conn = sqlite3.connect(
+            os.path.join(cache_dir, INDEX_FILENAME), check_same_thread=False
+        )
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                shard INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                dim INTEGER NOT NULL,
+                nbytes INTEGER NOT NULL,
+                last_used INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_used);
+            CREATE INDEX IF NOT EXISTS entries_shard ON entries (shard);
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+            """
+        )
+        stored_dtype = self._get_meta("dtype")
+        if stored_dtype is None:
+            self._set_meta("dtype", self.dtype.name)
+        elif stored_dtype != self.dtype.name:
+            raise ValueError(
+                f"Cache at {cache_dir} stores {stored_dtype} vectors, not {self.dtype.name}"
+            )
+        self._conn.commit()
+
+        row = self._conn.execute(
+            "SELECT MAX(shard), MAX(last_used) FROM entries"
+        ).fetchone()
+        self._active_shard = row[0] or 0
+        self._clock = row[1] or 0
+
+    # --- public API -------------------------------------------------------
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Looks up vectors by key. Missing keys yield ``None``.
+
+        :param keys: Cache keys
+        :return: List aligned with ``keys`` of float32 arrays or None
+        """
+        results: List[Optional[np.ndarray]] = [None] * len(keys)
+        if not keys:
+            return results
+
+        with self._lock:
+            rows = {}
+            unique_keys = list(dict.fromkeys(keys))
+            # SQLite limits the number of bound parameters per statement
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start : start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for row in self._conn.execute(
+                    f"SELECT key, shard, offset, dim, nbytes FROM entries "
+                    f"WHERE key IN ({placeholders})",
+                    batch,
+                ):
+                    rows[row[0]] = row[1:]
+
+            touched = []
+            for i, key in enumerate(keys):
+                entry = rows.get(key)
+                if entry is None:
+                    self.misses += 1
+                    continue
+                shard, offset, dim, nbytes = entry
+                results[i] = self._read_vector(shard, offset, dim, nbytes)
+                self.hits += 1
+                touched.append(key)
+
+            if touched:
+                self._clock += 1
+                self._conn.executemany(
+                    "UPDATE entries SET last_used = ? WHERE key = ?",
+                    [(self._clock, key) for key in dict.fromkeys(touched)],
+                )
+                self._conn.commit()
+
+        return results
+
+    def put_many(self, items: Dict[str, Sequence[float]]):
+        """
+        Stores vectors under their keys. Existing keys are left untouched.
+
+        :param items: Mapping of cache key to vector
+        """
+        if not items:
+            return
+
+        with self._lock:
+            self._clock += 1
+            rows = []
+            for key, vector in items.items():
+                if self._conn.execute(
+                    "SELECT 1 FROM entries WHERE key = ?", (key,)
+                ).fetchone():
+                    continue
+                data = np.asarray(vector, dtype=self.dtype).tobytes()
+                shard, offset = self._append(data)
+                rows.append((key, shard, offset, len(vector), len(data), self._clock))
+            self._conn.executemany(
+                "INSERT INTO entries (key, shard, offset, dim, nbytes, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            self._evict()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns hit/miss counters and the current cache footprint.
+        """
+        with self._lock:
+            entries, live_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM entries"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": live_bytes,
+        }
+
+    def close(self):
+        with self._lock:
+            for handle in self._readers.values():
+                handle.close()
+            self._readers.clear()
+            self._conn.close()
+
+    # --- internals --------------------------------------------------------
+
+    def _get_meta(self, name: str) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE name = ?", (name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name: str, value: str):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value)
+        )
+
+    def _shard_path(self, shard: int) -> str:
+        return os.path.join(self.cache_dir, f"shard-{shard:05d}.bin")
+
+    def _append(self, data: bytes):
+        path = self._shard_path(self._active_shard)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size and size + len(data) > self.shard_bytes:
+            self._active_shard += 1
+            path = self._shard_path(self._active_shard)
+            size = 0
+        with open(path, "ab") as f:
+            f.write(data)
+        return self._active_shard, size
+
+    def _read_vector(self, shard: int, offset: int, dim: int, nbytes: int):
+        handle = self._readers.get(shard)
+        if handle is None:
+            handle = open(self._shard_path(shard), "rb")
+            self._readers[shard] = handle
+        handle.seek(offset)
+        data = handle.read(nbytes)
+        return np.frombuffer(data, dtype=self.dtype, count=dim).astype(np.float32)
+
+    def _drop_shard(self, shard: int):
+        handle = self._readers.pop(shard, None)
+        if handle:
+            handle.close()
+        path = self._shard_path(shard)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+
+        (live_bytes,) = self._conn.execute(
+            "SELECT COALESCE(SUM(nbytes), 0) FROM entries"
+        ).fetchone()
+        if live_bytes <= self.max_bytes:
+            return
+
+        touched_shards = set()
+        cursor = self._conn.execute(
+            "SELECT key, shard, nbytes FROM entries ORDER BY last_used ASC"
+        )
+        victims = []
+        for key, shard, nbytes in cursor:
+            if live_bytes <= self.max_bytes:
+                break
+            victims.append((key,))
+            touched_shards.add(shard)
+            live_bytes -= nbytes
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self.evictions += len(victims)
+        self._conn.commit()
+        logger.debug(f"Evicted {len(victims)} embeddings from {self.cache_dir}")
+
+        for shard in touched_shards:
+            self._reclaim(shard)
+
+    def _reclaim(self, shard: int):
+        """
+        Deletes an emptied shard, or rewrites one that is less than half live.
+        """
+        path = self._shard_path(shard)
+        if not os.path.exists(path):
+            return
+        live_count, live_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM entries WHERE shard = ?",
+            (shard,),
+        ).fetchone()
+        if live_count == 0:
+            self._drop_shard(shard)
+            if shard == self._active_shard:
+                self._active_shard += 1
+            return
+        if live_bytes * 2 >= os.path.getsize(path) or shard == self._active_shard:
+            return
+
+        rows = self._conn.execute(
+            "SELECT key, offset, dim, nbytes FROM entries WHERE shard = ?", (shard,)
+        ).fetchall()
+        moved = []
+        for key, offset, dim, nbytes in rows:
+            data = self._read_vector(shard, offset, dim, nbytes).astype(self.dtype)
+            new_shard, new_offset = self._append(data.tobytes())
+            moved.append((new_shard, new_offset, key))
+        self._conn.executemany(
+            "UPDATE entries SET shard = ?, offset = ? WHERE key = ?", moved
+        )
+        self._conn.commit()
+        self._drop_shard(shard)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embedding model so vectors are looked up in an EmbeddingCache
+    before the underlying model is called.
+
+    Keys are built from ``(provider, model_name, sha256(text))`` so one cache
+    directory can be shared safely between models.
+    """
+
+    def __init__(
+        self,
+        embedding_model: Embeddings,
+        cache: EmbeddingCache,
+        provider: str,
+        model_name: str,
+    ):
+        self.embedding_model = embedding_model
+        self.cache = cache
+        self.namespace = f"{provider}:{model_name}"
+
+    def cache_key(self, text: str, kind: str = "doc") -> str:
+        return f"{self.namespace}:{kind}:{hash_content(text)}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self.cache_key(text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        missing = {}
+        for key, text, vector in zip(keys, texts, cached):
+            if vector is None and key not in missing:
+                missing[key] = text
+
+        computed = {}
+        if missing:
+            vectors = self.embedding_model.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(computed)
+
+        return [
+            vector.tolist() if vector is not None else list(computed[key])
+            for key, vector in zip(keys, cached)
+        ]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.cache_key(text, kind="query")
+        (vector,) = self.cache.get_many([key])
+        if vector is not None:
+            return vector.tolist()
+        vector = self.embedding_model.embed_query(text)
+        self.cache.put_many({key: vector})
+        return list(vector)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Batch form of embed_query: one cache lookup, and the model's query
+        embedding for each distinct text that is not cached.
+        """
+        keys = [self.cache_key(text, kind="query") for text in texts]
+        cached = self.cache.get_many(keys)
+
+        computed = {}
+        for key, text, vector in zip(keys, texts, cached):
+            if vector is None and key not in computed:
+                computed[key] = self.embedding_model.embed_query(text)
+        if computed:
+            self.cache.put_many(computed)
+
+        return [
+            vector.tolist() if vector is not None else list(computed[key])
+            for key, vector in zip(keys, cached)
+        ]
+
+    def stats(self) -> Dict[str, float]:
+        return self.cache.stats()
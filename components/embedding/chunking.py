@@ -0,0 +1,449 @@
+import os
+import re
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from langchain_core.documents import Document
+
+from components.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_ENCODING = "cl100k_base"
+# Cutting a chunk out of a document can tokenize its first and last words
+# differently; chunks within this many tokens of the limit are re-encoded
+BOUNDARY_MARGIN = 8
+
+_SENTENCE_END_RE = re.compile(r"[.!?][\"')\]]*\s+|\n\s*\n")
+_HEADING_RE = re.compile(r"^#{1,6}[ \t]+(.+?)[ \t#]*$", re.MULTILINE)
+# Lookup table: is this (first) byte of a token ASCII whitespace
+_IS_SPACE = np.zeros(256, dtype=bool)
+_IS_SPACE[list(b" \t\n\r\f\v")] = True
+
+# Engine held by each worker process, set by _init_worker
+_worker_engine = None
+
+
+class TokenizedText:
+    """
+    A text tokenized once, with the character offset of every token.
+
+    Chunk strategies cut the text at token indices and derive their cut
+    points (word, sentence and heading starts) from these shared offsets, so
+    the text is never re-tokenized per strategy. Cut point arrays are
+    computed on first use and cached.
+    """
+
+    def __init__(self, text: str, tokens: np.ndarray, token_lengths: np.ndarray):
+        """
+        :param text: The text
+        :param tokens: Its token ids
+        :param token_lengths: Byte length of every token id of the encoding
+        """
+        self.text = text
+        data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+        byte_offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+        np.cumsum(token_lengths[tokens], out=byte_offsets[1:])
+        # Characters start at every byte that is not a UTF-8 continuation byte
+        char_starts = (data & 0xC0) != 0x80
+        chars_before = np.zeros(len(data) + 1, dtype=np.int64)
+        np.cumsum(char_starts, out=chars_before[1:])
+        aligned = np.append(char_starts[byte_offsets[:-1]], True)
+        #: Character offset of every token, plus the text length. A token
+        #: starting inside a character points at that character, like
+        #: ``Encoding.decode_with_offsets``
+        self.offsets = chars_before[byte_offsets] - ~aligned
+        first_bytes = data[byte_offsets[:-1]]
+        self._aligned = aligned
+        self._char_offsets = None
+        self._space_before = _IS_SPACE[first_bytes]
+        self._cache: Dict[str, List[int]] = {}
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _boundaries(self, tokens: np.ndarray) -> List[int]:
+        # Cut points are searched one at a time, where bisect on a list is
+        # much faster than NumPy
+        boundaries = tokens.tolist()
+        if not boundaries or boundaries[0] != 0:
+            boundaries.insert(0, 0)
+        if boundaries[-1] != len(self):
+            boundaries.append(len(self))
+        return boundaries
+
+    @property
+    def aligned_starts(self) -> List[int]:
+        """
+        Token indices where a character starts, so a cut splits no character.
+        """
+        if "aligned" not in self._cache:
+            self._cache["aligned"] = self._boundaries(np.flatnonzero(self._aligned))
+        return self._cache["aligned"]
+
+    @property
+    def word_starts(self) -> List[int]:
+        """
+        Token indices of tokens beginning with whitespace.
+        """
+        if "words" not in self._cache:
+            self._cache["words"] = self._boundaries(np.flatnonzero(self._space_before))
+        return self._cache["words"]
+
+    @property
+    def sentence_starts(self) -> List[int]:
+        """
+        Token indices where a sentence or paragraph starts.
+        """
+        if "sentences" not in self._cache:
+            ends = [match.end() for match in _SENTENCE_END_RE.finditer(self.text)]
+            self._cache["sentences"] = self.boundaries_at(ends)
+        return self._cache["sentences"]
+
+    def token_at(self, positions: Sequence[int]) -> np.ndarray:
+        """
+        Returns the indices of the tokens containing character positions.
+        """
+        tokens = np.searchsorted(self.offsets, positions, side="right") - 1
+        return np.clip(tokens, 0, len(self))
+
+    def boundaries_at(self, positions: Sequence[int]) -> List[int]:
+        """
+        Returns the sorted, unique token indices containing character
+        positions, plus 0 and the token count.
+        """
+        return self._boundaries(np.unique(self.token_at(positions)))
+
+    def pack(
+        self,
+        boundaries: List[int],
+        size: int,
+        overlap: int = 0,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ) -> List[Tuple[int, int]]:
+        """
+        Greedily packs the units between boundaries into token spans.
+
+        Each span ends at the last boundary that keeps it within ``size``
+        tokens. A unit longer than ``size`` is cut at a word start, or failing
+        that at a character start. The next span starts at the first boundary
+        at least ``overlap`` tokens before the previous end.
+
+        :param boundaries: Sorted token indices where spans may start and end
+        :param size: Maximum tokens per span
+        :param overlap: Tokens shared by consecutive spans (at most)
+        :param start: First token to cover
+        :param stop: Token after the last one to cover (default: all)
+        :return: List of (start, end) token indices
+        """
+        stop = len(self) if stop is None else stop
+        spans = []
+        while start < stop:
+            limit = start + size
+            if limit >= stop:
+                end = stop
+            else:
+                end = boundaries[bisect_right(boundaries, limit) - 1]
+                if end <= start:
+                    end = self._cut(start, limit)
+            spans.append((start, end))
+            if end >= stop:
+                break
+            next_start = boundaries[bisect_left(boundaries, end - overlap)]
+            start = next_start if start < next_start < end else end
+        return spans
+
+    def _cut(self, start: int, limit: int) -> int:
+        for candidates in (self.word_starts, self.aligned_starts):
+            end = candidates[bisect_right(candidates, limit) - 1]
+            if end > start:
+                return end
+        return limit
+
+    def span_text(self, start: int, end: int) -> Tuple[str, int]:
+        """
+        Returns the stripped text of a token span and its character offset.
+        """
+        if self._char_offsets is None:
+            self._char_offsets = self.offsets.tolist()
+        first = self._char_offsets[start]
+        raw = self.text[first : self._char_offsets[end]]
+        text = raw.lstrip()
+        return text.rstrip(), first + len(raw) - len(text)
+
+
+class ChunkStrategy:
+    """
+    Base class of chunk strategies run by a ChunkingEngine.
+
+    Subclasses implement ``spans``, turning a TokenizedText into token spans,
+    each with extra chunk metadata. Strategies are sent to worker processes,
+    so they must be picklable.
+    """
+
+    def __init__(
+        self, chunk_tokens: int = 256, overlap_tokens: int = 0, name: str = None
+    ):
+        """
+        :param chunk_tokens: Maximum tokens per chunk
+        :param overlap_tokens: Tokens shared by consecutive chunks (at most)
+        :param name: Strategy name stored in ``metadata["chunkers"]``
+            (default: the class name)
+        """
+        if not 0 <= overlap_tokens < chunk_tokens:
+            raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.name = name or self.__class__.__name__
+
+    def spans(self, tokenized: TokenizedText) -> List[Tuple[int, int, Dict]]:
+        raise NotImplementedError
+
+
+class TokenWindows(ChunkStrategy):
+    """
+    Fixed windows of ``chunk_tokens`` tokens, ending on word starts.
+    """
+
+    def __init__(
+        self, chunk_tokens: int = 256, overlap_tokens: int = 32, name: str = None
+    ):
+        super().__init__(chunk_tokens, overlap_tokens, name)
+
+    def spans(self, tokenized: TokenizedText) -> List[Tuple[int, int, Dict]]:
+        windows = tokenized.pack(
+            tokenized.word_starts, self.chunk_tokens, self.overlap_tokens
+        )
+        return [(start, end, {}) for start, end in windows]
+
+
+class SentenceChunks(ChunkStrategy):
+    """
+    Whole sentences and paragraphs packed into chunks of up to
+    ``chunk_tokens`` tokens. Sentences longer than that are cut at words.
+    """
+
+    def spans(self, tokenized: TokenizedText) -> List[Tuple[int, int, Dict]]:
+        chunks = tokenized.pack(
+            tokenized.sentence_starts, self.chunk_tokens, self.overlap_tokens
+        )
+        return [(start, end, {}) for start, end in chunks]
+
+
+class HeadingChunks(ChunkStrategy):
+    """
+    Markdown sections: chunks never cross a heading, and long sections are
+    packed by sentences. Each chunk's ``metadata["heading"]`` holds the
+    heading of its section (absent before the first heading).
+    """
+
+    def spans(self, tokenized: TokenizedText) -> List[Tuple[int, int, Dict]]:
+        headings = list(_HEADING_RE.finditer(tokenized.text))
+        positions = [match.start() for match in headings]
+        titles = {}
+        for token, match in zip(tokenized.token_at(positions).tolist(), headings):
+            titles.setdefault(token, match.group(1).strip())
+
+        starts = tokenized.boundaries_at(positions)
+        spans = []
+        for start, stop in zip(starts[:-1], starts[1:]):
+            metadata = {"heading": titles[start]} if start in titles else {}
+            for chunk in tokenized.pack(
+                tokenized.sentence_starts,
+                self.chunk_tokens,
+                self.overlap_tokens,
+                start,
+                stop,
+            ):
+                spans.append((*chunk, metadata))
+        return spans
+
+
+def get_encoding(encoding: Union[str, "tiktoken.Encoding"]):
+    """
+    Returns a tiktoken encoding, given its name or the encoding itself.
+    """
+    if isinstance(encoding, str):
+        import tiktoken
+
+        return tiktoken.get_encoding(encoding)
+    return encoding
+
+
+def token_lengths(encoding) -> np.ndarray:
+    """
+    Returns the byte length of every token id of an encoding (0 for unused ids).
+    """
+    lengths = np.zeros(encoding.max_token_value + 1, dtype=np.int64)
+    for token in range(len(lengths)):
+        try:
+            lengths[token] = len(encoding.decode_single_token_bytes(token))
+        except KeyError:
+            continue
+    return lengths
+
+
+def _init_worker(engine):
+    global _worker_engine
+
+    _worker_engine = engine
+
+
+def _chunk_in_worker(document: Document) -> List[Tuple[Document, str]]:
+    return _worker_engine.chunk_document(document)
+
+
+class ChunkingEngine:
+    """
+    Token-aware chunker that tokenizes each document once and derives
+    several chunk strategies from the shared token offsets.
+
+    Use it as (one of) the ``chunkers`` of ``index_documents``,
+    ``index_documents_streaming`` or ``sync_documents``: each strategy's
+    chunks are tagged with its name in ``metadata["chunkers"]``, like those of
+    separate text splitters. Documents are chunked on a process pool when
+    several are split at once.
+
+    Every chunk holds at most ``max_tokens`` tokens of the encoding. Chunk
+    sizes are measured on the document's own tokens; a chunk within
+    ``BOUNDARY_MARGIN`` tokens of the limit is re-encoded on its own and
+    shortened if its cut words tokenized differently. Use the encoding of
+    the embedding model (e.g. cl100k_base for OpenAI embeddings); for other
+    tokenizers, keep ``max_tokens`` below the model limit.
+    """
+
+    def __init__(
+        self,
+        strategies: Optional[List[ChunkStrategy]] = None,
+        encoding: Union[str, "tiktoken.Encoding"] = DEFAULT_ENCODING,
+        max_tokens: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        chunksize: Optional[int] = None,
+    ):
+        """
+        :param strategies: Chunk strategies (default: TokenWindows(256, 32),
+            SentenceChunks(256) and HeadingChunks(512))
+        :param encoding: tiktoken encoding name, or an Encoding object
+        :param max_tokens: Hard token limit per chunk (default: the largest
+            ``chunk_tokens`` of the strategies)
+        :param max_workers: Worker processes (default: CPU count); 0 or 1
+            chunks in this process
+        :param chunksize: Documents sent to a worker at a time (default: an
+            even split into four tasks per worker)
+        """
+        self.strategies = strategies or [
+            TokenWindows(256, 32),
+            SentenceChunks(256),
+            HeadingChunks(512),
+        ]
+        names = [strategy.name for strategy in self.strategies]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Strategy names must be unique, got {names}")
+        largest = max(strategy.chunk_tokens for strategy in self.strategies)
+        self.max_tokens = max_tokens or largest
+        if largest > self.max_tokens:
+            raise ValueError(
+                f"chunk_tokens={largest} exceeds max_tokens={self.max_tokens}"
+            )
+        self.encoding = get_encoding(encoding)
+        self.max_workers = max_workers
+        self.chunksize = chunksize
+        self._token_lengths = None
+
+    def __getstate__(self):
+        # Workers rebuild the token length table instead of unpickling it
+        return dict(self.__dict__, _token_lengths=None)
+
+    def tokenize(self, text: str) -> TokenizedText:
+        if self._token_lengths is None:
+            self._token_lengths = token_lengths(self.encoding)
+        tokens = self.encoding.encode_to_numpy(text, disallowed_special=())
+        return TokenizedText(text, tokens, self._token_lengths)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode_to_numpy(text, disallowed_special=()))
+
+    def chunk_document(self, document: Document) -> List[Tuple[Document, str]]:
+        """
+        Splits one document with every strategy.
+
+        :param document: LangChain Document to split
+        :return: List of (chunk, strategy name). Chunks carry the document's
+            metadata plus "start_index" (character offset), "tokens" and any
+            strategy metadata such as "heading"
+        """
+        tokenized = self.tokenize(document.page_content)
+        chunks = []
+        for strategy in self.strategies:
+            for start, end, extra in strategy.spans(tokenized):
+                text, start_index, tokens = self._fit(tokenized, start, end)
+                if not text:
+                    continue
+                metadata = dict(
+                    document.metadata, start_index=start_index, tokens=tokens, **extra
+                )
+                chunks.append(
+                    (Document(page_content=text, metadata=metadata), strategy.name)
+                )
+        return chunks
+
+    def _fit(self, tokenized: TokenizedText, start: int, end: int):
+        text, start_index = tokenized.span_text(start, end)
+        tokens = end - start
+        if tokens <= self.max_tokens - BOUNDARY_MARGIN:
+            return text, start_index, tokens
+        tokens = self.count_tokens(text)
+        while tokens > self.max_tokens:
+            # Give back the excess, at a character start, and measure again
+            aligned = tokenized.aligned_starts
+            limit = end - (tokens - self.max_tokens)
+            end = int(aligned[np.searchsorted(aligned, limit, side="right") - 1])
+            if end <= start:
+                return "", start_index, 0
+            text, start_index = tokenized.span_text(start, end)
+            tokens = self.count_tokens(text)
+        return text, start_index, tokens
+
+    def _workers(self, count: int) -> int:
+        workers = self.max_workers
+        if workers is None:
+            workers = os.cpu_count() or 1
+        return min(workers, count)
+
+    def split_with_strategies(
+        self, documents: Iterable[Document]
+    ) -> Tuple[List[Document], List[str]]:
+        """
+        Splits documents with every strategy, in parallel across processes.
+
+        :param documents: LangChain Documents
+        :return: (chunks, name of the strategy that produced each chunk), in
+            document order
+        """
+        documents = list(documents)
+        workers = self._workers(len(documents))
+        if workers <= 1:
+            results = map(self.chunk_document, documents)
+        else:
+            chunksize = self.chunksize or max(1, len(documents) // (4 * workers))
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(self,)
+            ) as executor:
+                results = list(
+                    executor.map(_chunk_in_worker, documents, chunksize=chunksize)
+                )
+        chunks, strategies = [], []
+        for pairs in results:
+            for chunk, strategy in pairs:
+                chunks.append(chunk)
+                strategies.append(strategy)
+        return chunks, strategies
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        """
+        Splits documents with every strategy, like a LangChain text splitter.
+        """
+        return self.split_with_strategies(documents)[0]
@@ -1,26 +1,60 @@
-from langchain.embeddings import OpenAIEmbeddings
-from langchain_huggingface import HuggingFaceEmbeddings
+from typing import Optional
+
+from components.utils.imports import import_string
 
 DEFAULT_MODEL_NAME = "all-mpnet-base-v2"
+# Provider classes are imported on first use: langchain_huggingface pulls in
+# torch and the OpenAI client is slow to import
 SUPPORTED_MODELS = {
-    "huggingface": HuggingFaceEmbeddings,
-    "openai": OpenAIEmbeddings,
+    "huggingface": "langchain_huggingface:HuggingFaceEmbeddings",
+    "openai": "langchain.embeddings:OpenAIEmbeddings",
 }
 
 
 def get_embedding_model(
-    provider: str = "huggingface", model_name: str = DEFAULT_MODEL_NAME
+    provider: str = "huggingface",
+    model_name: str = DEFAULT_MODEL_NAME,
+    cache_dir: Optional[str] = None,
+    cache_max_bytes: Optional[int] = None,
+    cache_dtype: str = "float32",
+    num_workers: Optional[int] = None,
+    **engine_kwargs,
 ):
     """
     Returns an embedding model instance.
 
     :param provider: Either "huggingface" or "openai"
     :param model_name: Model identifier (only relevant for HuggingFace)
+    :param cache_dir: If set, wrap the model in an on-disk embedding cache
+    :param cache_max_bytes: LRU size limit of the cache (None = unbounded)
+    :param cache_dtype: Precision of cached vectors, "float32" or "float16"
+    :param num_workers: If set, use the length-batched ParallelEmbeddings engine
+        with this many worker processes (HuggingFace only, 0 = in-process)
+    :param engine_kwargs: Extra ParallelEmbeddings options (max_batch_size, ...)
     :return: Embedding model object
     """
-    if provider == "huggingface":
-        return HuggingFaceEmbeddings(model_name=f"sentence-transformers/{model_name}")
-    elif provider == "openai":
-        return OpenAIEmbeddings()
-    else:
+    if num_workers is not None and provider != "huggingface":
+        raise ValueError("The embedding engine only supports the huggingface provider")
+
+    if provider not in SUPPORTED_MODELS:
         raise ValueError(f"Unsupported embedding provider: {provider}")
+
+    if provider == "huggingface" and num_workers is not None:
+        from components.embedding.engine import ParallelEmbeddings
+
+        model = ParallelEmbeddings(model_name, num_workers=num_workers, **engine_kwargs)
+    elif provider == "huggingface":
+        model = import_string(SUPPORTED_MODELS[provider])(
+            model_name=f"sentence-transformers/{model_name}"
+        )
+    else:
+        model = import_string(SUPPORTED_MODELS[provider])()
+        model_name = model.model
+
+    if cache_dir is None:
+        return model
+
+    from components.embedding.cache import CachedEmbeddings, EmbeddingCache
+
+    cache = EmbeddingCache(cache_dir, max_bytes=cache_max_bytes, dtype=cache_dtype)
+    return CachedEmbeddings(model, cache, provider=provider, model_name=model_name)
@@ -0,0 +1,187 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional
+
+from langchain.embeddings.base import Embeddings
+
+from components.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_BATCH_CHARS = 32_000
+
+# Model held by each worker process, set by _init_worker
+_worker_model = None
+
+
+def load_huggingface_model(model_name: str, max_batch_size: int) -> Embeddings:
+    """
+    Default model factory: a sentence-transformers model wrapped by LangChain.
+    """
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(
+        model_name=f"sentence-transformers/{model_name}",
+        encode_kwargs={"batch_size": max_batch_size},
+    )
+
+
+def _init_worker(model_factory, model_name, max_batch_size, threads_per_worker):
+    global _worker_model
+
+    if threads_per_worker:
+        try:
+            import torch
+
+            torch.set_num_threads(threads_per_worker)
+        except ImportError:
+            pass
+    _worker_model = model_factory(model_name, max_batch_size)
+
+
+def _embed_batch(texts: List[str]) -> List[List[float]]:
+    return _worker_model.embed_documents(texts)
+
+
+def _embed_query(text: str) -> List[float]:
+    return _worker_model.embed_query(text)
+
+
+def make_batches(
+    texts: List[str],
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    max_batch_chars: int = DEFAULT_MAX_BATCH_CHARS,
+) -> List[List[int]]:
+    """
+    Groups text indices into length-sorted batches.
+
+    Texts are sorted by length so each batch holds similarly sized inputs and
+    little padding is wasted. A batch is closed once it reaches
+    ``max_batch_size`` items or once ``len(batch) * longest_text`` would exceed
+    ``max_batch_chars``, so short texts get large batches and long texts small
+    ones.
+
+    :param texts: Input texts
+    :param max_batch_size: Upper bound on items per batch
+    :param max_batch_chars: Padded-size budget per batch, in characters
+    :return: List of batches, each a list of indices into ``texts``
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    batches = []
+    current = []
+    for i in order:
+        longest = len(texts[i])  # inputs are sorted, so the newest is the longest
+        if current and (
+            len(current) >= max_batch_size
+            or (len(current) + 1) * longest > max_batch_chars
+        ):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+class ParallelEmbeddings(Embeddings):
+    """
+    Embedding engine that batches inputs by length and fans the batches out
+    over a pool of worker processes, each holding its own model copy.
+
+    With ``num_workers=0`` the batches are embedded in the calling process.
+    Results are always returned in input order.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        num_workers: int = 0,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_batch_chars: int = DEFAULT_MAX_BATCH_CHARS,
+        threads_per_worker: Optional[int] = None,
+        model_factory: Callable[[str, int], Embeddings] = load_huggingface_model,
+        mp_context=None,
+    ):
+        """
+        :param model_name: sentence-transformers model identifier
+        :param num_workers: Number of worker processes (0 = embed in-process)
+        :param max_batch_size: Upper bound on items per batch
+        :param max_batch_chars: Padded-size budget per batch, in characters
+        :param threads_per_worker: Torch threads per worker (default: cores / workers)
+        :param model_factory: Picklable callable ``(model_name, max_batch_size)``
+            returning an Embeddings object; called once per worker
+        :param mp_context: Optional multiprocessing context for the pool
+        """
+        self.model_name = model_name
+        self.num_workers = num_workers
+        self.max_batch_size = max_batch_size
+        self.max_batch_chars = max_batch_chars
+        self.threads_per_worker = threads_per_worker
+        if num_workers and threads_per_worker is None:
+            self.threads_per_worker = max(1, (os.cpu_count() or 1) // num_workers)
+        self.model_factory = model_factory
+        self.mp_context = mp_context
+        self._executor = None
+        self._local_model = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            logger.info(
+                f"Starting {self.num_workers} embedding workers for {self.model_name}"
+            )
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=self.mp_context,
+                initializer=_init_worker,
+                initargs=(
+                    self.model_factory,
+                    self.model_name,
+                    self.max_batch_size,
+                    self.threads_per_worker,
+                ),
+            )
+        return self._executor
+
+    def _get_local_model(self) -> Embeddings:
+        if self._local_model is None:
+            self._local_model = self.model_factory(self.model_name, self.max_batch_size)
+        return self._local_model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        batches = make_batches(texts, self.max_batch_size, self.max_batch_chars)
+        batch_texts = [[texts[i] for i in batch] for batch in batches]
+
+        if self.num_workers:
+            vectors_per_batch = self._get_executor().map(_embed_batch, batch_texts)
+        else:
+            model = self._get_local_model()
+            vectors_per_batch = (model.embed_documents(b) for b in batch_texts)
+
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        for batch, vectors in zip(batches, vectors_per_batch):
+            for i, vector in zip(batch, vectors):
+                results[i] = vector
+        return results
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.num_workers:
+            return self._get_executor().submit(_embed_query, text).result()
+        return self._get_local_model().embed_query(text)
+
+    def close(self):
+        """
+        Shuts down the worker pool, if one was started.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,6 +1,5 @@
 import os
 
-from langchain.schema import Document
 from langchain_mongodb import MongoDBAtlasVectorSearch
 
 # Map store types to constructor functions
@@ -55,25 +54,3 @@ def create_vector_store(store_type="mongodb", embedding_model=None, **kwargs):
 
     factory_class = VECTOR_STORE_REGISTRY[store_type]
     return factory_class.create(embedding_model=embedding_model, **kwargs)
-
-
-def index_documents(documents: list[Document], vector_store, chunkers: list):
-    """
-    Index documents in the specified vector store using multiple chunking strategies.
-
-    :param documents: List of LangChain Document objects
-    :param vector_store: A vector store object
-    :param chunkers: List of text splitters to apply
-    """
-    all_chunks = []
-
-    for chunker in chunkers:
-        print(f"🔧 Applying chunker: {chunker.__class__.__name__}")
-        chunks = chunker.split_documents(documents)
-        print(f"✅ {len(chunks)} chunks created by {chunker.__class__.__name__}")
-        all_chunks.extend(chunks)
-
-    print(f"📦 Total {len(all_chunks)} chunks across all strategies. Uploading...")
-
-    vector_store.add_documents(all_chunks)
-    print(f"✅ Indexed {len(all_chunks)} chunks.")
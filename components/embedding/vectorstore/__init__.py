@@ -1,11 +1,31 @@
-from .faiss_store import FAISSVectorStoreFactory
-from .mongodb_store import MongoDBVectorStoreFactory
+import importlib
 
+from .hybrid import BM25Index, reciprocal_rank_fusion
+from .indexing import IndexingError, index_documents, index_documents_streaming
+from .query_cache import QueryCache
+from .registry import (
+    VECTOR_STORE_REGISTRY,
+    create_vector_store,
+    get_vector_store_class,
+    register_vector_store,
+)
+from .sync import IndexManifest, sync_documents
 
-def create_vector_store(store_type: str, embedding_model, **kwargs):
-    if store_type == "mongodb":
-        return MongoDBVectorStoreFactory(embedding_model, **kwargs)
-    elif store_type == "faiss":
-        return FAISSVectorStoreFactory(embedding_model, **kwargs)
-    else:
-        raise ValueError(f"Unsupported vector store type: {store_type}")
+# Backends pull in heavy dependencies (pymongo, faiss), so they are only
+# imported when first accessed
+_LAZY_ATTRIBUTES = {
+    "FAISSVectorStoreFactory": ".faiss_store",
+    "MongoDBVectorStoreFactory": ".mongodb_store",
+    "NumpyVectorStoreFactory": ".numpy_store",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
@@ -1,37 +1,523 @@
+import math
+import os
+from typing import Optional
+
+import numpy as np
 from langchain.docstore.in_memory import InMemoryDocstore
 from langchain.embeddings.base import Embeddings
 from langchain.vectorstores.faiss import FAISS
 
+from components.utils.logger import get_logger
+
+from .hybrid import DEFAULT_RRF_K, BM25Index, reciprocal_rank_fusion
+from .indexing import embed_queries
+from .query_cache import QueryCache
+from .registry import register_vector_store
+from .sqlite_docstore import (
+    DOCSTORE_FILENAME,
+    SQLiteDocstore,
+    SQLiteIndexMap,
+    write_sqlite_docstore,
+)
+
+logger = get_logger(__name__)
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+IVF_INDEX_TYPES = ("ivf_flat", "ivf_pq")
+DEFAULT_NLIST = 1024
+# FAISS k-means wants at least this many training vectors per centroid
+MIN_POINTS_PER_CENTROID = 39
+BM25_FILENAME = "bm25.json"
+BUILD_OPTIONS = (
+    "nlist",
+    "pq_m",
+    "pq_nbits",
+    "hnsw_m",
+    "ef_construction",
+    "train_sample_size",
+    "seed",
+)
+
+
+def build_faiss_index(
+    vectors: np.ndarray,
+    index_type: str = "flat",
+    nlist: int = DEFAULT_NLIST,
+    pq_m: int = 16,
+    pq_nbits: int = 8,
+    hnsw_m: int = 32,
+    ef_construction: int = 200,
+    train_sample_size: int = 100_000,
+    seed: int = 0,
+):
+    """
+    Create an empty FAISS index of the requested type, trained on a sample of
+    ``vectors`` when the index type needs training.
+
+    ``nlist`` and ``pq_nbits`` are reduced when there are too few vectors to
+    train that many centroids. A warning is logged when the sample has fewer
+    than ``MIN_POINTS_PER_CENTROID`` vectors per IVF list, as the centroids
+    then fit the sample rather than the corpus.
+
+    :param vectors: float32 matrix of shape (n, dim) used for training
+    :param index_type: One of "flat", "ivf_flat", "ivf_pq" or "hnsw"
+    :param nlist: Number of IVF inverted lists
+    :param pq_m: Number of PQ sub-quantizers (must divide dim)
+    :param pq_nbits: Bits per PQ code
+    :param hnsw_m: Neighbours per node in the HNSW graph
+    :param ef_construction: HNSW build-time search depth
+    :param train_sample_size: Maximum number of vectors used for training
+    :param seed: Seed for the training sample
+    :return: faiss.Index
+    """
+    import faiss
+
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unsupported FAISS index type: {index_type}")
+
+    n, dim = vectors.shape
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dim)
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, hnsw_m)
+        index.hnsw.efConstruction = ef_construction
+        return index
+
+    nlist = max(1, min(nlist, n))
+    if index_type == "ivf_flat":
+        index = faiss.index_factory(dim, f"IVF{nlist},Flat")
+    else:
+        if dim % pq_m:
+            raise ValueError(f"pq_m={pq_m} must divide the embedding dimension {dim}")
+        # Each PQ sub-quantizer trains 2**nbits centroids
+        pq_nbits = max(1, min(pq_nbits, int(math.log2(n))))
+        index = faiss.index_factory(dim, f"IVF{nlist},PQ{pq_m}x{pq_nbits}")
+
+    if min(n, train_sample_size) < MIN_POINTS_PER_CENTROID * nlist:
+        logger.warning(
+            f"Training {nlist} IVF lists on {min(n, train_sample_size)} vectors; "
+            f"{MIN_POINTS_PER_CENTROID * nlist} or more are recommended"
+        )
+    sample = vectors
+    if n > train_sample_size:
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(n, train_sample_size, replace=False)]
+    index.train(np.ascontiguousarray(sample, dtype=np.float32))
+    return index
+
+
+def set_search_params(index, nprobe: Optional[int] = None, ef_search=None):
+    """
+    Apply search-time knobs to a FAISS index, ignoring the ones it lacks.
+    """
+    import faiss
+
+    if nprobe is not None:
+        try:
+            faiss.extract_index_ivf(index).nprobe = nprobe
+        except RuntimeError:
+            pass
+    if ef_search is not None and hasattr(index, "hnsw"):
+        index.hnsw.efSearch = ef_search
 
+
+@register_vector_store("faiss")
 class FAISSVectorStoreFactory:
-    def __init__(self, embedding_model: Embeddings, **kwargs):
+    def __init__(
+        self,
+        embedding_model: Embeddings,
+        index_type: str = "flat",
+        nprobe: int = 16,
+        ef_search: int = 64,
+        hybrid: bool = False,
+        query_cache: Optional[QueryCache] = None,
+        normalize_L2: bool = False,
+        min_train_size: Optional[int] = None,
+        **kwargs,
+    ):
+        """
+        :param embedding_model: Embedding model used for documents and queries
+        :param index_type: "flat" (exact), "ivf_flat", "ivf_pq" or "hnsw"
+        :param nprobe: Default number of IVF lists visited per query
+        :param ef_search: Default HNSW search depth
+        :param hybrid: Maintain a BM25 index alongside the vectors so that
+            ``hybrid_search`` can combine exact-term and dense matches
+        :param query_cache: Optional cache of query embeddings and search
+            results, invalidated whenever documents are added or deleted
+        :param normalize_L2: L2-normalize document and query vectors, so that
+            L2 distance ranks like cosine similarity
+        :param min_train_size: Vectors to collect before an IVF index is
+            trained (default ``MIN_POINTS_PER_CENTROID * nlist``). Until then
+            documents are kept in an exact flat index, so the centroids are
+            trained on a sample spanning every batch added so far rather
+            than on the first one
+        :param kwargs: Index build options passed to build_faiss_index
+            (nlist, pq_m, pq_nbits, hnsw_m, ef_construction, train_sample_size)
+        """
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unsupported FAISS index type: {index_type}")
         self.embedding_model = embedding_model
+        self.index_type = index_type
+        self.nprobe = nprobe
+        self.ef_search = ef_search
         self.index = None
         self.docstore = InMemoryDocstore()
+        self.sparse_index = BM25Index() if hybrid else None
+        self.query_cache = query_cache
+        self.normalize_L2 = normalize_L2
+        self.min_train_size = min_train_size
         self.kwargs = kwargs  # Placeholder for extensibility (e.g., save_path)
 
-    def from_documents(self, documents):
-        self.index = FAISS.from_documents(
-            documents=documents, embedding=self.embedding_model
+    def _build(self, text_embeddings, metadatas):
+        import faiss
+
+        vectors = np.asarray([e for _, e in text_embeddings], dtype=np.float32)
+        if self._awaiting_training(len(vectors)):
+            # Trained by _train_if_ready once enough vectors have arrived
+            faiss_index = faiss.IndexFlatL2(vectors.shape[1])
+        else:
+            if self.normalize_L2:
+                # The index is trained on the vectors as they will be stored
+                faiss.normalize_L2(vectors)
+            faiss_index = build_faiss_index(
+                vectors, self.index_type, **self._build_options()
+            )
+        self.index = FAISS(
+            self.embedding_model,
+            faiss_index,
+            InMemoryDocstore(),
+            {},
+            normalize_L2=self.normalize_L2,
+        )
+        return self._on_added(
+            self.index.add_embeddings(text_embeddings, metadatas=metadatas),
+            [text for text, _ in text_embeddings],
+        )
+
+    def _build_options(self):
+        return {k: v for k, v in self.kwargs.items() if k in BUILD_OPTIONS}
+
+    def _awaiting_training(self, n_vectors):
+        if self.index_type not in IVF_INDEX_TYPES:
+            return False
+        min_train_size = self.min_train_size or MIN_POINTS_PER_CENTROID * (
+            self.kwargs.get("nlist", DEFAULT_NLIST)
         )
+        return n_vectors < min_train_size
+
+    def _train_if_ready(self):
+        """
+        Replace the exact index that holds vectors while an IVF index awaits
+        training by the trained IVF index, once there are enough vectors.
+        """
+        import faiss
+
+        buffer = self.index.index
+        if (
+            self.index_type not in IVF_INDEX_TYPES
+            or not isinstance(buffer, faiss.IndexFlat)
+            or self._awaiting_training(buffer.ntotal)
+        ):
+            return
+        # Already normalized if normalize_L2 is set; positions are unchanged
+        vectors = buffer.reconstruct_n(0, buffer.ntotal)
+        index = build_faiss_index(vectors, self.index_type, **self._build_options())
+        index.add(vectors)
+        self.index.index = index
+        logger.info(f"Trained {self.index_type} index on {len(vectors)} vectors")
+
+    def _on_added(self, ids, texts):
+        if self.sparse_index is not None:
+            self.sparse_index.add(ids, texts)
+        self._train_if_ready()
+        self._invalidate()
+        return ids
+
+    def _invalidate(self):
+        if self.query_cache is not None:
+            self.query_cache.invalidate()
+
+    def from_documents(self, documents):
+        if self.index_type == "flat":
+            self.index = FAISS.from_documents(
+                documents=documents,
+                embedding=self.embedding_model,
+                normalize_L2=self.normalize_L2,
+            )
+            if self.sparse_index is not None:
+                self.sparse_index = BM25Index()
+            self._on_added(
+                list(self.index.index_to_docstore_id.values()),
+                [doc.page_content for doc in documents],
+            )
+            return self.index
+
+        texts = [doc.page_content for doc in documents]
+        embeddings = self.embedding_model.embed_documents(texts)
+        if self.sparse_index is not None:
+            self.sparse_index = BM25Index()
+        self._build(list(zip(texts, embeddings)), [doc.metadata for doc in documents])
         return self.index
 
     def add_documents(self, documents):
         if not self.index:
             self.from_documents(documents)
-        else:
-            self.index.add_documents(documents)
+            return list(self.index.index_to_docstore_id.values())
+        return self._on_added(
+            self.index.add_documents(documents),
+            [doc.page_content for doc in documents],
+        )
+
+    def add_embeddings(self, documents, embeddings):
+        """
+        Add documents whose embeddings were computed ahead of time.
+        """
+        text_embeddings = [
+            (doc.page_content, embedding)
+            for doc, embedding in zip(documents, embeddings)
+        ]
+        metadatas = [doc.metadata for doc in documents]
+        if not self.index:
+            return self._build(text_embeddings, metadatas)
+        return self._on_added(
+            self.index.add_embeddings(text_embeddings, metadatas=metadatas),
+            [text for text, _ in text_embeddings],
+        )
+
+    @property
+    def supports_delete(self) -> bool:
+        """
+        False for HNSW indexes: FAISS cannot remove vectors from an HNSW
+        graph, so such a store can only be rebuilt, not updated in place.
+        """
+        if self.index is not None:
+            return not hasattr(self.index.index, "hnsw")
+        return self.index_type != "hnsw"
+
+    def delete(self, ids):
+        """
+        Remove documents by the IDs returned when they were added.
+        """
+        if not ids or not self.index:
+            return
+        if not self.supports_delete:
+            raise RuntimeError(
+                "FAISS HNSW indexes do not support deleting documents; "
+                "rebuild the store or use another index type."
+            )
+        self.index.delete(ids)
+        if self.sparse_index is not None:
+            self.sparse_index.delete(ids)
+        self._invalidate()
+
+    def _search_params(self, nprobe, ef_search):
+        set_search_params(
+            self.index.index,
+            nprobe=nprobe if nprobe is not None else self.nprobe,
+            ef_search=ef_search if ef_search is not None else self.ef_search,
+        )
 
-    def similarity_search(self, query, k=5):
+    def similarity_search(self, query, k=5, nprobe=None, ef_search=None):
+        if self.query_cache is not None:
+            return [
+                doc
+                for doc, _ in self.similarity_search_with_score(
+                    query, k=k, nprobe=nprobe, ef_search=ef_search
+                )
+            ]
+        self._search_params(nprobe, ef_search)
         return self.index.similarity_search(query, k=k)
 
-    def similarity_search_with_score(self, query, k=5):
-        return self.index.similarity_search_with_score(query, k=k)
+    def similarity_search_with_score(self, query, k=5, nprobe=None, ef_search=None):
+        self._search_params(nprobe, ef_search)
+        if self.query_cache is None:
+            return self.index.similarity_search_with_score(query, k=k)
+        embedding = self.query_cache.embed_query(self.embedding_model, query)
+        return self.query_cache.get_or_search(
+            embedding,
+            lambda: self.index.similarity_search_with_score_by_vector(embedding, k=k),
+            k=k,
+            nprobe=nprobe if nprobe is not None else self.nprobe,
+            ef_search=ef_search if ef_search is not None else self.ef_search,
+        )
+
+    def similarity_search_by_vector(self, embedding, k=5, nprobe=None, ef_search=None):
+        self._search_params(nprobe, ef_search)
+        return self.index.similarity_search_by_vector(embedding, k=k)
+
+    def similarity_search_batch_with_score(
+        self, queries, k=5, nprobe=None, ef_search=None
+    ):
+        """
+        Search several queries at once.
+
+        Queries are embedded with the model's query embedding (see
+        ``embed_queries``) and searched as a single matrix, which is much
+        cheaper than one index call per query.
+
+        :param queries: List of query strings
+        :param k: Number of results per query
+        :return: One list of (Document, distance) tuples per query
+        """
+        if not queries:
+            return []
+        self._search_params(nprobe, ef_search)
+        return [
+            [
+                (self.index.docstore.search(doc_id), distance)
+                for doc_id, distance in hits
+            ]
+            for hits in self._search_vectors(
+                embed_queries(self.embedding_model, list(queries)), k
+            )
+        ]
+
+    def _search_vectors(self, embeddings, k):
+        """
+        Search a matrix of query vectors; returns (docstore ID, distance)
+        tuples per query.
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if self.normalize_L2:
+            import faiss
+
+            faiss.normalize_L2(vectors)
+        distances, positions = self.index.index.search(vectors, k)
+
+        results = []
+        for row_distances, row_positions in zip(distances, positions):
+            hits = []
+            for distance, position in zip(row_distances, row_positions):
+                if position == -1:
+                    continue  # fewer than k results were found
+                doc_id = self.index.index_to_docstore_id[int(position)]
+                hits.append((doc_id, float(distance)))
+            results.append(hits)
+        return results
 
-    def save_local(self, path: str):
+    def similarity_search_batch(self, queries, k=5, nprobe=None, ef_search=None):
+        return [
+            [doc for doc, _ in hits]
+            for hits in self.similarity_search_batch_with_score(
+                queries, k=k, nprobe=nprobe, ef_search=ef_search
+            )
+        ]
+
+    def hybrid_search_with_score(
+        self,
+        query,
+        k=5,
+        fetch_k=None,
+        rrf_k=DEFAULT_RRF_K,
+        nprobe=None,
+        ef_search=None,
+    ):
+        """
+        Combine dense and BM25 results with reciprocal rank fusion.
+
+        Requires ``hybrid=True``. Exact-term queries (product codes, error
+        strings) that embeddings rank poorly are still found by BM25.
+
+        :param query: Query string
+        :param k: Number of fused results
+        :param fetch_k: Candidates taken from each retriever (default ``4 * k``)
+        :param rrf_k: RRF smoothing constant
+        :return: List of (Document, fused score) tuples, best first
+        """
+        if self.sparse_index is None:
+            raise RuntimeError("Hybrid search needs a store created with hybrid=True.")
+        fetch_k = fetch_k or 4 * k
+        self._search_params(nprobe, ef_search)
+        dense = self._search_vectors([self.embedding_model.embed_query(query)], fetch_k)
+        sparse = self.sparse_index.search(query, fetch_k)
+        fused = reciprocal_rank_fusion(
+            [[doc_id for doc_id, _ in dense[0]], [doc_id for doc_id, _ in sparse]],
+            k=rrf_k,
+        )
+        return [
+            (self.index.docstore.search(doc_id), score) for doc_id, score in fused[:k]
+        ]
+
+    def hybrid_search(self, query, k=5, fetch_k=None, rrf_k=DEFAULT_RRF_K, **kwargs):
+        return [
+            doc
+            for doc, _ in self.hybrid_search_with_score(
+                query, k=k, fetch_k=fetch_k, rrf_k=rrf_k, **kwargs
+            )
+        ]
+
+    def save_local(self, path: str, docstore_format: str = "pickle"):
+        """
+        Save the index to a folder.
+
+        :param path: Destination folder
+        :param docstore_format: "pickle" (LangChain's format) or "sqlite", a
+            random-access file that ``load_local(path, mmap=True)`` requires
+
+        With ``hybrid=True`` the BM25 index is written next to it.
+        """
         if not self.index:
             raise RuntimeError("No FAISS index to save.")
-        self.index.save_local(path)
+        if docstore_format == "pickle":
+            self.index.save_local(path)
+        elif docstore_format == "sqlite":
+            import faiss
 
-    def load_local(self, path: str):
-        self.index = FAISS.load_local(path, embeddings=self.embedding_model)
+            os.makedirs(path, exist_ok=True)
+            faiss.write_index(self.index.index, os.path.join(path, "index.faiss"))
+            write_sqlite_docstore(
+                os.path.join(path, DOCSTORE_FILENAME),
+                self.index.docstore,
+                self.index.index_to_docstore_id,
+            )
+        else:
+            raise ValueError(f"Unsupported docstore format: {docstore_format}")
+        if self.sparse_index is not None:
+            self.sparse_index.save(os.path.join(path, BM25_FILENAME))
+
+    def load_local(self, path: str, mmap: bool = False):
+        """
+        Load an index saved with save_local.
+
+        :param path: Folder written by save_local
+        :param mmap: Memory-map the index file read-only and read documents
+            lazily from the SQLite docstore instead of loading both into the
+            heap. Worker processes then share the OS page cache and startup
+            time no longer depends on corpus size. The loaded index is
+            read-only.
+        :raises FileNotFoundError: With ``hybrid=True``, if the folder has no
+            BM25 index (it was saved by a store without ``hybrid``)
+        """
+        bm25_path = os.path.join(path, BM25_FILENAME)
+        if self.sparse_index is not None and not os.path.exists(bm25_path):
+            raise FileNotFoundError(
+                f"No BM25 index at {bm25_path}; save it with hybrid=True."
+            )
+        self._invalidate()
+        if self.sparse_index is not None:
+            self.sparse_index = BM25Index.load(bm25_path)
+
+        if not mmap:
+            # The pickle was written by save_local, so it is trusted
+            self.index = FAISS.load_local(
+                path,
+                embeddings=self.embedding_model,
+                allow_dangerous_deserialization=True,
+                normalize_L2=self.normalize_L2,
+            )
+            return
+
+        import faiss
+
+        flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+        faiss_index = faiss.read_index(
+            os.path.join(path, "index.faiss"), flags | faiss.IO_FLAG_READ_ONLY
+        )
+        docstore_path = os.path.join(path, DOCSTORE_FILENAME)
+        self.index = FAISS(
+            self.embedding_model,
+            faiss_index,
+            SQLiteDocstore(docstore_path),
+            SQLiteIndexMap(docstore_path),
+            normalize_L2=self.normalize_L2,
+        )
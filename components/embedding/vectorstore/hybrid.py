@@ -0,0 +1,226 @@
+import json
+import math
+import os
+import re
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+DEFAULT_RRF_K = 60
+
+# Keeps codes such as "ERR-404", "v2.1.0" or "AB/1234" as single tokens
+_TOKEN_RE = re.compile(r"\w+(?:[-./:]\w+)*")
+_WORD_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase word tokens for BM25.
+
+    Compound tokens like ``err-404`` are kept whole and also split into their
+    parts, so both the exact code and its pieces match.
+    """
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(_WORD_RE.findall(token))
+    return tokens
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[List[str]], k: int = DEFAULT_RRF_K
+) -> List[Tuple[str, float]]:
+    """
+    Merge ranked ID lists with reciprocal rank fusion.
+
+    Each ID scores ``sum(1 / (k + rank))`` over the lists it appears in
+    (ranks start at 1), so only ranks matter and the dense and sparse scores
+    never need to be on the same scale.
+
+    :param rankings: Lists of IDs, best first
+    :param k: RRF smoothing constant
+    :return: (ID, fused score) tuples, best first
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """
+    Incrementally updatable Okapi BM25 inverted index.
+
+    Unlike ``rank_bm25``, which is rebuilt from the full corpus, documents are
+    added and deleted in place, and a query only reads the posting lists of
+    its own terms and scores the documents in them. Internally documents
+    are numbered densely. Each posting list is a pair of packed arrays,
+    document numbers and term frequencies, costing 8 bytes per entry.
+    Deleting a document only marks its number dead. Dead entries are
+    dropped, and their numbers reclaimed, once they outnumber the live ones.
+
+    Memory use is about 8 bytes per distinct (term, document) pair, plus
+    about 250 bytes per document for its ID mappings. Measured with 1M
+    chunks of about 50 distinct terms each: 0.67 GB, and about 0.1 s for a
+    query whose terms occur in nearly every chunk. Beyond a few million
+    chunks, use a search server such as Atlas Search.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # term -> (document numbers, term frequencies)
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self._ids: List[str] = []  # document number -> external ID
+        self._numbers: Dict[str, int] = {}  # external ID -> document number
+        self._lengths = np.zeros(1024, dtype=np.float32)
+        self._live = np.zeros(1024, dtype=bool)
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._numbers)
+
+    def __contains__(self, doc_id: str):
+        return doc_id in self._numbers
+
+    def add(self, ids: List[str], texts: List[str]):
+        """
+        Index texts under the given IDs, replacing any already indexed.
+        """
+        self.delete([doc_id for doc_id in ids if doc_id in self._numbers])
+        for doc_id, text in zip(ids, texts):
+            self._add_counts(doc_id, Counter(tokenize(text)))
+
+    def _add_counts(self, doc_id: str, counts: Dict[str, int]):
+        number = len(self._ids)
+        self._ids.append(doc_id)
+        self._numbers[doc_id] = number
+        for term, tf in counts.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = (array("I"), array("I"))
+            posting[0].append(number)
+            posting[1].append(tf)
+
+        if number >= len(self._lengths):
+            self._lengths = np.resize(self._lengths, 2 * len(self._lengths))
+            self._live = np.resize(self._live, 2 * len(self._live))
+        length = sum(counts.values())
+        self._lengths[number] = length
+        self._live[number] = True
+        self._total_length += length
+
+    def delete(self, ids: List[str]):
+        """
+        Remove documents; unknown IDs are ignored.
+        """
+        for doc_id in ids:
+            number = self._numbers.pop(doc_id, None)
+            if number is None:
+                continue
+            self._live[number] = False
+            self._total_length -= int(self._lengths[number])
+            self._lengths[number] = 0
+        if len(self._ids) - len(self._numbers) > max(1024, len(self._numbers)):
+            self._compact()
+
+    def _compact(self):
+        # Renumber the live documents 0..n-1, keeping their order
+        numbers = np.flatnonzero(self._live[: len(self._ids)])
+        renumbered = np.full(len(self._ids), -1, dtype=np.int64)
+        renumbered[numbers] = np.arange(len(numbers))
+        postings = {}
+        for term, (doc_numbers, tfs) in self.postings.items():
+            new_numbers = renumbered[np.array(doc_numbers, dtype=np.uint32)]
+            keep = new_numbers >= 0
+            if keep.any():
+                postings[term] = (
+                    array("I", new_numbers[keep].astype(np.uint32).tobytes()),
+                    array("I", np.array(tfs, dtype=np.uint32)[keep].tobytes()),
+                )
+        self.postings = postings
+        self._ids = [self._ids[number] for number in numbers]
+        self._numbers = {doc_id: number for number, doc_id in enumerate(self._ids)}
+        capacity = max(1024, 2 * len(numbers))
+        lengths = np.zeros(capacity, dtype=np.float32)
+        lengths[: len(numbers)] = self._lengths[numbers]
+        self._lengths = lengths
+        self._live = np.zeros(capacity, dtype=bool)
+        self._live[: len(numbers)] = True
+
+    def _live_posting(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        doc_numbers, tfs = self.postings[term]
+        # Copies, so the arrays stay resizable while the result is alive
+        numbers = np.array(doc_numbers, dtype=np.uint32)
+        frequencies = np.array(tfs, dtype=np.float32)
+        live = self._live[numbers]
+        if not live.all():
+            numbers, frequencies = numbers[live], frequencies[live]
+        return numbers, frequencies
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Returns up to ``k`` (ID, BM25 score) tuples, best first.
+        """
+        n_docs = len(self._numbers)
+        if not n_docs or k <= 0:
+            return []
+        avg_length = self._total_length / n_docs
+
+        # Scores only exist for documents in the query terms' posting lists
+        candidates, contributions = [], []
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            numbers, tfs = self._live_posting(term)
+            if not len(numbers):
+                continue
+            idf = math.log((n_docs - len(numbers) + 0.5) / (len(numbers) + 0.5) + 1)
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[numbers] / avg_length)
+            candidates.append(numbers)
+            contributions.append(idf * tfs * (self.k1 + 1) / (tfs + norm))
+        if not candidates:
+            return []
+        if len(candidates) == 1:
+            numbers, scores = candidates[0], contributions[0]
+        else:
+            # A document appears once per posting list: sum per document
+            numbers, inverse = np.unique(
+                np.concatenate(candidates), return_inverse=True
+            )
+            scores = np.bincount(inverse, weights=np.concatenate(contributions))
+
+        order = np.arange(len(numbers))
+        if len(order) > k:
+            order = np.argpartition(-scores, k)[:k]
+            order.sort()  # ties stay in document order
+        order = order[np.argsort(-scores[order], kind="stable")]
+        return [(self._ids[numbers[i]], float(scores[i])) for i in order]
+
+    def save(self, path: str):
+        """
+        Write the index as JSON (per-document term counts).
+        """
+        live = np.flatnonzero(self._live[: len(self._ids)])
+        documents = {self._ids[number]: {} for number in live}
+        for term in self.postings:
+            numbers, tfs = self._live_posting(term)
+            for number, tf in zip(numbers.tolist(), tfs.tolist()):
+                documents[self._ids[number]][term] = int(tf)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "documents": documents}, f)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        for doc_id, counts in data["documents"].items():
+            index._add_counts(doc_id, counts)
+        return index
@@ -0,0 +1,379 @@
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from components.utils.hashing import hash_content
+from components.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_QUEUE_SIZE = 4
+
+# Marks the end of a stage's output on the pipeline queues
+_DONE = object()
+
+
+class IndexingError(RuntimeError):
+    """
+    Raised when a streaming indexing batch fails after all retries.
+
+    ``report`` holds the progress made so far; pass ``report["next_batch"]``
+    as ``start_batch`` to resume from the failed batch.
+    """
+
+    def __init__(self, message: str, report: Dict):
+        super().__init__(message)
+        self.report = report
+
+
+def strategy_names(chunkers: list) -> List[str]:
+    """
+    Returns a unique name per chunker, based on its class name.
+
+    Chunkers of the same class are numbered, e.g. ``RecursiveCharacterTextSplitter``
+    and ``RecursiveCharacterTextSplitter#2``.
+    """
+    names = []
+    counts = {}
+    for chunker in chunkers:
+        name = chunker.__class__.__name__
+        counts[name] = counts.get(name, 0) + 1
+        names.append(name if counts[name] == 1 else f"{name}#{counts[name]}")
+    return names
+
+
+def deduplicate_chunks(chunks: List[Document], strategies: List[str]) -> List[Document]:
+    """
+    Merge chunks with identical text from the same source.
+
+    The first occurrence is kept and ``metadata["chunkers"]`` lists every
+    strategy that produced that text, so each distinct chunk is embedded and
+    stored once.
+
+    :param chunks: Chunks, in the order they were produced
+    :param strategies: Name of the strategy that produced each chunk
+    :return: Deduplicated chunks
+    """
+    unique = {}
+    for chunk, strategy in zip(chunks, strategies):
+        key = (chunk.metadata.get("source"), hash_content(chunk.page_content))
+        kept = unique.get(key)
+        if kept is None:
+            chunk.metadata["chunkers"] = [strategy]
+            unique[key] = chunk
+        elif strategy not in kept.metadata["chunkers"]:
+            kept.metadata["chunkers"].append(strategy)
+    return list(unique.values())
+
+
+def split_documents(
+    chunker, strategy: str, documents: List[Document]
+) -> Tuple[List[Document], List[str]]:
+    """
+    Apply one chunker to documents.
+
+    A ChunkingEngine reports the strategy of each of its chunks; any other
+    chunker (e.g. a LangChain text splitter) is one strategy.
+
+    :param chunker: Text splitter or ChunkingEngine
+    :param strategy: Name of the chunker
+    :param documents: LangChain Documents to split
+    :return: (chunks, name of the strategy that produced each chunk)
+    """
+    if hasattr(chunker, "split_with_strategies"):
+        return chunker.split_with_strategies(documents)
+    chunks = chunker.split_documents(documents)
+    return chunks, [strategy] * len(chunks)
+
+
+def embed_unique(embedding_model, texts: List[str]) -> List[List[float]]:
+    """
+    Embed texts, computing each distinct text only once.
+    """
+    unique_texts = list(dict.fromkeys(texts))
+    vectors = dict(zip(unique_texts, embedding_model.embed_documents(unique_texts)))
+    return [vectors[text] for text in texts]
+
+
+def embed_queries(embedding_model, queries: List[str]) -> List[List[float]]:
+    """
+    Embed search queries with the model's query embedding, computing each
+    distinct query only once. Uses the model's ``embed_queries`` batch method
+    when it has one (e.g. CachedEmbeddings).
+    """
+    unique_queries = list(dict.fromkeys(queries))
+    if hasattr(embedding_model, "embed_queries"):
+        embeddings = embedding_model.embed_queries(unique_queries)
+    else:
+        embeddings = [embedding_model.embed_query(query) for query in unique_queries]
+    vectors = dict(zip(unique_queries, embeddings))
+    return [vectors[query] for query in queries]
+
+
+def _get_embedding_model(vector_store):
+    return getattr(vector_store, "embedding_model", None) or getattr(
+        vector_store, "embeddings", None
+    )
+
+
+def index_documents(
+    documents: List[Document],
+    vector_store,
+    chunkers: list,
+    deduplicate: bool = True,
+):
+    """
+    Index documents in the specified vector store using multiple chunking strategies.
+
+    :param documents: List of LangChain Document objects
+    :param vector_store: A vector store object
+    :param chunkers: List of text splitters (or ChunkingEngines) to apply
+    :param deduplicate: Store chunks that several strategies produce identically
+        only once, tagged with ``metadata["chunkers"]``
+    """
+    all_chunks = []
+    all_strategies = []
+
+    for chunker, strategy in zip(chunkers, strategy_names(chunkers)):
+        print(f"🔧 Applying chunker: {strategy}")
+        chunks, strategies = split_documents(chunker, strategy, documents)
+        print(f"✅ {len(chunks)} chunks created by {strategy}")
+        all_chunks.extend(chunks)
+        all_strategies.extend(strategies)
+
+    if deduplicate:
+        total = len(all_chunks)
+        all_chunks = deduplicate_chunks(all_chunks, all_strategies)
+        print(f"🧹 Removed {total - len(all_chunks)} duplicate chunks.")
+
+    print(f"📦 Total {len(all_chunks)} chunks across all strategies. Uploading...")
+
+    embedding_model = _get_embedding_model(vector_store)
+    if deduplicate and embedding_model and hasattr(vector_store, "add_embeddings"):
+        embeddings = embed_unique(
+            embedding_model, [chunk.page_content for chunk in all_chunks]
+        )
+        vector_store.add_embeddings(all_chunks, embeddings)
+    else:
+        vector_store.add_documents(all_chunks)
+    print(f"✅ Indexed {len(all_chunks)} chunks.")
+
+
+def chunk_document(
+    document: Document, chunkers: list, deduplicate: bool = True
+) -> List[Document]:
+    """
+    Apply every chunker to a single document.
+
+    :param document: LangChain Document to split
+    :param chunkers: List of text splitters to apply
+    :param deduplicate: Merge identical chunks produced by different chunkers
+    :return: List of chunks
+    """
+    chunks = []
+    chunk_strategies = []
+    for chunker, strategy in zip(chunkers, strategy_names(chunkers)):
+        produced, strategies = split_documents(chunker, strategy, [document])
+        chunks.extend(produced)
+        chunk_strategies.extend(strategies)
+    if deduplicate:
+        chunks = deduplicate_chunks(chunks, chunk_strategies)
+    return chunks
+
+
+def iter_chunk_batches(
+    documents: Iterable[Document],
+    chunkers: list,
+    batch_size: int,
+    deduplicate: bool = True,
+) -> Iterator[List[Document]]:
+    """
+    Lazily chunk documents one at a time and yield fixed-size chunk batches.
+
+    :param documents: Iterable of LangChain Document objects
+    :param chunkers: List of text splitters to apply to every document
+    :param batch_size: Number of chunks per yielded batch
+    :param deduplicate: Merge identical chunks produced by different chunkers
+    """
+    batch = []
+    for document in documents:
+        for chunk in chunk_document(document, chunkers, deduplicate):
+            batch.append(chunk)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _with_retries(func, max_retries: int, retry_delay: float, description: str):
+    for attempt in range(max_retries + 1):
+        try:
+            return func()
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            logger.warning(
+                f"{description} failed ({e}); retry {attempt + 1}/{max_retries}"
+            )
+            time.sleep(retry_delay * (2**attempt))
+
+
+def index_documents_streaming(
+    documents: Iterable[Document],
+    vector_store,
+    chunkers: list,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    start_batch: int = 0,
+    max_retries: int = 2,
+    retry_delay: float = 1.0,
+    on_batch: Optional[Callable[[Dict], None]] = None,
+    deduplicate: bool = True,
+) -> Dict:
+    """
+    Index documents with bounded memory by streaming them through a
+    chunk -> embed -> upload pipeline.
+
+    Documents are consumed lazily and chunked one at a time. Chunks are
+    grouped into batches of ``batch_size``; a background thread embeds each
+    batch while another uploads the previous one. The stages are joined by
+    queues of at most ``queue_size`` batches, so memory stays bounded no
+    matter how many documents are indexed.
+
+    If the vector store has an ``add_embeddings(documents, embeddings)``
+    method (both store factories do), embedding and upload overlap. Otherwise
+    each batch is passed to ``add_documents`` and the store embeds it itself.
+
+    :param documents: Iterable of LangChain Document objects
+    :param vector_store: A vector store object
+    :param chunkers: List of text splitters to apply
+    :param batch_size: Number of chunks embedded and uploaded together
+    :param queue_size: Maximum number of batches buffered between stages
+    :param start_batch: Skip this many leading batches (to resume a failed run)
+    :param max_retries: Retries per batch for embedding and upload
+    :param retry_delay: Initial backoff between retries, in seconds
+    :param on_batch: Optional callback receiving a progress dict per batch
+    :param deduplicate: Merge identical chunks produced by different chunkers
+        and embed each distinct text once per batch
+    :return: Dict with "batches", "chunks", "next_batch" and "seconds"
+    :raises IndexingError: If a batch still fails after all retries
+    """
+    embedding_model = _get_embedding_model(vector_store)
+    precompute = hasattr(vector_store, "add_embeddings") and embedding_model
+
+    chunk_queue = queue.Queue(maxsize=queue_size)
+    upload_queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+    report = {"batches": 0, "chunks": 0, "next_batch": start_batch, "seconds": 0.0}
+    started = time.perf_counter()
+
+    def put(q, item):
+        # Give up waiting on a full queue once another stage has failed
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def embed_stage():
+        try:
+            while True:
+                item = get(chunk_queue)
+                if item is _DONE:
+                    break
+                batch_index, batch = item
+                embeddings = None
+                if precompute:
+                    embeddings = _with_retries(
+                        lambda: embed_unique(
+                            embedding_model, [chunk.page_content for chunk in batch]
+                        ),
+                        max_retries,
+                        retry_delay,
+                        f"Embedding batch {batch_index}",
+                    )
+                if not put(upload_queue, (batch_index, batch, embeddings)):
+                    break
+        except Exception as e:
+            errors.append((batch_index, e))
+            stop.set()
+        finally:
+            put(upload_queue, _DONE)
+
+    def upload_stage():
+        try:
+            while True:
+                item = get(upload_queue)
+                if item is _DONE:
+                    break
+                batch_index, batch, embeddings = item
+                if embeddings is not None:
+                    upload = lambda: vector_store.add_embeddings(batch, embeddings)
+                else:
+                    upload = lambda: vector_store.add_documents(batch)
+                _with_retries(
+                    upload, max_retries, retry_delay, f"Uploading batch {batch_index}"
+                )
+
+                report["batches"] += 1
+                report["chunks"] += len(batch)
+                report["next_batch"] = batch_index + 1
+                report["seconds"] = round(time.perf_counter() - started, 3)
+                logger.info(
+                    f"Indexed batch {batch_index} ({len(batch)} chunks, "
+                    f"{report['chunks']} total)"
+                )
+                if on_batch:
+                    on_batch(
+                        dict(report, batch_index=batch_index, batch_size=len(batch))
+                    )
+        except Exception as e:
+            errors.append((batch_index, e))
+            stop.set()
+
+    embedder = threading.Thread(target=embed_stage, name="index-embed", daemon=True)
+    uploader = threading.Thread(target=upload_stage, name="index-upload", daemon=True)
+    embedder.start()
+    uploader.start()
+
+    try:
+        for batch_index, batch in enumerate(
+            iter_chunk_batches(documents, chunkers, batch_size, deduplicate)
+        ):
+            if batch_index < start_batch:
+                continue
+            if not put(chunk_queue, (batch_index, batch)):
+                break
+    finally:
+        put(chunk_queue, _DONE)
+        embedder.join()
+        uploader.join()
+
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    if errors:
+        batch_index, error = errors[0]
+        raise IndexingError(
+            f"Indexing failed at batch {batch_index}: {error}", report
+        ) from error
+
+    logger.info(
+        f"Indexed {report['chunks']} chunks in {report['batches']} batches "
+        f"({report['seconds']}s)"
+    )
+    return report
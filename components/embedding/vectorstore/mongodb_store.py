@@ -1,10 +1,140 @@
+import asyncio
 import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
 
+import numpy as np
+from bson.binary import Binary, BinaryVectorDtype
 from langchain.embeddings.base import Embeddings
 from langchain.schema import Document
 from langchain_mongodb import MongoDBAtlasVectorSearch
+from langchain_mongodb.utils import str_to_oid
+from pymongo import MongoClient, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
 
+from components.utils.hashing import hash_content
+from components.utils.logger import get_logger
 
+from .hybrid import DEFAULT_RRF_K, BM25Index, reciprocal_rank_fusion
+from .indexing import embed_queries, embed_unique
+from .query_cache import QueryCache
+from .registry import register_vector_store
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_POOL_SIZE = 100
+DEFAULT_UPSERT_BATCH_SIZE = 500
+VECTOR_DTYPES = ("double", "float32", "int8", "int1")
+
+# Process-wide MongoClient per (connection string, pool size)
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_mongo_client(
+    connection_string: str, max_pool_size: int = DEFAULT_MAX_POOL_SIZE
+) -> MongoClient:
+    """
+    Returns a shared MongoClient for the connection string, creating it on
+    first use. MongoClient is thread-safe and owns a connection pool, so all
+    factories pointing at the same cluster reuse one pool.
+    """
+    key = (connection_string, max_pool_size)
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = MongoClient(connection_string, maxPoolSize=max_pool_size)
+            _CLIENTS[key] = client
+        return client
+
+
+def document_id(document: Document) -> str:
+    """
+    Returns a deterministic ``_id`` for a chunk: the sha256 of its source and text.
+    """
+    source = document.metadata.get("source") or ""
+    return hash_content(f"{source}\n{document.page_content}")
+
+
+def encode_vector(embedding, vector_dtype: str = "double"):
+    """
+    Encode an embedding for storage or as a ``$vectorSearch`` query vector.
+
+    - "double": a BSON array of doubles (8 bytes per dimension)
+    - "float32": packed BSON binary vector (4 bytes per dimension)
+    - "int8": binary vector scaled by the largest absolute component, which
+      preserves cosine similarity (1 byte per dimension)
+    - "int1": binary vector of sign bits, compared by Hamming distance, so the
+      Atlas index must use "euclidean" (1 bit per dimension)
+    """
+    if vector_dtype == "double":
+        return [float(x) for x in embedding]
+    vector = np.asarray(embedding, dtype=np.float32)
+    if vector_dtype == "float32":
+        return Binary.from_vector(vector.tolist(), BinaryVectorDtype.FLOAT32)
+    if vector_dtype == "int8":
+        scale = float(np.abs(vector).max()) or 1.0
+        quantized = np.round(vector / scale * 127).astype(np.int8)
+        return Binary.from_vector(quantized.tolist(), BinaryVectorDtype.INT8)
+    if vector_dtype == "int1":
+        return Binary.from_vector(
+            np.packbits(vector > 0).tolist(),
+            BinaryVectorDtype.PACKED_BIT,
+            padding=-len(vector) % 8,
+        )
+    raise ValueError(f"Unsupported vector dtype: {vector_dtype}")
+
+
+def decode_vector(value) -> np.ndarray:
+    """
+    Returns a stored vector (array or binary) as float32 values; sign bits
+    decode to +1/-1.
+    """
+    if not isinstance(value, Binary):
+        return np.asarray(value, dtype=np.float32)
+    vector = value.as_vector()
+    if vector.dtype == BinaryVectorDtype.PACKED_BIT:
+        bits = np.unpackbits(np.asarray(vector.data, dtype=np.uint8))
+        bits = bits[: len(bits) - vector.padding]
+        return np.where(bits, 1.0, -1.0).astype(np.float32)
+    return np.asarray(vector.data, dtype=np.float32)
+
+
+def vector_index_definition(
+    path: str, dimensions: int, vector_dtype: str = "double", similarity="cosine"
+) -> Dict:
+    """
+    Atlas Vector Search index definition for vectors stored as ``vector_dtype``.
+    """
+    if vector_dtype not in VECTOR_DTYPES:
+        raise ValueError(f"Unsupported vector dtype: {vector_dtype}")
+    if vector_dtype == "int1":
+        similarity = "euclidean"  # the only similarity Atlas supports for bits
+    return {
+        "fields": [
+            {
+                "type": "vector",
+                "path": path,
+                "numDimensions": dimensions,
+                "similarity": similarity,
+            }
+        ]
+    }
+
+
+def close_mongo_clients():
+    """
+    Close and forget every shared MongoClient.
+    """
+    with _CLIENTS_LOCK:
+        for client in _CLIENTS.values():
+            client.close()
+        _CLIENTS.clear()
+
+
+@register_vector_store("mongodb")
 class MongoDBVectorStoreFactory:
     def __init__(
         self,
@@ -13,8 +143,34 @@ class MongoDBVectorStoreFactory:
         db_name: str = None,
         collection_name: str = None,
         index_name: str = None,
+        max_pool_size: int = DEFAULT_MAX_POOL_SIZE,
+        hybrid: bool = False,
+        query_cache: Optional[QueryCache] = None,
+        vector_dtype: str = "double",
+        rescore_factor: Optional[int] = None,
     ):
+        """
+        :param hybrid: Enable ``hybrid_search``, backed by an in-process BM25
+            index built from the collection on first use and kept current by
+            writes made through this factory
+        :param query_cache: Optional cache of query embeddings and search
+            results, invalidated by writes made through this factory. Give it
+            a ttl when other processes write to the same collection.
+        :param vector_dtype: How embeddings are stored: "double" (BSON array),
+            or as a packed binary vector in "float32", "int8" or "int1"
+        :param rescore_factor: With a quantized dtype, also store a float32
+            copy of each vector and re-rank ``k * rescore_factor`` candidates
+            by exact cosine similarity
+        """
+        if vector_dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Unsupported vector dtype: {vector_dtype}")
+        self.vector_dtype = vector_dtype
+        self.rescore_factor = rescore_factor
         self.embedding_model = embedding_model
+        self.hybrid = hybrid
+        self.sparse_index: Optional[BM25Index] = None
+        self._sparse_lock = threading.Lock()
+        self.query_cache = query_cache
 
         # Use environment variables if not explicitly passed
         self.connection_string = connection_string or os.getenv(
@@ -34,29 +190,460 @@ class MongoDBVectorStoreFactory:
         ):
             raise ValueError("Missing MongoDB configuration (env vars or parameters).")
 
-        self.vector_store = MongoDBAtlasVectorSearch.from_connection_string(
-            self.connection_string,
-            f"{self.db_name}.{self.collection_name}",
+        self.client = get_mongo_client(self.connection_string, max_pool_size)
+        self.vector_store = MongoDBAtlasVectorSearch(
+            self.client[self.db_name][self.collection_name],
             self.embedding_model,
             index_name=self.index_name,
         )
+        self._full_key = f"{self.vector_store._embedding_key}_full"
 
     def from_documents(self, documents: list[Document]):
         """
         Index the documents in MongoDB Atlas using the configured collection and index.
         """
+        if self.hybrid or self.vector_dtype != "double":
+            # Needs the IDs (and vector encoding) that from_documents lacks
+            self.add_documents(documents)
+            return
         MongoDBAtlasVectorSearch.from_documents(
             documents=documents,
             embedding=self.embedding_model,
             collection=self.vector_store._collection,
             index_name=self.index_name,
         )
+        self._invalidate()
 
     def similarity_search(self, query: str, k: int = 5):
-        return self.vector_store.similarity_search(query, k=k)
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k)]
 
     def similarity_search_with_score(self, query: str, k: int = 5):
-        return self.vector_store.similarity_search_with_score(query, k=k)
+        if self.query_cache is None:
+            return self._search_by_vector(self.embedding_model.embed_query(query), k)
+        embedding = self.query_cache.embed_query(self.embedding_model, query)
+        return self.query_cache.get_or_search(
+            embedding, lambda: self._search_by_vector(embedding, k), k=k
+        )
+
+    def _search_by_vector(self, embedding, k: int):
+        """
+        Run ``$vectorSearch`` with the query encoded like the stored vectors,
+        re-ranking the candidates at full precision when rescoring is on.
+        """
+        if self.vector_dtype == "double" and not self.rescore_factor:
+            return self.vector_store._similarity_search_with_score(embedding, k=k)
+
+        hits = self.vector_store._similarity_search_with_score(
+            encode_vector(embedding, self.vector_dtype),
+            k=k * (self.rescore_factor or 1),
+        )
+        full_vectors = [doc.metadata.pop(self._full_key, None) for doc, _ in hits]
+        if not self.rescore_factor or any(v is None for v in full_vectors):
+            return hits[:k]
+
+        query = np.asarray(embedding, dtype=np.float32)
+        matrix = np.stack([decode_vector(v) for v in full_vectors])
+        cosine = matrix @ query
+        cosine /= np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-12
+        order = np.argsort(-cosine, kind="stable")[:k]
+        # Same scale as Atlas' cosine vectorSearchScore
+        return [(hits[i][0], float((1 + cosine[i]) / 2)) for i in order]
+
+    def _vector_fields(self, embedding) -> Dict:
+        fields = {
+            self.vector_store._embedding_key: encode_vector(
+                embedding, self.vector_dtype
+            )
+        }
+        if self.rescore_factor and self.vector_dtype in ("int8", "int1"):
+            fields[self._full_key] = encode_vector(embedding, "float32")
+        return fields
+
+    def vector_index_definition(self, dimensions: int, similarity="cosine") -> Dict:
+        """
+        Atlas Vector Search index definition matching this factory's storage.
+        """
+        return vector_index_definition(
+            self.vector_store._embedding_key,
+            dimensions,
+            self.vector_dtype,
+            similarity,
+        )
+
+    def migrate_vectors(self, batch_size: int = 1000) -> int:
+        """
+        Rewrite vectors stored as BSON arrays in this factory's ``vector_dtype``
+        (and add the rescoring copy if enabled).
+
+        Only documents still holding an array are touched, so the migration
+        can be interrupted and resumed. Rebuild the Atlas index with
+        ``vector_index_definition`` afterwards.
+
+        :param batch_size: Documents rewritten per bulk_write
+        :return: Number of documents migrated
+        """
+        if self.vector_dtype == "double":
+            raise ValueError("Choose a binary vector_dtype to migrate to.")
+        key = self.vector_store._embedding_key
+        collection = self.vector_store._collection
+        cursor = collection.find({key: {"$type": "array"}}, {key: 1})
+        migrated = 0
+        batch = []
+        for record in cursor:
+            batch.append(
+                UpdateOne(
+                    {"_id": record["_id"]}, {"$set": self._vector_fields(record[key])}
+                )
+            )
+            if len(batch) == batch_size:
+                migrated += collection.bulk_write(batch, ordered=False).modified_count
+                batch = []
+        if batch:
+            migrated += collection.bulk_write(batch, ordered=False).modified_count
+        self._invalidate()
+        logger.info(f"Migrated {migrated} vectors to {self.vector_dtype}")
+        return migrated
+
+    def similarity_search_batch_with_score(
+        self, queries: list[str], k: int = 5, max_concurrency: int = 8
+    ):
+        """
+        Search several queries at once.
+
+        Queries are embedded with the model's query embedding (see
+        ``embed_queries``), then the ``$vectorSearch`` aggregations run
+        concurrently on the client's connection pool.
+
+        :param queries: List of query strings
+        :param k: Number of results per query
+        :param max_concurrency: Maximum number of aggregations in flight
+        :return: One list of (Document, score) tuples per query
+        """
+        if not queries:
+            return []
+        embeddings = embed_queries(self.embedding_model, list(queries))
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            return list(
+                executor.map(
+                    lambda embedding: self._search_by_vector(embedding, k),
+                    embeddings,
+                )
+            )
+
+    def similarity_search_batch(
+        self, queries: list[str], k: int = 5, max_concurrency: int = 8
+    ):
+        return [
+            [doc for doc, _ in hits]
+            for hits in self.similarity_search_batch_with_score(
+                queries, k=k, max_concurrency=max_concurrency
+            )
+        ]
 
     def add_documents(self, documents: list[Document]):
-        self.vector_store.add_documents(documents)
+        if self.vector_dtype != "double":
+            return self.add_embeddings(
+                documents,
+                self.embedding_model.embed_documents(
+                    [doc.page_content for doc in documents]
+                ),
+            )
+        return self._on_added(self.vector_store.add_documents(documents), documents)
+
+    def _on_added(self, ids: list[str], documents: list[Document]):
+        self._update_sparse_index(ids, [doc.page_content for doc in documents])
+        self._invalidate()
+        return ids
+
+    def _update_sparse_index(self, ids: list[str], texts: list[str]):
+        # Documents written before the index is built are read from the
+        # collection when it is
+        with self._sparse_lock:
+            if self.sparse_index is not None:
+                self.sparse_index.add(ids, texts)
+
+    def rebuild_sparse_index(self) -> BM25Index:
+        """
+        (Re)build the BM25 index from every document in the collection.
+
+        ``hybrid_search`` does this on first use; call it again to pick up
+        documents written by other processes.
+
+        :return: The new index
+        """
+        text_key = self.vector_store._text_key
+        index = BM25Index()
+        ids, texts = [], []
+        for record in self.vector_store._collection.find({}, {text_key: 1}):
+            ids.append(str(record["_id"]))
+            texts.append(record.get(text_key) or "")
+            if len(ids) == DEFAULT_UPSERT_BATCH_SIZE:
+                index.add(ids, texts)
+                ids, texts = [], []
+        index.add(ids, texts)
+        with self._sparse_lock:
+            self.sparse_index = index
+        logger.info(f"Built BM25 index of {len(index)} documents")
+        return index
+
+    def _invalidate(self):
+        if self.query_cache is not None:
+            self.query_cache.invalidate()
+
+    def add_embeddings(self, documents: list[Document], embeddings: list):
+        """
+        Insert documents whose embeddings were computed ahead of time.
+        """
+        if not documents:
+            return []
+        records = [
+            {
+                self.vector_store._text_key: doc.page_content,
+                **self._vector_fields(embedding),
+                **doc.metadata,
+            }
+            for doc, embedding in zip(documents, embeddings)
+        ]
+        result = self.vector_store._collection.insert_many(records)
+        return self._on_added([str(_id) for _id in result.inserted_ids], documents)
+
+    def bulk_upsert(
+        self,
+        documents: List[Document],
+        embeddings: Optional[list] = None,
+        batch_size: int = DEFAULT_UPSERT_BATCH_SIZE,
+        max_workers: int = 4,
+        on_batch: Optional[Callable[[Dict], None]] = None,
+    ) -> Dict:
+        """
+        Idempotently write documents in unordered bulk batches.
+
+        Each document is stored under ``document_id(document)`` with a
+        ``ReplaceOne(upsert=True)``, so re-running after a partial failure, or
+        several writers ingesting the same chunks, never creates duplicates.
+        Batches are embedded in the calling thread and written concurrently by
+        up to ``max_workers`` threads on the shared connection pool. A failed
+        batch is recorded and the remaining batches are still written; any
+        other error (e.g. an unencodable document, or one raised by
+        ``on_batch``) is raised.
+
+        :param documents: Chunks to store; "source" metadata is part of the ID
+        :param embeddings: Precomputed embeddings, or None to embed each batch
+        :param batch_size: Number of documents per bulk_write call
+        :param max_workers: Maximum number of batches written concurrently
+        :param on_batch: Optional callback receiving the stats dict of each batch
+        :return: Dict with "batches", "documents", "upserted", "modified",
+            "failed", "errors" and "seconds"
+        :raises Exception: Any non-PyMongo error of a batch write
+        """
+        report = {
+            "batches": 0,
+            "documents": 0,
+            "upserted": 0,
+            "modified": 0,
+            "failed": 0,
+            "errors": [],
+            "seconds": 0.0,
+        }
+        started = time.perf_counter()
+        lock = threading.Lock()
+
+        def write(batch_index, batch, batch_embeddings):
+            batch_started = time.perf_counter()
+            operations = [
+                ReplaceOne(
+                    {"_id": document_id(doc)},
+                    {
+                        self.vector_store._text_key: doc.page_content,
+                        **self._vector_fields(embedding),
+                        **doc.metadata,
+                    },
+                    upsert=True,
+                )
+                for doc, embedding in zip(batch, batch_embeddings)
+            ]
+            stats = {"batch_index": batch_index, "batch_size": len(batch)}
+            error = None
+            try:
+                details = self.vector_store._collection.bulk_write(
+                    operations, ordered=False
+                ).bulk_api_result
+                failed = 0
+                written = batch
+            except BulkWriteError as e:
+                # Unordered: every operation without a write error was applied
+                details = e.details
+                failed = len(details.get("writeErrors", []))
+                error = f"{failed} write errors"
+                rejected = {err["index"] for err in details.get("writeErrors", [])}
+                written = [d for i, d in enumerate(batch) if i not in rejected]
+            except PyMongoError as e:
+                details = {}
+                failed = len(batch)
+                error = str(e)
+                written = []
+            self._update_sparse_index(
+                [document_id(doc) for doc in written],
+                [doc.page_content for doc in written],
+            )
+            stats["upserted"] = details.get("nUpserted", 0)
+            stats["modified"] = details.get("nModified", 0)
+            stats["failed"] = failed
+            stats["seconds"] = round(time.perf_counter() - batch_started, 3)
+            stats["docs_per_second"] = (
+                round(len(batch) / stats["seconds"], 1) if stats["seconds"] else None
+            )
+
+            with lock:
+                report["batches"] += 1
+                report["documents"] += len(batch)
+                report["upserted"] += stats["upserted"]
+                report["modified"] += stats["modified"]
+                report["failed"] += stats["failed"]
+                if error:
+                    report["errors"].append(
+                        {"batch_index": batch_index, "error": error}
+                    )
+            if error:
+                logger.warning(f"Upsert batch {batch_index} failed: {error}")
+            else:
+                logger.info(
+                    f"Upserted batch {batch_index} ({len(batch)} docs, "
+                    f"{stats['docs_per_second']} docs/s)"
+                )
+            if on_batch:
+                on_batch(stats)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            in_flight = set()
+            for batch_index, start in enumerate(range(0, len(documents), batch_size)):
+                batch = documents[start : start + batch_size]
+                if embeddings is None:
+                    batch_embeddings = embed_unique(
+                        self.embedding_model, [doc.page_content for doc in batch]
+                    )
+                else:
+                    batch_embeddings = embeddings[start : start + batch_size]
+                # Keep at most max_workers batches (and their vectors) in memory
+                if len(in_flight) >= max_workers:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                in_flight.add(
+                    executor.submit(write, batch_index, batch, batch_embeddings)
+                )
+            for future in in_flight:
+                future.result()
+        self._invalidate()
+
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(
+            f"Upserted {report['documents']} docs in {report['batches']} batches "
+            f"({report['upserted']} new, {report['modified']} modified, "
+            f"{report['failed']} failed, {report['seconds']}s)"
+        )
+        return report
+
+    def delete(self, ids: list[str]):
+        """
+        Remove documents by the IDs returned when they were added.
+        """
+        # An empty ID list would make delete_many match the whole collection
+        if not ids:
+            return
+        self.vector_store.delete(ids)
+        with self._sparse_lock:
+            if self.sparse_index is not None:
+                self.sparse_index.delete(ids)
+        self._invalidate()
+
+    def _get_by_ids(self, ids: list[str]) -> dict:
+        records = self.vector_store._collection.find(
+            {"_id": {"$in": [str_to_oid(_id) for _id in ids]}},
+            {self.vector_store._embedding_key: 0, self._full_key: 0},
+        )
+        documents = {}
+        for record in records:
+            record["_id"] = str(record["_id"])
+            text = record.pop(self.vector_store._text_key, "")
+            documents[record["_id"]] = Document(page_content=text, metadata=record)
+        return documents
+
+    def hybrid_search_with_score(
+        self,
+        query: str,
+        k: int = 5,
+        fetch_k: int = None,
+        rrf_k: int = DEFAULT_RRF_K,
+    ):
+        """
+        Combine ``$vectorSearch`` and BM25 results with reciprocal rank fusion.
+
+        Requires ``hybrid=True``. The BM25 index is built from the collection
+        on the first call; see ``rebuild_sparse_index`` for documents written
+        by other processes since.
+
+        :param query: Query string
+        :param k: Number of fused results
+        :param fetch_k: Candidates taken from each retriever (default ``4 * k``)
+        :param rrf_k: RRF smoothing constant
+        :return: List of (Document, fused score) tuples, best first
+        """
+        if not self.hybrid:
+            raise RuntimeError("Hybrid search needs a store created with hybrid=True.")
+        sparse_index = self.sparse_index
+        if sparse_index is None:
+            sparse_index = self.rebuild_sparse_index()
+        fetch_k = fetch_k or 4 * k
+        dense = self._search_by_vector(self.embedding_model.embed_query(query), fetch_k)
+        with self._sparse_lock:
+            sparse = sparse_index.search(query, fetch_k)
+        documents = {doc.metadata["_id"]: doc for doc, _ in dense}
+        fused = reciprocal_rank_fusion(
+            [list(documents), [doc_id for doc_id, _ in sparse]], k=rrf_k
+        )[:k]
+        documents.update(
+            self._get_by_ids([doc_id for doc_id, _ in fused if doc_id not in documents])
+        )
+        return [
+            (documents[doc_id], score) for doc_id, score in fused if doc_id in documents
+        ]
+
+    def hybrid_search(
+        self,
+        query: str,
+        k: int = 5,
+        fetch_k: int = None,
+        rrf_k: int = DEFAULT_RRF_K,
+    ):
+        return [
+            doc
+            for doc, _ in self.hybrid_search_with_score(
+                query, k=k, fetch_k=fetch_k, rrf_k=rrf_k
+            )
+        ]
+
+    # --- async API --------------------------------------------------------
+    # pymongo calls run in worker threads sharing the client's pool, so they
+    # never block the event loop; embeddings use the model's async methods.
+
+    async def afrom_documents(self, documents: list[Document]):
+        await asyncio.to_thread(self.from_documents, documents)
+
+    async def aadd_documents(self, documents: list[Document]):
+        if not documents:
+            return []
+        embeddings = await self.embedding_model.aembed_documents(
+            [doc.page_content for doc in documents]
+        )
+        return await asyncio.to_thread(self.add_embeddings, documents, embeddings)
+
+    async def asimilarity_search_with_score(self, query: str, k: int = 5):
+        if self.query_cache is not None:
+            return await asyncio.to_thread(self.similarity_search_with_score, query, k)
+        embedding = await self.embedding_model.aembed_query(query)
+        return await asyncio.to_thread(self._search_by_vector, embedding, k)
+
+    async def asimilarity_search(self, query: str, k: int = 5):
+        hits = await self.asimilarity_search_with_score(query, k=k)
+        return [doc for doc, _ in hits]
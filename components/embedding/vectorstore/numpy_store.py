@@ -0,0 +1,295 @@
+import json
+import os
+import uuid
+from typing import List
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from .indexing import embed_queries
+from .registry import register_vector_store
+from .serialization import document_json
+
+SUPPORTED_DTYPES = {"float32": np.float32, "float16": np.float16}
+METRICS = ("cosine", "dot")
+VECTORS_FILENAME = "vectors.npy"
+DOCUMENTS_FILENAME = "documents.jsonl"
+META_FILENAME = "meta.json"
+
+# Rows scored per matmul, bounding the temporary score matrix
+SEARCH_BLOCK_ROWS = 65_536
+
+
+def top_k_scores(queries: np.ndarray, matrix: np.ndarray, k: int):
+    """
+    Exact top-k inner products of each query against the rows of a matrix.
+
+    The matrix is scored in blocks of ``SEARCH_BLOCK_ROWS`` rows with one
+    batched matmul per block; ``argpartition`` keeps the best ``k`` of each
+    block so memory stays bounded for large or memory-mapped matrices.
+
+    :param queries: float32 matrix of shape (q, dim)
+    :param matrix: float32/float16 matrix of shape (n, dim)
+    :param k: Number of results per query
+    :return: (scores, rows) arrays of shape (q, min(k, n)), best first
+    """
+    n = len(matrix)
+    k = min(k, n)
+    if k <= 0:
+        empty = np.empty((len(queries), 0))
+        return empty.astype(np.float32), empty.astype(np.int64)
+
+    best_scores = np.empty((len(queries), 0), dtype=np.float32)
+    best_rows = np.empty((len(queries), 0), dtype=np.int64)
+    for start in range(0, n, SEARCH_BLOCK_ROWS):
+        block = np.asarray(matrix[start : start + SEARCH_BLOCK_ROWS], np.float32)
+        scores = np.concatenate([best_scores, queries @ block.T], axis=1)
+        block_rows = np.broadcast_to(
+            np.arange(start, start + len(block)), (len(queries), len(block))
+        )
+        rows = np.concatenate([best_rows, block_rows], axis=1)
+        if scores.shape[1] > k:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(scores, top, axis=1)
+            rows = np.take_along_axis(rows, top, axis=1)
+        best_scores, best_rows = scores, rows
+
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return (
+        np.take_along_axis(best_scores, order, axis=1),
+        np.take_along_axis(best_rows, order, axis=1),
+    )
+
+
+@register_vector_store("numpy")
+class NumpyVectorStoreFactory:
+    """
+    Dependency-light, in-process vector store for small corpora, CI and local
+    stand-ins.
+
+    Vectors live in a preallocated float32 or float16 matrix that doubles
+    when full; deleted rows are filled by moving the last row into them.
+    Search is exact: a batched matmul followed by ``argpartition``. Saved
+    stores are a plain ``.npy`` matrix plus JSON-lines documents, and
+    ``load_local(path, mmap=True)`` memory-maps the matrix without copying.
+    """
+
+    def __init__(
+        self,
+        embedding_model: Embeddings,
+        dtype: str = "float32",
+        metric: str = "cosine",
+        initial_capacity: int = 1024,
+    ):
+        """
+        :param embedding_model: Embedding model used for documents and queries
+        :param dtype: Storage precision, "float32" or "float16"
+        :param metric: "cosine" (vectors are normalized) or "dot"
+        :param initial_capacity: Rows preallocated before the first resize
+        """
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        if metric not in METRICS:
+            raise ValueError(f"Unsupported metric: {metric}")
+        self.embedding_model = embedding_model
+        self.dtype = np.dtype(SUPPORTED_DTYPES[dtype])
+        self.metric = metric
+        self.initial_capacity = initial_capacity
+        self._reset()
+
+    def _reset(self):
+        self.vectors = None  # (capacity, dim), allocated on the first add
+        self.size = 0
+        self.ids: List[str] = []  # row -> ID
+        self.documents = {}  # ID -> Document
+        self._rows = {}  # ID -> row
+
+    def __len__(self):
+        return self.size
+
+    def _prepare(self, embeddings) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        if self.metric == "cosine":
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+        return vectors
+
+    def _reserve(self, rows: int, dim: int):
+        if self.vectors is None:
+            capacity = max(self.initial_capacity, rows)
+            self.vectors = np.zeros((capacity, dim), dtype=self.dtype)
+            return
+        if self.vectors.shape[1] != dim:
+            raise ValueError(
+                f"Expected {self.vectors.shape[1]}-dim embeddings, got {dim}"
+            )
+        needed = self.size + rows
+        if needed <= len(self.vectors) and self.vectors.flags.writeable:
+            return
+        # Grow geometrically; also copies a read-only memory map into RAM
+        capacity = max(needed, 2 * len(self.vectors))
+        grown = np.zeros((capacity, dim), dtype=self.dtype)
+        grown[: self.size] = self.vectors[: self.size]
+        self.vectors = grown
+
+    def from_documents(self, documents: List[Document]):
+        self._reset()
+        self.add_documents(documents)
+        return self
+
+    def add_documents(self, documents: List[Document]):
+        if not documents:
+            return []
+        embeddings = self.embedding_model.embed_documents(
+            [doc.page_content for doc in documents]
+        )
+        return self.add_embeddings(documents, embeddings)
+
+    def add_embeddings(self, documents: List[Document], embeddings: list):
+        """
+        Add documents whose embeddings were computed ahead of time.
+        """
+        if not documents:
+            return []
+        vectors = self._prepare(embeddings)
+        self._reserve(len(vectors), vectors.shape[1])
+        self.vectors[self.size : self.size + len(vectors)] = vectors
+
+        ids = [str(uuid.uuid4()) for _ in documents]
+        for offset, (doc_id, doc) in enumerate(zip(ids, documents)):
+            self.ids.append(doc_id)
+            self._rows[doc_id] = self.size + offset
+            self.documents[doc_id] = doc
+        self.size += len(vectors)
+        return ids
+
+    def delete(self, ids: List[str]):
+        """
+        Remove documents by the IDs returned when they were added.
+        """
+        ids = [doc_id for doc_id in ids if doc_id in self._rows]
+        if not ids:
+            return
+        self._reserve(0, self.vectors.shape[1])  # a memory map must become writable
+        for doc_id in ids:
+            row = self._rows.pop(doc_id)
+            del self.documents[doc_id]
+            last = self.size - 1
+            if row != last:
+                self.vectors[row] = self.vectors[last]
+                moved = self.ids[last]
+                self.ids[row] = moved
+                self._rows[moved] = row
+            self.ids.pop()
+            self.size -= 1
+
+    def similarity_search_by_vector_with_score(self, embedding, k: int = 5):
+        return self._search(self._prepare(embedding), k)[0]
+
+    def similarity_search_by_vector(self, embedding, k: int = 5):
+        return [
+            doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)
+        ]
+
+    def similarity_search_with_score(self, query: str, k: int = 5):
+        return self.similarity_search_by_vector_with_score(
+            self.embedding_model.embed_query(query), k=k
+        )
+
+    def similarity_search(self, query: str, k: int = 5):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k)]
+
+    def similarity_search_batch_with_score(self, queries: List[str], k: int = 5):
+        """
+        Search several queries, embedded with ``embed_queries``, with one
+        matmul per block of stored vectors.
+
+        :return: One list of (Document, similarity) tuples per query
+        """
+        if not queries:
+            return []
+        return self._search(
+            self._prepare(embed_queries(self.embedding_model, list(queries))), k
+        )
+
+    def similarity_search_batch(self, queries: List[str], k: int = 5):
+        return [
+            [doc for doc, _ in hits]
+            for hits in self.similarity_search_batch_with_score(queries, k=k)
+        ]
+
+    def _search(self, queries: np.ndarray, k: int):
+        if not self.size:
+            return [[] for _ in queries]
+        scores, rows = top_k_scores(queries, self.vectors[: self.size], k)
+        return [
+            [
+                (self.documents[self.ids[row]], float(score))
+                for score, row in zip(row_scores, row_rows)
+            ]
+            for row_scores, row_rows in zip(scores.tolist(), rows.tolist())
+        ]
+
+    def save_local(self, path: str):
+        """
+        Save the vectors as ``vectors.npy`` and the documents as JSON lines.
+
+        :raises TypeError: If a Document's metadata is not JSON serializable
+        """
+        os.makedirs(path, exist_ok=True)
+        # Documents go first, via a temporary file, so a document that cannot
+        # be serialized leaves any earlier save untouched
+        documents_path = os.path.join(path, DOCUMENTS_FILENAME)
+        tmp_path = f"{documents_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for doc_id in self.ids:
+                    doc = self.documents[doc_id]
+                    record = {
+                        "id": doc_id,
+                        "page_content": doc.page_content,
+                        "metadata": doc.metadata,
+                    }
+                    f.write(document_json(doc_id, record) + "\n")
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        dim = self.vectors.shape[1] if self.vectors is not None else 0
+        matrix = (
+            self.vectors[: self.size]
+            if self.vectors is not None
+            else np.zeros((0, dim), dtype=self.dtype)
+        )
+        np.save(os.path.join(path, VECTORS_FILENAME), matrix)
+        os.replace(tmp_path, documents_path)
+        with open(os.path.join(path, META_FILENAME), "w", encoding="utf-8") as f:
+            json.dump({"dtype": self.dtype.name, "metric": self.metric}, f)
+
+    def load_local(self, path: str, mmap: bool = False):
+        """
+        Load a store saved with save_local.
+
+        :param path: Folder written by save_local
+        :param mmap: Memory-map ``vectors.npy`` read-only instead of reading it.
+            The first write copies the matrix into memory.
+        """
+        with open(os.path.join(path, META_FILENAME), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.dtype = np.dtype(meta["dtype"])
+        self.metric = meta["metric"]
+
+        self._reset()
+        vectors = np.load(
+            os.path.join(path, VECTORS_FILENAME), mmap_mode="r" if mmap else None
+        )
+        with open(os.path.join(path, DOCUMENTS_FILENAME), "r", encoding="utf-8") as f:
+            for row, line in enumerate(f):
+                record = json.loads(line)
+                self.ids.append(record["id"])
+                self._rows[record["id"]] = row
+                self.documents[record["id"]] = Document(
+                    page_content=record["page_content"], metadata=record["metadata"]
+                )
+        self.vectors = vectors if len(vectors) else None
+        self.size = len(self.ids)
@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache with an optional time-to-live.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        """
+        :param max_size: Maximum number of entries kept
+        :param ttl: Seconds after which an entry expires (None = never)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] is not None:
+                if entry[0] < time.monotonic():
+                    del self._entries[key]
+                    entry = _MISSING
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
+
+
+class QueryCache:
+    """
+    Two-level cache for vector store searches: query text -> embedding, and
+    (generation, embedding, search parameters) -> results.
+
+    Store factories call ``invalidate()`` whenever their content changes. That
+    bumps ``generation``, which is part of every result key, so a search that
+    was already running during a write can never store results under the new
+    generation. Query embeddings do not depend on the store and survive
+    invalidation.
+
+    Cached results are shared between callers and must not be mutated.
+    """
+
+    def __init__(
+        self,
+        max_queries: int = 10_000,
+        max_results: int = 10_000,
+        ttl: Optional[float] = None,
+    ):
+        """
+        :param max_queries: Number of query embeddings kept
+        :param max_results: Number of result lists kept
+        :param ttl: Seconds after which cached results expire (None = never).
+            Useful when other processes write to the same store.
+        """
+        self.embeddings = LRUCache(max_queries)
+        self.results = LRUCache(max_results, ttl=ttl)
+        self.generation = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def embed_query(self, embedding_model, query: str) -> List[float]:
+        embedding = self.embeddings.get(query)
+        if embedding is None:
+            embedding = embedding_model.embed_query(query)
+            self.embeddings.put(query, embedding)
+        return embedding
+
+    def get_or_search(self, embedding, search: Callable[[], list], **params) -> list:
+        """
+        Returns cached results for the embedding and parameters, or runs
+        ``search()`` and caches what it returns.
+
+        :param embedding: Query vector
+        :param search: Callable running the actual search
+        :param params: Search parameters (k, filter, ...) that change results
+        """
+        generation = self.generation
+        key = (
+            generation,
+            np.asarray(embedding, dtype=np.float32).tobytes(),
+            repr(sorted(params.items())),
+        )
+        results = self.results.get(key)
+        if results is None:
+            results = search()
+            self.results.put(key, results)
+        return list(results)
+
+    def invalidate(self):
+        """
+        Start a new generation and drop every cached result.
+        """
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+        self.results.clear()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns hit/miss counters of both levels, for tuning the cache sizes.
+        """
+        return {
+            "embeddings": self.embeddings.stats(),
+            "results": self.results.stats(),
+            "generation": self.generation,
+            "invalidations": self.invalidations,
+        }
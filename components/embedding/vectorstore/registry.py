@@ -0,0 +1,46 @@
+from components.utils.imports import import_string
+
+# Map store types to factory classes, or to "module:Class" paths of backends
+# that have not been imported yet
+VECTOR_STORE_REGISTRY = {
+    "faiss": "components.embedding.vectorstore.faiss_store:FAISSVectorStoreFactory",
+    "mongodb": "components.embedding.vectorstore.mongodb_store:MongoDBVectorStoreFactory",
+    "numpy": "components.embedding.vectorstore.numpy_store:NumpyVectorStoreFactory",
+}
+
+
+def register_vector_store(name):
+    """
+    Decorator to register a new vector store backend.
+    """
+
+    def wrapper(cls):
+        VECTOR_STORE_REGISTRY[name] = cls
+        return cls
+
+    return wrapper
+
+
+def get_vector_store_class(store_type: str):
+    """
+    Returns the factory class of a backend, importing it on first use.
+    """
+    if store_type not in VECTOR_STORE_REGISTRY:
+        raise ValueError(f"Unsupported vector store type: {store_type}")
+    factory_class = VECTOR_STORE_REGISTRY[store_type]
+    if isinstance(factory_class, str):
+        factory_class = import_string(factory_class)
+        VECTOR_STORE_REGISTRY[store_type] = factory_class
+    return factory_class
+
+
+def create_vector_store(store_type: str, embedding_model, **kwargs):
+    """
+    Factory method to create a vector store.
+
+    :param store_type: A registered backend ("mongodb", "faiss", "numpy", ...)
+    :param embedding_model: The embedding model to use
+    :param kwargs: Options passed to the backend's factory class
+    :return: Vector store factory instance
+    """
+    return get_vector_store_class(store_type)(embedding_model, **kwargs)
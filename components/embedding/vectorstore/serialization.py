@@ -0,0 +1,21 @@
+import json
+from typing import Any
+
+
+def document_json(doc_id: str, value: Any) -> str:
+    """
+    Serialize a stored Document, or its metadata, as JSON.
+
+    Values JSON cannot represent (dates, numpy scalars, ...) are rejected
+    rather than coerced with ``str()``, which would change the metadata on
+    reload.
+
+    :param doc_id: ID of the Document, for the error message
+    :param value: Data to serialize
+    :return: JSON string
+    :raises TypeError: If ``value`` is not JSON serializable
+    """
+    try:
+        return json.dumps(value)
+    except (TypeError, ValueError) as e:
+        raise TypeError(f"Metadata of document {doc_id} is not JSON: {e}") from e
@@ -0,0 +1,123 @@
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Mapping
+from typing import Dict, Iterator, Union
+
+from langchain.schema import Document
+from langchain_community.docstore.base import Docstore
+
+from .serialization import document_json
+
+DOCSTORE_FILENAME = "docstore.sqlite"
+
+
+def write_sqlite_docstore(
+    path: str, docstore: Docstore, index_to_docstore_id: Dict[int, str]
+):
+    """
+    Write a FAISS docstore and its position -> ID map to a SQLite file.
+
+    :param path: Destination file (replaced if it exists)
+    :param docstore: Docstore holding every Document referenced by the map
+    :param index_to_docstore_id: FAISS vector position -> docstore ID
+    :raises TypeError: If a Document's metadata is not JSON serializable
+    """
+    rows = []
+    for position, doc_id in index_to_docstore_id.items():
+        doc = docstore.search(doc_id)
+        rows.append((doc_id, doc.page_content, document_json(doc_id, doc.metadata)))
+
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    conn.executescript(
+        """
+        CREATE TABLE documents (
+            id TEXT PRIMARY KEY,
+            page_content TEXT NOT NULL,
+            metadata TEXT NOT NULL
+        );
+        CREATE TABLE positions (
+            position INTEGER PRIMARY KEY,
+            id TEXT NOT NULL
+        );
+        """
+    )
+    conn.executemany("INSERT OR REPLACE INTO documents VALUES (?, ?, ?)", rows)
+    conn.executemany(
+        "INSERT INTO positions VALUES (?, ?)", list(index_to_docstore_id.items())
+    )
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, path)
+
+
+class _ReadOnlyConnection:
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No SQLite docstore at {path}")
+        self.conn = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self.lock = threading.Lock()
+
+    def fetchone(self, query: str, params=()):
+        with self.lock:
+            return self.conn.execute(query, params).fetchone()
+
+    def fetchall(self, query: str, params=()):
+        with self.lock:
+            return self.conn.execute(query, params).fetchall()
+
+
+class SQLiteDocstore(Docstore):
+    """
+    Read-only docstore backed by a SQLite file.
+
+    Documents are fetched on demand, so opening the store costs nothing
+    regardless of corpus size and the file pages are shared between processes
+    through the OS page cache.
+    """
+
+    def __init__(self, path: str):
+        self._db = _ReadOnlyConnection(path)
+
+    def search(self, search: str) -> Union[str, Document]:
+        row = self._db.fetchone(
+            "SELECT page_content, metadata FROM documents WHERE id = ?", (search,)
+        )
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=row[0], metadata=json.loads(row[1]))
+
+    def delete(self, ids):
+        raise NotImplementedError("SQLiteDocstore is read-only.")
+
+
+class SQLiteIndexMap(Mapping):
+    """
+    Read-only FAISS position -> docstore ID map backed by a SQLite file.
+    """
+
+    def __init__(self, path: str):
+        self._db = _ReadOnlyConnection(path)
+
+    def __getitem__(self, position: int) -> str:
+        row = self._db.fetchone(
+            "SELECT id FROM positions WHERE position = ?", (int(position),)
+        )
+        if row is None:
+            raise KeyError(position)
+        return row[0]
+
+    def __iter__(self) -> Iterator[int]:
+        for (position,) in self._db.fetchall(
+            "SELECT position FROM positions ORDER BY position"
+        ):
+            yield position
+
+    def __len__(self) -> int:
+        return self._db.fetchone("SELECT COUNT(*) FROM positions")[0]
@@ -0,0 +1,183 @@
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+from langchain_core.documents import Document
+
+from components.utils.hashing import hash_content
+from components.utils.logger import get_logger
+
+from .indexing import _get_embedding_model, chunk_document, embed_unique
+
+logger = get_logger(__name__)
+
+DEFAULT_SYNC_BATCH_SIZE = 256
+
+
+class IndexManifest:
+    """
+    Local JSON record of what has been indexed: for every source URL, the
+    content hash of the indexed page and the vector store IDs of its chunks.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def get(self, source: str) -> Optional[Dict]:
+        return self.entries.get(source)
+
+    def set(self, source: str, content_hash: str, chunk_ids: List[str]):
+        self.entries[source] = {"hash": content_hash, "chunk_ids": list(chunk_ids)}
+
+    def remove(self, source: str) -> Optional[Dict]:
+        return self.entries.pop(source, None)
+
+    def sources(self) -> List[str]:
+        return list(self.entries)
+
+    def save(self):
+        """
+        Write the manifest atomically, so a crash never leaves it truncated.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+
+def document_hash(document: Document) -> str:
+    """
+    Returns the crawler's ``content_hash`` metadata, or hashes the page text.
+    """
+    return document.metadata.get("content_hash") or hash_content(
+        document.page_content.strip()
+    )
+
+
+def sync_documents(
+    documents: Iterable[Document],
+    vector_store,
+    chunkers: list,
+    manifest_path: str,
+    delete_missing: bool = True,
+    batch_size: int = DEFAULT_SYNC_BATCH_SIZE,
+    deduplicate: bool = True,
+) -> Dict[str, int]:
+    """
+    Incrementally bring a vector store in line with a fresh crawl.
+
+    Pages whose content hash matches the manifest are skipped. New and changed
+    pages are chunked, embedded and added; the chunks of the previous version
+    of a changed page are deleted once the new ones are stored. With
+    ``delete_missing``, pages present in the manifest but absent from
+    ``documents`` have their chunks deleted, so use one manifest per crawled
+    site.
+
+    The store must expose ``add_documents`` (or ``add_embeddings``) returning
+    IDs and ``delete(ids)``, as both store factories do. A FAISS store must be
+    loaded from the same index the manifest describes before syncing, and
+    cannot use an HNSW index, from which FAISS cannot delete vectors.
+
+    :param documents: Iterable of page Documents with a "source" metadata key
+    :param vector_store: A vector store factory
+    :param chunkers: List of text splitters to apply
+    :param manifest_path: Path of the JSON manifest (created if missing)
+    :param delete_missing: Delete chunks of pages no longer crawled
+    :param batch_size: Number of chunks to embed and upload per call
+    :param deduplicate: Merge identical chunks produced by different chunkers
+    :return: Dict of page and chunk counts by outcome
+    """
+    if not getattr(vector_store, "supports_delete", True):
+        raise ValueError(
+            "sync_documents needs a vector store that can delete documents; "
+            "FAISS HNSW indexes cannot, so rebuild them with "
+            "index_documents instead."
+        )
+    manifest = IndexManifest(manifest_path)
+    embedding_model = _get_embedding_model(vector_store)
+    precompute = hasattr(vector_store, "add_embeddings") and embedding_model
+    stats = {
+        "added": 0,
+        "updated": 0,
+        "unchanged": 0,
+        "deleted": 0,
+        "chunks_added": 0,
+        "chunks_deleted": 0,
+    }
+    seen = set()
+    # Pages waiting to be uploaded: (source, content hash, chunks)
+    pending = []
+
+    def flush():
+        chunks = [chunk for _, _, page_chunks in pending for chunk in page_chunks]
+        if chunks:
+            if precompute:
+                embeddings = embed_unique(
+                    embedding_model, [chunk.page_content for chunk in chunks]
+                )
+                ids = vector_store.add_embeddings(chunks, embeddings)
+            else:
+                ids = vector_store.add_documents(chunks)
+            stats["chunks_added"] += len(chunks)
+
+        offset = 0
+        for source, content_hash, page_chunks in pending:
+            page_ids = ids[offset : offset + len(page_chunks)] if chunks else []
+            offset += len(page_chunks)
+            previous = manifest.get(source)
+            if previous:
+                vector_store.delete(previous["chunk_ids"])
+                stats["chunks_deleted"] += len(previous["chunk_ids"])
+                stats["updated"] += 1
+            else:
+                stats["added"] += 1
+            manifest.set(source, content_hash, page_ids)
+        pending.clear()
+
+    try:
+        pending_chunks = 0
+        for document in documents:
+            source = document.metadata.get("source")
+            if source is None:
+                raise ValueError("Documents need a 'source' metadata key to sync.")
+            if source in seen:
+                continue
+            seen.add(source)
+
+            content_hash = document_hash(document)
+            previous = manifest.get(source)
+            if previous and previous["hash"] == content_hash:
+                stats["unchanged"] += 1
+                continue
+
+            chunks = chunk_document(document, chunkers, deduplicate)
+            pending.append((source, content_hash, chunks))
+            pending_chunks += len(chunks)
+            if pending_chunks >= batch_size:
+                flush()
+                pending_chunks = 0
+        flush()
+
+        if delete_missing:
+            for source in manifest.sources():
+                if source in seen:
+                    continue
+                entry = manifest.remove(source)
+                vector_store.delete(entry["chunk_ids"])
+                stats["deleted"] += 1
+                stats["chunks_deleted"] += len(entry["chunk_ids"])
+    finally:
+        # Persist whatever was synced, even if a later batch failed
+        manifest.save()
+
+    logger.info(
+        f"Synced {len(seen)} pages: {stats['added']} added, {stats['updated']} "
+        f"updated, {stats['unchanged']} unchanged, {stats['deleted']} deleted"
+    )
+    return stats
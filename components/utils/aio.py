@@ -0,0 +1,31 @@
+import asyncio
+from typing import AsyncIterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+def iterate_in_thread(
+    aiterable: AsyncIterable[T], loop: asyncio.AbstractEventLoop
+) -> Iterator[T]:
+    """
+    Consume an async iterable from a worker thread as a plain iterator.
+
+    Each item is fetched by scheduling ``__anext__`` on ``loop``, which must
+    be running in another thread. This lets synchronous pipelines such as
+    ``index_documents_streaming`` (run via ``asyncio.to_thread``) pull from
+    an async crawl while it is still producing.
+
+    Args:
+        aiterable (AsyncIterable): Source, e.g. an async generator.
+        loop (asyncio.AbstractEventLoop): The loop that drives ``aiterable``.
+
+    Returns:
+        Iterator over the items of ``aiterable``.
+    """
+    iterator = aiterable.__aiter__()
+    while True:
+        future = asyncio.run_coroutine_threadsafe(iterator.__anext__(), loop)
+        try:
+            yield future.result()
+        except StopAsyncIteration:
+            return
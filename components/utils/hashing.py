@@ -0,0 +1,14 @@
+import hashlib
+
+
+def hash_content(content: str) -> str:
+    """
+    Returns the hex-encoded sha256 digest of a string.
+
+    Args:
+        content (str): Text to hash (encoded as UTF-8).
+
+    Returns:
+        str: 64-character hexadecimal digest.
+    """
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
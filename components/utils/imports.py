@@ -0,0 +1,18 @@
+import importlib
+
+
+def import_string(path: str):
+    """
+    Import an object from a ``"package.module:attribute"`` path.
+
+    Used by registries to defer heavy optional dependencies until a backend
+    is actually requested.
+
+    Args:
+        path (str): Module path and attribute name separated by a colon.
+
+    Returns:
+        The imported attribute.
+    """
+    module_name, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
@@ -0,0 +1,330 @@
+import json
+import os
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"\w+")
+# Shingle hashes are combined polynomially from token hashes
+_SHINGLE_BASE = np.uint64(0x100000001B3)
+_EMPTY = np.uint64(0xFFFFFFFF)
+# Bits of each MinHash value kept for verifying candidates (b-bit MinHash)
+_SKETCH_BITS = 8
+
+
+def shingle_hashes(text: str, shingle_size: int = 5) -> np.ndarray:
+    """
+    Hashes the distinct word shingles of a text.
+
+    Words are lowercased and hashed once with crc32; each run of
+    ``shingle_size`` consecutive word hashes is then combined with a
+    polynomial hash in NumPy, so no shingle string is ever built.
+
+    Args:
+        text (str): Text to shingle.
+        shingle_size (int): Words per shingle. Shorter texts form one shingle.
+
+    Returns:
+        np.ndarray: Unique uint64 shingle hashes (empty for a text without
+        words).
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    hashes = np.fromiter(
+        (zlib.crc32(token.encode("utf-8")) for token in tokens),
+        dtype=np.uint64,
+        count=len(tokens),
+    )
+    size = min(shingle_size, len(hashes))
+    count = len(hashes) - size + 1
+    shingles = np.zeros(count, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for offset in range(size):
+            shingles = shingles * _SHINGLE_BASE + hashes[offset : offset + count]
+    return np.unique(shingles)
+
+
+def optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Chooses the LSH banding for a similarity threshold.
+
+    Picks the number of bands ``b`` and rows per band ``r`` (``b * r <=
+    num_perm``) minimising the sum of the false positive and false negative
+    probability mass of the S-curve ``1 - (1 - s**r)**b`` around the
+    threshold.
+
+    Args:
+        threshold (float): Jaccard similarity above which pages are duplicates.
+        num_perm (int): Number of MinHash permutations.
+
+    Returns:
+        Tuple[int, int]: (bands, rows).
+    """
+    below = np.linspace(0.0, threshold, 200)
+    above = np.linspace(threshold, 1.0, 200)
+    best, best_error = (1, num_perm), float("inf")
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positive = np.mean(1 - (1 - below**rows) ** bands) * threshold
+            false_negative = np.mean((1 - above**rows) ** bands) * (1 - threshold)
+            if false_positive + false_negative < best_error:
+                best, best_error = (bands, rows), false_positive + false_negative
+    return best
+
+
+def _is_empty(signature: np.ndarray) -> bool:
+    # Only a text without shingles keeps the initial value everywhere
+    return bool((signature == 0xFFFFFFFF).all())
+
+
+class NearDuplicateIndex:
+    """
+    MinHash LSH index for finding pages that are nearly, not exactly, equal.
+
+    Each text is reduced to a MinHash signature of its word shingles; the
+    signature is cut into bands and every band is hashed into a bucket, so a
+    lookup only compares a text with the few pages sharing one of its
+    buckets. Candidates are confirmed by estimating their Jaccard similarity
+    from 8-bit sketches of the signatures (b-bit MinHash), which keeps the
+    per-page memory at ``num_perm`` bytes plus one bucket entry per band.
+
+    The index is thread-safe, can be saved and loaded, and can be shared by
+    several crawls and sites.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        num_perm: int = 128,
+        shingle_size: int = 5,
+        seed: int = 1,
+        initial_capacity: int = 1024,
+    ):
+        """
+        Args:
+            threshold (float): Estimated Jaccard similarity of word shingles
+                at or above which two texts are near-duplicates.
+            num_perm (int): Number of MinHash permutations.
+            shingle_size (int): Words per shingle.
+            seed (int): Seed of the hash functions. Indexes can only be
+                compared or merged with the same seed.
+            initial_capacity (int): Pages preallocated before the first resize.
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError(f"Threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing: the high 32 bits of a * x + b (mod 2**64)
+        self._a = rng.integers(1, 2**63, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, dtype=np.uint64)
+        self._bin_width = -(-(2**32) // num_perm)
+        self._band_mult = rng.integers(1, 2**63, self.rows, dtype=np.uint64)
+
+        self.keys: List[str] = []
+        self._numbers: Dict[str, int] = {}  # key -> page number
+        self._sketches = np.zeros((initial_capacity, num_perm), dtype=np.uint8)
+        self._band_keys = np.zeros((initial_capacity, self.bands), dtype=np.uint64)
+        # One dict per band: bucket hash -> page number, or list of numbers
+        self._buckets: List[Dict[int, object]] = [{} for _ in range(self.bands)]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Returns the uint32 MinHash signature (length ``num_perm``) of a text.
+
+        Uses one-permutation hashing: every shingle is hashed once and falls
+        into one of ``num_perm`` bins, each keeping its minimum, so the cost
+        is linear in the number of shingles rather than shingles times
+        permutations. Empty bins borrow the value of the next non-empty bin,
+        offset by their distance (rotation densification).
+        """
+        shingles = shingle_hashes(text, self.shingle_size)
+        signature = np.full(self.num_perm, _EMPTY, dtype=np.uint64)
+        if not len(shingles):
+            return signature.astype(np.uint32)
+        with np.errstate(over="ignore"):
+            hashed = (self._a * shingles + self._b) >> np.uint64(32)
+        bins, values = np.divmod(hashed, np.uint64(self._bin_width))
+        np.minimum.at(signature, bins.astype(np.intp), values)
+
+        empty = signature == _EMPTY
+        if empty.any():
+            filled = np.flatnonzero(~empty)
+            positions = np.arange(self.num_perm)
+            source = filled[np.searchsorted(filled, positions) % len(filled)]
+            distance = (source - positions) % self.num_perm
+            signature = signature[source] + distance.astype(np.uint64) * np.uint64(
+                self._bin_width
+            )
+        return signature.astype(np.uint32)
+
+    def _band_hashes(self, signature: np.ndarray) -> np.ndarray:
+        bands = signature[: self.bands * self.rows].reshape(self.bands, self.rows)
+        with np.errstate(over="ignore"):
+            return (bands.astype(np.uint64) * self._band_mult).sum(axis=1)
+
+    def _candidates(self, band_keys: np.ndarray) -> List[int]:
+        candidates = set()
+        for bucket, key in zip(self._buckets, band_keys.tolist()):
+            numbers = bucket.get(key)
+            if numbers is None:
+                continue
+            if isinstance(numbers, list):
+                candidates.update(numbers)
+            else:
+                candidates.add(numbers)
+        return sorted(candidates)
+
+    def _similarities(self, sketch: np.ndarray, numbers: List[int]) -> np.ndarray:
+        matches = (self._sketches[numbers] == sketch).mean(axis=1)
+        # Two unrelated values still agree on their low bits by chance
+        chance = 1.0 / 2**_SKETCH_BITS
+        return np.clip((matches - chance) / (1 - chance), 0.0, 1.0)
+
+    def query(self, text: str) -> List[Tuple[str, float]]:
+        """
+        Finds indexed near-duplicates of a text.
+
+        Returns:
+            List[Tuple[str, float]]: (key, estimated similarity) of every
+            indexed page at or above the threshold, most similar first.
+        """
+        signature = self.signature(text)
+        if _is_empty(signature):
+            return []
+        with self._lock:
+            return self._query(signature, self._band_hashes(signature))
+
+    def _query(self, signature, band_keys) -> List[Tuple[str, float]]:
+        numbers = self._candidates(band_keys)
+        if not numbers:
+            return []
+        sketch = signature.astype(np.uint8)
+        similarities = self._similarities(sketch, numbers)
+        hits = [
+            (self.keys[number], float(similarity))
+            for number, similarity in zip(numbers, similarities)
+            if similarity >= self.threshold
+        ]
+        return sorted(hits, key=lambda hit: -hit[1])
+
+    def add(self, key: str, text: str):
+        """
+        Index a text under a key (e.g. its URL), even if it is a near-duplicate.
+        A text already indexed under the key is replaced.
+        """
+        signature = self.signature(text)
+        if _is_empty(signature):
+            return
+        with self._lock:
+            self._insert(key, signature, self._band_hashes(signature))
+
+    def find_or_add(self, key: str, text: str) -> Optional[str]:
+        """
+        Returns the key of an indexed near-duplicate of the text, or indexes
+        the text under ``key`` and returns None.
+
+        A page is not a duplicate of itself: if the text matches what is
+        already indexed under the same key (e.g. a recrawled URL), None is
+        returned and nothing is added; if it changed beyond the threshold,
+        the new text replaces the old one. The lookup and the insertion happen
+        under one lock, so concurrent callers never both keep two
+        near-identical pages. Texts without any word are never reported nor
+        indexed.
+        """
+        signature = self.signature(text)
+        if _is_empty(signature):
+            return None
+        band_keys = self._band_hashes(signature)
+        with self._lock:
+            hits = self._query(signature, band_keys)
+            others = [hit_key for hit_key, _ in hits if hit_key != key]
+            if others:
+                return others[0]
+            if not hits:
+                self._insert(key, signature, band_keys)
+            return None
+
+    def _insert(self, key: str, signature: np.ndarray, band_keys: np.ndarray):
+        number = self._numbers.get(key)
+        if number is not None:
+            # A changed page reuses its slot; its old text must not match
+            self._remove_from_buckets(number, self._band_keys[number].tolist())
+        else:
+            number = len(self.keys)
+            if number == len(self._sketches):
+                capacity = 2 * len(self._sketches)
+                self._sketches = np.resize(self._sketches, (capacity, self.num_perm))
+                self._band_keys = np.resize(self._band_keys, (capacity, self.bands))
+            self.keys.append(key)
+            self._numbers[key] = number
+        self._sketches[number] = signature.astype(np.uint8)
+        self._band_keys[number] = band_keys
+        self._add_to_buckets(number, band_keys.tolist())
+
+    def _add_to_buckets(self, number: int, band_keys: List[int]):
+        for bucket, key in zip(self._buckets, band_keys):
+            numbers = bucket.get(key)
+            if numbers is None:
+                bucket[key] = number
+            elif isinstance(numbers, list):
+                numbers.append(number)
+            else:
+                bucket[key] = [numbers, number]
+
+    def _remove_from_buckets(self, number: int, band_keys: List[int]):
+        for bucket, key in zip(self._buckets, band_keys):
+            numbers = bucket.get(key)
+            if isinstance(numbers, list):
+                numbers.remove(number)
+                if len(numbers) == 1:
+                    bucket[key] = numbers[0]
+            elif numbers == number:
+                del bucket[key]
+
+    def save(self, path: str):
+        """
+        Write the index to a single ``.npz`` file (atomically).
+        """
+        meta = {
+            "threshold": self.threshold,
+            "num_perm": self.num_perm,
+            "shingle_size": self.shingle_size,
+            "seed": self.seed,
+        }
+        size = len(self.keys)
+        tmp_path = f"{path}.tmp"
+        with self._lock, open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                meta=np.frombuffer(json.dumps(meta).encode("utf-8"), np.uint8),
+                keys=np.frombuffer(json.dumps(self.keys).encode("utf-8"), np.uint8),
+                sketches=self._sketches[:size],
+                band_keys=self._band_keys[:size],
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "NearDuplicateIndex":
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+            keys = json.loads(data["keys"].tobytes().decode("utf-8"))
+            sketches = data["sketches"]
+            band_keys = data["band_keys"]
+        index = cls(initial_capacity=max(len(keys), 1), **meta)
+        for key, sketch, row in zip(keys, sketches, band_keys):
+            # Sketches are stored as-is: they are already truncated to uint8
+            index._insert(key, sketch, row)
+        return index
@@ -0,0 +1,310 @@
+import json
+import os
+from typing import Dict, List, Optional
+
+import requests
+
+from components.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STATE_FILENAME = "state.json"
+JOURNAL_FILENAME = "journal.jsonl"
+PAGES_DIRNAME = "pages"
+# The journal is folded into state.json once it is larger than both
+MIN_COMPACT_BYTES = 1 << 20
+
+
+class CrawlCheckpoint:
+    """
+    On-disk state of a deep crawl of one website, so an interrupted crawl can
+    resume where it stopped and a later recrawl can revalidate pages instead
+    of refetching them.
+
+    The checkpoint folder holds ``state.json`` (the BFS frontier, the visited
+    URLs and, per crawled URL, its depth, outgoing links, content hash, ETag
+    and Last-Modified) and ``pages/<content_hash>.md`` with the text of every
+    crawled page. Each crawl gets a new ``crawl_id``; a page record carries
+    the id of the last crawl that reached it.
+
+    After each batch, only that batch's changes are appended to
+    ``journal.jsonl``: the processed frontier entries, the newly queued
+    URLs and the page records it wrote. So checkpoint I/O grows with the
+    batch, not with the crawl. When the journal outgrows ``state.json``,
+    the full state is rewritten and the journal starts over, which keeps
+    the total I/O linear in crawl size. Loading replays the journal on top
+    of the state.
+    """
+
+    def __init__(self, path: str, website_url: str):
+        """
+        :param path: Checkpoint folder (created on the first save)
+        :param website_url: Start URL; a checkpoint of another site is ignored
+        """
+        self.path = path
+        self.website_url = website_url
+        self.crawl_id = 0
+        self.in_progress = False
+        self.frontier: List[List] = []  # [url, depth] in BFS order
+        self.visited = set()
+        self.pages: Dict[str, Dict] = {}
+        # Bumped by every save; journal entries of older generations are stale
+        self.generation = 0
+        self._queued: List[List] = []  # frontier entries since the last entry
+        self._changed = set()  # URLs of page records since the last entry
+        self._state_bytes = 0
+        self._journal_bytes = 0
+
+        state_path = os.path.join(path, STATE_FILENAME)
+        if os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("website") == website_url:
+                self.crawl_id = state["crawl_id"]
+                self.in_progress = state["in_progress"]
+                self.frontier = state["frontier"]
+                self.visited = set(state["visited"])
+                self.pages = state["pages"]
+                self.generation = state.get("generation", 0)
+                self._state_bytes = os.path.getsize(state_path)
+                self._replay()
+            else:
+                logger.warning(
+                    f"Ignoring checkpoint of {state.get('website')} in {path}"
+                )
+
+    def start(self) -> bool:
+        """
+        Begin a new crawl, or continue the one that was interrupted.
+
+        :return: True if an interrupted crawl is being resumed
+        """
+        if self.in_progress:
+            logger.info(
+                f"Resuming crawl of {self.website_url}: {len(self.frontier)} "
+                f"queued, {len(self.visited)} visited"
+            )
+            return True
+        self.crawl_id += 1
+        self.in_progress = True
+        self.frontier = [[self.website_url, 0]]
+        self.visited = {self.website_url}
+        self.save()
+        return False
+
+    def finish(self):
+        """
+        Mark the crawl complete, forget pages it did not reach and delete
+        page texts no record refers to any more.
+        """
+        self.in_progress = False
+        self.frontier = []
+        self.visited = set()
+        self.pages = {
+            url: record
+            for url, record in self.pages.items()
+            if record["crawl_id"] == self.crawl_id
+        }
+        self.save()
+
+        pages_dir = os.path.join(self.path, PAGES_DIRNAME)
+        if os.path.isdir(pages_dir):
+            kept = {f"{record['content_hash']}.md" for record in self.pages.values()}
+            for filename in os.listdir(pages_dir):
+                if filename not in kept:
+                    os.remove(os.path.join(pages_dir, filename))
+
+    def enqueue(self, links: List[str], depth: int):
+        """
+        Queue links found on a page at ``depth - 1`` that were not seen yet.
+        """
+        for url in links:
+            if url not in self.visited:
+                self.visited.add(url)
+                self.frontier.append([url, depth])
+                self._queued.append([url, depth])
+
+    def next_batch(self, size: int) -> List[List]:
+        """
+        Returns up to ``size`` queued [url, depth] pairs of the shallowest
+        depth, without removing them from the frontier.
+        """
+        if not self.frontier:
+            return []
+        depth = self.frontier[0][1]
+        batch = []
+        for item in self.frontier[:size]:
+            if item[1] != depth:
+                break
+            batch.append(item)
+        return batch
+
+    def complete(self, count: int):
+        """
+        Drop the first ``count`` frontier entries once they were processed,
+        and journal the batch (see the class docstring).
+        """
+        del self.frontier[:count]
+        entry = {
+            "generation": self.generation,
+            "completed": count,
+            "queued": self._queued,
+            "pages": {url: self.pages[url] for url in self._changed},
+        }
+        line = (json.dumps(entry) + "\n").encode("utf-8")
+        os.makedirs(self.path, exist_ok=True)
+        # One write per entry: a crash can only cut the last entry short
+        with open(os.path.join(self.path, JOURNAL_FILENAME), "ab") as f:
+            f.write(line)
+        self._queued = []
+        self._changed = set()
+        self._journal_bytes += len(line)
+        if self._journal_bytes > max(self._state_bytes, MIN_COMPACT_BYTES):
+            self.save()
+
+    def _replay(self):
+        journal_path = os.path.join(self.path, JOURNAL_FILENAME)
+        if not os.path.exists(journal_path):
+            return
+        valid = 0
+        with open(journal_path, "rb+") as f:
+            for line in f:
+                entry = None
+                if line.endswith(b"\n"):
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        pass
+                if entry is None:
+                    # Cut short by a crash: that batch is redone, and the
+                    # fragment must not run into the next entry
+                    f.truncate(valid)
+                    break
+                valid += len(line)
+                if entry["generation"] != self.generation:
+                    continue
+                self.frontier.extend(entry["queued"])
+                self.visited.update(url for url, _ in entry["queued"])
+                del self.frontier[: entry["completed"]]
+                self.pages.update(entry["pages"])
+                self._journal_bytes += len(line)
+
+    def store_page(
+        self,
+        url: str,
+        depth: int,
+        text: str,
+        content_hash: str,
+        links: List[str],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        """
+        Record a freshly crawled page and write its text.
+        """
+        pages_dir = os.path.join(self.path, PAGES_DIRNAME)
+        os.makedirs(pages_dir, exist_ok=True)
+        text_path = os.path.join(pages_dir, f"{content_hash}.md")
+        if not os.path.exists(text_path):
+            with open(text_path, "w", encoding="utf-8") as f:
+                f.write(text)
+        self.pages[url] = {
+            "crawl_id": self.crawl_id,
+            "depth": depth,
+            "content_hash": content_hash,
+            "links": links,
+            "etag": etag,
+            "last_modified": last_modified,
+        }
+        self._changed.add(url)
+
+    def touch_page(self, url: str, depth: int):
+        """
+        Carry an unchanged page over into the current crawl.
+        """
+        self.pages[url]["crawl_id"] = self.crawl_id
+        self.pages[url]["depth"] = depth
+        self._changed.add(url)
+
+    def load_text(self, url: str) -> str:
+        """
+        Returns the stored text of a crawled page.
+        """
+        content_hash = self.pages[url]["content_hash"]
+        path = os.path.join(self.path, PAGES_DIRNAME, f"{content_hash}.md")
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def current_pages(self) -> List[str]:
+        """
+        Returns the URLs already processed by the current crawl.
+        """
+        return [
+            url
+            for url, record in self.pages.items()
+            if record["crawl_id"] == self.crawl_id
+        ]
+
+    def save(self):
+        """
+        Write ``state.json`` atomically, so a crash never leaves it truncated,
+        and empty the journal it supersedes.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        self.generation += 1
+        state = {
+            "generation": self.generation,
+            "website": self.website_url,
+            "crawl_id": self.crawl_id,
+            "in_progress": self.in_progress,
+            "frontier": self.frontier,
+            "visited": sorted(self.visited),
+            "pages": self.pages,
+        }
+        state_path = os.path.join(self.path, STATE_FILENAME)
+        tmp_path = f"{state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, state_path)
+        # Entries left behind by a crash right here have an older generation
+        with open(os.path.join(self.path, JOURNAL_FILENAME), "wb"):
+            pass
+        self._state_bytes = os.path.getsize(state_path)
+        self._journal_bytes = 0
+        self._queued = []
+        self._changed = set()
+
+
+def is_unchanged(
+    url: str,
+    record: Dict,
+    session: Optional[requests.Session] = None,
+    timeout: float = 10,
+) -> bool:
+    """
+    Revalidate a previously crawled page with a conditional GET.
+
+    :param url: Page URL
+    :param record: Page record holding the "etag" and "last_modified" seen
+        on the previous crawl
+    :param session: Optional requests session to reuse connections
+    :param timeout: Request timeout in seconds
+    :return: True if the server answered 304 Not Modified
+    """
+    headers = {}
+    if record.get("etag"):
+        headers["If-None-Match"] = record["etag"]
+    if record.get("last_modified"):
+        headers["If-Modified-Since"] = record["last_modified"]
+    if not headers:
+        return False
+
+    try:
+        response = (session or requests).get(
+            url, headers=headers, timeout=timeout, stream=True
+        )
+        response.close()
+    except requests.RequestException as e:
+        logger.warning(f"Revalidation of {url} failed: {e}")
+        return False
+    return response.status_code == 304
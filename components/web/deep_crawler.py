@@ -1,40 +1,50 @@
-import hashlib
+import asyncio
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack
 from datetime import datetime
-from typing import Dict, List
+from types import SimpleNamespace
+from typing import AsyncIterator, Dict, List, Optional, Union
+from urllib.parse import urlparse
 
+import requests
 from crawl4ai import AsyncWebCrawler, CrawlerRunConfig
 from crawl4ai.content_scraping_strategy import LXMLWebScrapingStrategy
 from crawl4ai.deep_crawling import BFSDeepCrawlStrategy
 from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
+from crawl4ai.utils import normalize_url_for_deep_crawl
 from langchain.schema import Document
 
+from components.utils.hashing import hash_content
 from components.utils.logger import get_logger
+from components.utils.near_duplicates import NearDuplicateIndex
+from components.web.crawl_checkpoint import CrawlCheckpoint, is_unchanged
 
 logger = get_logger(__name__)
 today_str = datetime.now().strftime("%Y-%m-%d")
 
+# Pages fetched per arun_many call by checkpointed crawls
+DEFAULT_CHECKPOINT_BATCH_SIZE = 10
 
-def hash_content(content: str) -> str:
-    return hashlib.sha256(content.encode("utf-8")).hexdigest()
 
-
-async def crawl_website_for_documents(
-    website_url: str,
-    metadata: Dict = None,
+def build_crawl_config(
     max_depth: int = 5,
     word_count_threshold: int = 200,
-) -> List[Document]:
+    stream: bool = False,
+    max_page_requests: Optional[int] = None,
+) -> CrawlerRunConfig:
     """
-    Crawl a website and return a list of cleaned LangChain Document objects.
+    Returns the crawl4ai run configuration used for deep crawls.
 
-    :param website_url: The base URL to crawl
-    :param metadata: Optional static metadata to attach to each Document
     :param max_depth: Maximum depth for BFS crawling
     :param word_count_threshold: Minimum words to include a page
-    :return: List of langchain.schema.Document objects
+    :param stream: Make ``arun`` return an async generator of pages
+    :param max_page_requests: Limit on pages fetched at once by the crawl
+        (crawl4ai's ``semaphore_count``); crawl4ai's default when omitted
     """
-    metadata = metadata or {}
-    logger.info(f"Starting deep crawl of {website_url}")
+    extra = {}
+    if max_page_requests is not None:
+        extra["semaphore_count"] = max_page_requests
 
     md_generator = DefaultMarkdownGenerator(
         options={
@@ -47,7 +57,7 @@ async def crawl_website_for_documents(
         }
     )
 
-    config = CrawlerRunConfig(
+    return CrawlerRunConfig(
         markdown_generator=md_generator,
         deep_crawl_strategy=BFSDeepCrawlStrategy(
             max_depth=max_depth, include_external=False
@@ -60,39 +70,497 @@ async def crawl_website_for_documents(
         simulate_user=True,
         exclude_external_links=True,
         exclude_social_media_links=True,
+        stream=stream,
+        **extra,
     )
 
-    cleaned_docs = []
+
+def result_to_document(
+    result,
+    website_url: str,
+    metadata: Dict = None,
+    seen_hashes: set = None,
+    stats: Dict = None,
+    include_markdown: bool = True,
+    near_duplicates: NearDuplicateIndex = None,
+) -> Optional[Document]:
+    """
+    Turn one crawl result into a Document, or None if it is empty, its
+    content hash is already in ``seen_hashes`` (which is updated) or it is a
+    near-duplicate of a page in ``near_duplicates`` (which is updated).
+
+    :param result: crawl4ai CrawlResult
+    :param website_url: Site the result belongs to
+    :param metadata: Optional static metadata to attach to the Document
+    :param seen_hashes: Content hashes of the pages kept so far
+    :param stats: Optional dict whose "pages", "empty", "duplicates" and
+        "near_duplicates" counters are incremented
+    :param include_markdown: Also copy the text into ``metadata["markdown"]``
+    :param near_duplicates: Optional MinHash index of the pages kept so far,
+        possibly shared with other crawls and sites
+    """
+    stats = stats if stats is not None else {}
+    seen_hashes = seen_hashes if seen_hashes is not None else set()
+    text = result.markdown
+    url = result.url
+    stats["pages"] = stats.get("pages", 0) + 1
+
+    if not text:
+        logger.warning(f"Empty text skipped: {url}")
+        stats["empty"] = stats.get("empty", 0) + 1
+        return None
+
+    content_hash = hash_content(text.strip())
+    if content_hash in seen_hashes:
+        logger.info(f"Duplicate content skipped: {url}")
+        stats["duplicates"] = stats.get("duplicates", 0) + 1
+        return None
+    seen_hashes.add(content_hash)
+
+    if near_duplicates is not None:
+        original = near_duplicates.find_or_add(url, text)
+        if original is not None:
+            logger.info(f"Near-duplicate of {original} skipped: {url}")
+            stats["near_duplicates"] = stats.get("near_duplicates", 0) + 1
+            return None
+
+    doc_metadata = {
+        "source": url,
+        "depth": result.metadata.get("depth", 0),
+        "website": website_url,
+        "parsing_date": today_str,
+        "content_hash": content_hash,
+    }
+    if include_markdown:
+        doc_metadata["markdown"] = text
+    doc_metadata.update(metadata or {})
+    return Document(page_content=text, metadata=doc_metadata)
+
+
+def results_to_documents(
+    results,
+    website_url: str,
+    metadata: Dict = None,
+    stats: Dict = None,
+    include_markdown: bool = True,
+    near_duplicates: NearDuplicateIndex = None,
+) -> List[Document]:
+    """
+    Turn crawl results into Documents, skipping empty and duplicate pages.
+
+    :param results: crawl4ai CrawlResult objects
+    :param website_url: Site the results belong to
+    :param metadata: Optional static metadata to attach to each Document
+    :param stats: Optional dict whose "pages", "empty", "duplicates" and
+        "near_duplicates" counters are incremented
+    :param include_markdown: Also copy each text into ``metadata["markdown"]``
+    :param near_duplicates: Optional MinHash index used to drop near-duplicates
+    :return: List of langchain.schema.Document objects
+    """
     seen_hashes = set()
+    documents = (
+        result_to_document(
+            result,
+            website_url,
+            metadata,
+            seen_hashes,
+            stats,
+            include_markdown,
+            near_duplicates,
+        )
+        for result in results
+    )
+    return [doc for doc in documents if doc is not None]
 
-    async with AsyncWebCrawler() as crawler:
-        results = await crawler.arun(website_url, config=config)
-        logger.info(f"Crawled {len(results)} pages")
-
-        for result in results:
-            text = result.markdown
-            url = result.url
-
-            if not text:
-                logger.warning(f"Empty text skipped: {url}")
-                continue
-
-            content_hash = hash_content(text.strip())
-            if content_hash in seen_hashes:
-                logger.info(f"Duplicate content skipped: {url}")
-                continue
-            seen_hashes.add(content_hash)
-
-            doc_metadata = {
-                "source": url,
-                "markdown": text,
-                "depth": result.metadata.get("depth", 0),
-                "website": website_url,
-                "parsing_date": today_str,
-            }
-            doc_metadata.update(metadata)
 
-            cleaned_docs.append(Document(page_content=text, metadata=doc_metadata))
+async def crawl_website_for_documents(
+    website_url: str,
+    metadata: Dict = None,
+    max_depth: int = 5,
+    word_count_threshold: int = 200,
+    crawler: AsyncWebCrawler = None,
+    include_markdown: bool = True,
+    checkpoint_path: str = None,
+    revalidate: bool = True,
+    near_duplicates: NearDuplicateIndex = None,
+) -> List[Document]:
+    """
+    Crawl a website and return a list of cleaned LangChain Document objects.
+
+    With ``checkpoint_path``, the crawl state is saved after every batch of
+    pages: an interrupted crawl resumes from its frontier (pages crawled
+    before the interruption are read back from the checkpoint), and a later
+    crawl revalidates known pages with their ETag/Last-Modified instead of
+    fetching them again. See CrawlCheckpoint.
 
+    :param website_url: The base URL to crawl
+    :param metadata: Optional static metadata to attach to each Document
+    :param max_depth: Maximum depth for BFS crawling
+    :param word_count_threshold: Minimum words to include a page
+    :param crawler: Already started AsyncWebCrawler to reuse; a new browser
+        is launched (and closed) when omitted
+    :param include_markdown: Also copy each text into ``metadata["markdown"]``
+    :param checkpoint_path: Folder holding the crawl checkpoint
+    :param revalidate: Skip refetching pages the server reports unchanged
+        (only with ``checkpoint_path``)
+    :param near_duplicates: Optional NearDuplicateIndex; pages whose shingle
+        similarity to an indexed page reaches its threshold are dropped
+    :return: List of langchain.schema.Document objects
+    """
+    if checkpoint_path is not None:
+        return [
+            doc
+            async for doc in stream_website_documents(
+                website_url,
+                metadata,
+                max_depth,
+                word_count_threshold,
+                crawler,
+                include_markdown,
+                checkpoint_path,
+                revalidate,
+                near_duplicates,
+            )
+        ]
+
+    logger.info(f"Starting deep crawl of {website_url}")
+    config = build_crawl_config(max_depth, word_count_threshold)
+
+    if crawler is None:
+        async with AsyncWebCrawler() as crawler:
+            results = await crawler.arun(website_url, config=config)
+    else:
+        results = await crawler.arun(website_url, config=config)
+    logger.info(f"Crawled {len(results)} pages")
+
+    cleaned_docs = results_to_documents(
+        results,
+        website_url,
+        metadata,
+        include_markdown=include_markdown,
+        near_duplicates=near_duplicates,
+    )
     logger.info(f"Returning {len(cleaned_docs)} documents")
     return cleaned_docs
+
+
+async def stream_website_documents(
+    website_url: str,
+    metadata: Dict = None,
+    max_depth: int = 5,
+    word_count_threshold: int = 200,
+    crawler: AsyncWebCrawler = None,
+    include_markdown: bool = False,
+    checkpoint_path: str = None,
+    revalidate: bool = True,
+    near_duplicates: NearDuplicateIndex = None,
+) -> AsyncIterator[Document]:
+    """
+    Crawl a website and yield deduplicated Documents as pages arrive.
+
+    Unlike crawl_website_for_documents, pages are not collected first, so
+    chunking and embedding can start while the crawl is running and memory
+    only grows with the set of content hashes. Pass the generator through
+    ``components.utils.aio.iterate_in_thread`` to feed the synchronous
+    ``index_documents_streaming`` pipeline.
+
+    :param website_url: The base URL to crawl
+    :param metadata: Optional static metadata to attach to each Document
+    :param max_depth: Maximum depth for BFS crawling
+    :param word_count_threshold: Minimum words to include a page
+    :param crawler: Already started AsyncWebCrawler to reuse; a new browser
+        is launched (and closed) when omitted
+    :param include_markdown: Also copy each text into ``metadata["markdown"]``
+        (off by default, as it doubles the size of every Document)
+    :param checkpoint_path: Folder holding the crawl checkpoint, as in
+        crawl_website_for_documents; pages are then yielded per batch
+    :param revalidate: Skip refetching pages the server reports unchanged
+        (only with ``checkpoint_path``)
+    :param near_duplicates: Optional NearDuplicateIndex used to drop
+        near-duplicate pages
+    """
+    logger.info(f"Starting streaming deep crawl of {website_url}")
+    config = build_crawl_config(
+        max_depth, word_count_threshold, stream=checkpoint_path is None
+    )
+    seen_hashes = set()
+    stats = {}
+
+    async with AsyncExitStack() as stack:
+        if crawler is None:
+            crawler = await stack.enter_async_context(AsyncWebCrawler())
+        if checkpoint_path is None:
+            results = await crawler.arun(website_url, config=config)
+        else:
+            checkpoint = CrawlCheckpoint(checkpoint_path, website_url)
+            results = checkpointed_crawl(
+                crawler, config, checkpoint, max_depth, revalidate
+            )
+        async for result in results:
+            document = result_to_document(
+                result,
+                website_url,
+                metadata,
+                seen_hashes,
+                stats,
+                include_markdown,
+                near_duplicates,
+            )
+            if document is not None:
+                yield document
+
+    logger.info(
+        f"Streamed {len(seen_hashes)} documents from {stats.get('pages', 0)} pages"
+    )
+
+
+def _internal_links(result, website_url: str) -> List[str]:
+    netloc = urlparse(website_url).netloc
+    links = []
+    for link in (result.links or {}).get("internal", []):
+        href = link.get("href")
+        if not href:
+            continue
+        url = normalize_url_for_deep_crawl(href, result.url)
+        parsed = urlparse(url)
+        if parsed.scheme in ("http", "https") and parsed.netloc == netloc:
+            links.append(url)
+    return list(dict.fromkeys(links))
+
+
+async def checkpointed_crawl(
+    crawler: AsyncWebCrawler,
+    config: CrawlerRunConfig,
+    checkpoint: CrawlCheckpoint,
+    max_depth: int = 5,
+    revalidate: bool = True,
+    batch_size: int = DEFAULT_CHECKPOINT_BATCH_SIZE,
+) -> AsyncIterator:
+    """
+    Breadth-first crawl driven by a CrawlCheckpoint, yielding one result per
+    page of the site.
+
+    The frontier is processed in batches of same-depth URLs fetched with
+    ``arun_many``; the checkpoint is saved after every batch, so at most one
+    batch is refetched after a crash. On resume, pages the interrupted crawl
+    already processed are yielded from the checkpoint first. Pages known
+    from a previous crawl are revalidated with a conditional GET and, if
+    unchanged, yielded from the checkpoint and expanded with their stored
+    links without being rendered again.
+
+    :param crawler: Started AsyncWebCrawler
+    :param config: Run configuration; its deep crawl strategy is ignored
+    :param checkpoint: State of the crawl
+    :param max_depth: Maximum link depth from the start URL
+    :param revalidate: Revalidate pages known from a previous crawl
+    :param batch_size: Number of URLs fetched per ``arun_many`` call
+    :return: Async iterator of CrawlResult-like objects with ``url``,
+        ``markdown`` and ``metadata["depth"]``
+    """
+    website_url = checkpoint.website_url
+    page_config = config.clone(deep_crawl_strategy=None, stream=False)
+
+    def stored_result(url):
+        record = checkpoint.pages[url]
+        return SimpleNamespace(
+            url=url,
+            markdown=checkpoint.load_text(url),
+            metadata={"depth": record["depth"]},
+        )
+
+    if checkpoint.start():
+        for url in checkpoint.current_pages():
+            yield stored_result(url)
+
+    with requests.Session() as session:
+        while True:
+            batch = checkpoint.next_batch(batch_size)
+            if not batch:
+                break
+            depth = batch[0][1]
+            to_fetch = []
+            for url, _ in batch:
+                record = checkpoint.pages.get(url)
+                if (
+                    revalidate
+                    and record is not None
+                    and record["crawl_id"] != checkpoint.crawl_id
+                    and await asyncio.to_thread(is_unchanged, url, record, session)
+                ):
+                    logger.info(f"Unchanged since last crawl: {url}")
+                    checkpoint.touch_page(url, depth)
+                    if depth < max_depth:
+                        checkpoint.enqueue(record["links"], depth + 1)
+                    yield stored_result(url)
+                else:
+                    to_fetch.append(url)
+
+            if to_fetch:
+                for result in await crawler.arun_many(to_fetch, config=page_config):
+                    result.metadata = dict(result.metadata or {}, depth=depth)
+                    if not result.success:
+                        logger.warning(f"Crawl of {result.url} failed")
+                        continue
+                    links = _internal_links(result, website_url)
+                    headers = {
+                        key.lower(): value
+                        for key, value in (result.response_headers or {}).items()
+                    }
+                    text = result.markdown or ""
+                    checkpoint.store_page(
+                        result.url,
+                        depth,
+                        text,
+                        hash_content(text.strip()),
+                        links,
+                        etag=headers.get("etag"),
+                        last_modified=headers.get("last-modified"),
+                    )
+                    if depth < max_depth:
+                        checkpoint.enqueue(links, depth + 1)
+                    yield result
+            checkpoint.complete(len(batch))
+
+    checkpoint.finish()
+
+
+class BrowserPool:
+    """
+    A fixed set of started AsyncWebCrawler browsers shared by many crawls.
+
+    Each crawl takes the next browser in turn; crawl4ai opens a separate page
+    per ``arun`` call, so one browser can serve several crawls at once.
+    """
+
+    def __init__(self, size: int = 2, **crawler_kwargs):
+        """
+        :param size: Number of browsers to launch
+        :param crawler_kwargs: Options passed to each AsyncWebCrawler
+        """
+        self.size = size
+        self.crawler_kwargs = crawler_kwargs
+        self._crawlers = []
+        self._next = 0
+
+    async def __aenter__(self):
+        try:
+            for _ in range(self.size):
+                crawler = AsyncWebCrawler(**self.crawler_kwargs)
+                self._crawlers.append(await crawler.__aenter__())
+        except BaseException:
+            await self.__aexit__(None, None, None)
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        crawlers, self._crawlers = self._crawlers, []
+        for crawler in crawlers:
+            await crawler.__aexit__(exc_type, exc, tb)
+
+    def crawler(self) -> AsyncWebCrawler:
+        crawler = self._crawlers[self._next % len(self._crawlers)]
+        self._next += 1
+        return crawler
+
+
+def _normalize_site(site: Union[str, Dict]) -> Dict:
+    if isinstance(site, str):
+        site = {"url": site}
+    if "url" not in site:
+        raise ValueError(f"Site definition needs a 'url': {site}")
+    return site
+
+
+async def crawl_websites_for_documents(
+    sites: List[Union[str, Dict]],
+    max_concurrency: int = 8,
+    per_domain_concurrency: int = 1,
+    pool_size: int = 2,
+    max_depth: int = 5,
+    word_count_threshold: int = 200,
+    near_duplicates: NearDuplicateIndex = None,
+) -> AsyncIterator[Dict]:
+    """
+    Crawl many websites concurrently on a shared browser pool, yielding each
+    site's documents and stats as soon as its crawl finishes.
+
+    At most ``max_concurrency`` sites are crawled at once overall. Sites on
+    the same domain are crawled one after the other, and each crawl fetches
+    at most ``per_domain_concurrency`` pages at once, so a host never sees
+    more than that many simultaneous page requests from this call, however
+    many of its entry points are listed. A failing site is reported in its
+    result and does not stop the others.
+
+    :param sites: URLs, or dicts with "url" and optional "metadata",
+        "max_depth" and "word_count_threshold"
+    :param max_concurrency: Global limit on simultaneous site crawls
+    :param per_domain_concurrency: Limit on simultaneous page requests per
+        domain
+    :param pool_size: Number of browsers shared by all crawls
+    :param max_depth: Default BFS depth for sites that do not set one
+    :param word_count_threshold: Default minimum words per page
+    :param near_duplicates: Optional NearDuplicateIndex shared by all sites,
+        so mirrored pages are only kept once
+    :return: Async iterator of dicts with "website", "documents", "stats"
+        and "error", in completion order
+    """
+    sites = [_normalize_site(site) for site in sites]
+    if not sites:
+        return
+
+    global_limit = asyncio.Semaphore(max_concurrency)
+    # One crawl per domain at a time; its page requests are then capped by
+    # max_page_requests, which crawl4ai's dispatcher enforces.
+    domain_locks = defaultdict(asyncio.Lock)
+
+    async with BrowserPool(size=min(pool_size, len(sites))) as pool:
+
+        async def crawl(site):
+            website_url = site["url"]
+            stats = {
+                "pages": 0,
+                "empty": 0,
+                "duplicates": 0,
+                "near_duplicates": 0,
+                "documents": 0,
+            }
+            documents, error = [], None
+            async with domain_locks[urlparse(website_url).netloc], global_limit:
+                started = time.perf_counter()
+                try:
+                    config = build_crawl_config(
+                        site.get("max_depth", max_depth),
+                        site.get("word_count_threshold", word_count_threshold),
+                        max_page_requests=per_domain_concurrency,
+                    )
+                    results = await pool.crawler().arun(website_url, config=config)
+                    documents = results_to_documents(
+                        results,
+                        website_url,
+                        site.get("metadata"),
+                        stats,
+                        near_duplicates=near_duplicates,
+                    )
+                except Exception as e:
+                    logger.error(f"Crawl of {website_url} failed: {e}")
+                    error = str(e)
+                stats["documents"] = len(documents)
+                stats["seconds"] = round(time.perf_counter() - started, 3)
+            logger.info(
+                f"Crawled {website_url}: {stats['pages']} pages, "
+                f"{stats['documents']} documents in {stats['seconds']}s"
+            )
+            return {
+                "website": website_url,
+                "documents": documents,
+                "stats": stats,
+                "error": error,
+            }
+
+        tasks = [asyncio.create_task(crawl(site)) for site in sites]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
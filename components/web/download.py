@@ -1,12 +1,26 @@
+import hashlib
 import os
-from typing import Any, Dict, List, Optional
-from urllib.parse import urljoin
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urldefrag, urljoin, urlparse
 
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 
 from components.utils.logger import get_logger
 
+try:
+    from lxml import etree as lxml_etree
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_etree = lxml_html = None
+
 logger = get_logger(__name__)
 
 DEFAULT_EXTENSIONS = [
@@ -21,12 +35,267 @@ DEFAULT_EXTENSIONS = [
     ".odt",
 ]
 
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# Statuses worth retrying: rate limiting and temporary server failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TransientHTTPError(requests.HTTPError):
+    """
+    A response with a retryable status (see RETRY_STATUSES).
+    """
+
+
+TRANSIENT_ERRORS = (
+    TransientHTTPError,
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+def _parse_links(html_text: str):
+    """
+    Returns the page's <base href> (or None) and the href of every <a>,
+    parsed with lxml when installed and BeautifulSoup's html.parser otherwise.
+    """
+    if lxml_html is None:
+        soup = BeautifulSoup(html_text, "html.parser")
+        base = soup.find("base", href=True)
+        hrefs = [link["href"] for link in soup.find_all("a", href=True)]
+        return (base["href"] if base else None), hrefs
+
+    try:
+        try:
+            root = lxml_html.document_fromstring(html_text)
+        except ValueError:
+            # lxml refuses str input that declares its own encoding
+            root = lxml_html.document_fromstring(html_text.encode("utf-8"))
+    except lxml_etree.ParserError:
+        # Empty documents, e.g. a page that is only an XML declaration
+        return None, []
+    base = root.find(".//base[@href]")
+    hrefs = [link.get("href") for link in root.iter("a") if link.get("href")]
+    return (base.get("href") if base is not None else None), hrefs
+
+
+def find_document_links(
+    html_text: str, base_url: str, extensions: Optional[Iterable[str]] = None
+) -> List[str]:
+    """
+    Returns the absolute URLs of the document links in an HTML page.
+
+    A link matches when its URL path ends with one of ``extensions``
+    (case-insensitively), so multi-part extensions such as ".tar.gz" work.
+    Unlike a plain suffix check on the href, any query string or fragment
+    is ignored: ``report.pdf?download=1`` matches ".pdf".
+
+    Args:
+        html_text (str): Raw HTML content.
+        base_url (str): Base URL for resolving relative links (a <base href>
+            in the page takes precedence).
+        extensions (Iterable[str], optional): Allowed file extensions.
+
+    Returns:
+        List[str]: Unique URLs, without fragments, in page order.
+    """
+    extensions = tuple(ext.lower() for ext in extensions or DEFAULT_EXTENSIONS)
+    base, hrefs = _parse_links(html_text)
+    if base:
+        base_url = urljoin(base_url, base.strip())
+    urls = []
+    for href in hrefs:
+        # Check the extension on the raw href; only matches are resolved
+        path = href.partition("#")[0].partition("?")[0].strip()
+        if path.lower().endswith(extensions):
+            urls.append(urldefrag(urljoin(base_url, href.strip()))[0])
+    return list(dict.fromkeys(urls))
+
+
+def _find_page_links(page: Tuple[str, str, Iterable[str]]) -> List[str]:
+    return find_document_links(*page)
+
+
+def extract_document_links(
+    pages: Iterable[Tuple[str, str]],
+    extensions: Optional[Iterable[str]] = None,
+    max_workers: Optional[int] = None,
+    chunksize: int = 16,
+) -> List[str]:
+    """
+    Extracts the document links of many pages on a process pool and dedupes
+    them across pages, so each file is downloaded once (see download_urls).
+
+    Pages are sent to the workers in windows of ``chunksize`` pages per
+    worker, so a large crawl is never held in the pool's queue at once.
+
+    Args:
+        pages (Iterable[Tuple[str, str]]): (html_text, base_url) pairs, e.g.
+            the ``html`` and ``url`` of crawl4ai results.
+        extensions (Iterable[str], optional): Allowed file extensions.
+        max_workers (int, optional): Worker processes (default: CPU count);
+            0 parses in this process.
+        chunksize (int): Pages handed to a worker at a time.
+
+    Returns:
+        List[str]: Unique document URLs in page order.
+    """
+    extensions = tuple(extensions or DEFAULT_EXTENSIONS)
+    tasks = ((html_text, base_url, extensions) for html_text, base_url in pages)
+    urls = {}
+    if max_workers == 0:
+        for page_urls in map(_find_page_links, tasks):
+            urls.update(dict.fromkeys(page_urls))
+        return list(urls)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    window = max_workers * chunksize * 2
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            batch = list(islice(tasks, window))
+            if not batch:
+                break
+            for page_urls in executor.map(_find_page_links, batch, chunksize=chunksize):
+                urls.update(dict.fromkeys(page_urls))
+    return list(urls)
+
+
+def create_session(pool_size: int = 10) -> requests.Session:
+    """
+    Returns a requests session keeping up to ``pool_size`` connections per
+    host alive, so consecutive downloads reuse them.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After", "")
+    return float(value) if value.isdigit() else None
+
+
+def check_response(response: requests.Response):
+    """
+    Raises TransientHTTPError for a RETRY_STATUSES response and
+    requests.HTTPError for any other error status.
+    """
+    if response.status_code in RETRY_STATUSES:
+        raise TransientHTTPError(
+            f"{response.status_code} Server Error for url: {response.url}",
+            response=response,
+        )
+    response.raise_for_status()
+
+
+def with_retries(
+    attempt: Callable[[int], Any],
+    url: str,
+    max_retries: int = 2,
+    retry_delay: float = 0.5,
+):
+    """
+    Calls ``attempt(number)`` until it returns, retrying TRANSIENT_ERRORS
+    with exponential backoff (or the server's Retry-After).
+
+    Args:
+        attempt (Callable[[int], Any]): One try, given its 0-based number.
+        url (str): URL being fetched, for logging.
+        max_retries (int): Retries after the first attempt.
+        retry_delay (float): Initial backoff between retries, in seconds.
+
+    Returns:
+        Whatever ``attempt`` returns.
+    """
+    for number in range(max_retries + 1):
+        try:
+            return attempt(number)
+        except TRANSIENT_ERRORS as e:
+            if number == max_retries:
+                raise
+            delay = retry_delay * (2**number)
+            if isinstance(e, TransientHTTPError) and e.response is not None:
+                delay = _retry_after(e.response) or delay
+            logger.warning(
+                f"Download of {url} failed ({e}); retry {number + 1}/{max_retries}"
+            )
+            time.sleep(delay)
+
+
+def download_file(
+    url: str,
+    file_path: str,
+    session: Optional[requests.Session] = None,
+    timeout: float = 10,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_retries: int = 2,
+    retry_delay: float = 0.5,
+) -> Dict[str, Any]:
+    """
+    Streams a URL to a file in chunks, retrying transient failures.
+
+    The body is written to a temporary file next to ``file_path`` and moved
+    into place once complete, so an interrupted download never leaves a
+    truncated file behind. Connection errors, timeouts, broken chunked
+    responses and RETRY_STATUSES are retried with exponential backoff (or
+    the server's Retry-After); other HTTP errors fail immediately.
+
+    Args:
+        url (str): URL to download.
+        file_path (str): Destination path.
+        session (requests.Session, optional): Session to reuse connections.
+        timeout (float): Connect and read timeout in seconds.
+        chunk_size (int): Bytes read and written at a time.
+        max_retries (int): Retries after the first attempt.
+        retry_delay (float): Initial backoff between retries, in seconds.
+
+    Returns:
+        Dict: {"bytes": int, "seconds": float, "retries": int}
+
+    Raises:
+        requests.RequestException: If the download still fails after all
+        retries.
+    """
+    session = session or requests
+    started = time.perf_counter()
+
+    def attempt(number):
+        with session.get(url, stream=True, timeout=timeout) as response:
+            check_response(response)
+            size = _write_stream(response, file_path, chunk_size)
+        return {
+            "bytes": size,
+            "seconds": round(time.perf_counter() - started, 3),
+            "retries": number,
+        }
+
+    return with_retries(attempt, url, max_retries, retry_delay)
+
+
+def _write_stream(response: requests.Response, file_path: str, chunk_size: int):
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in response.iter_content(chunk_size):
+                f.write(chunk)
+                size += len(chunk)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return size
+
 
 def download_documents(
     html_text: str,
     base_url: str,
     download_folder: str,
     extensions: Optional[List[str]] = None,
+    **kwargs,
 ) -> Dict[str, Any]:
     """
     Parses HTML content, finds document links, downloads them to a folder, and logs results.
@@ -36,44 +305,177 @@ def download_documents(
         base_url (str): Base URL for resolving relative links.
         download_folder (str): Folder to store downloaded documents.
         extensions (List[str], optional): List of allowed file extensions.
+        **kwargs: Download options of download_urls (max_workers,
+            per_host_limit, session, timeout, chunk_size, max_retries,
+            retry_delay, store).
 
     Returns:
         Dict: {
             "downloaded": List[str],   # paths of successfully downloaded files
-            "failed": List[Dict[str, str]]  # failed attempts with error messages
+            "failed": List[Dict[str, str]],  # failed attempts with error messages
+            "stats": Dict[str, float]  # files, bytes, retries and timings
         }
     """
-    extensions = extensions or DEFAULT_EXTENSIONS
+    urls = find_document_links(html_text, base_url, extensions)
+    return download_urls(urls, download_folder, **kwargs)
+
+
+def _local_filenames(urls: List[str]) -> Dict[str, str]:
+    """
+    Maps URLs to file names that are unique within the batch.
+
+    A URL keeps its basename unless another URL has the same one (e.g.
+    ``/shared/terms.pdf`` on two hosts); each of those gets a short hash of
+    its URL appended to the stem, so names do not depend on the URL order.
+
+    Args:
+        urls (List[str]): Distinct URLs to download.
+
+    Returns:
+        Dict[str, str]: File name per URL.
+    """
+    basenames = {url: os.path.basename(urlparse(url).path) for url in urls}
+    counts = Counter(basenames.values())
+    filenames = {}
+    for url, basename in basenames.items():
+        if counts[basename] > 1:
+            stem, extension = os.path.splitext(basename)
+            digest = hashlib.sha256(url.encode("utf-8")).hexdigest()[:12]
+            basename = f"{stem}-{digest}{extension}"
+        filenames[url] = basename
+    return filenames
+
+
+def download_urls(
+    urls: List[str],
+    download_folder: str,
+    max_workers: int = 1,
+    per_host_limit: int = 4,
+    session: Optional[requests.Session] = None,
+    timeout: float = 10,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_retries: int = 2,
+    retry_delay: float = 0.5,
+    store=None,
+) -> Dict[str, Any]:
+    """
+    Downloads URLs to a folder, e.g. the links found by extract_document_links.
+
+    Files are streamed to disk in chunks over a pooled session (see
+    download_file), one at a time unless ``max_workers`` is raised. Concurrent
+    downloads are opt-in so servers are not hit harder than before: at most
+    ``max_workers`` downloads then run at once, and at most ``per_host_limit``
+    against any one host. Files are
+    named after the URL basename; URLs in the batch sharing a basename get a
+    hash of the URL appended so none overwrites another. Use ``store`` to keep
+    names stable across runs.
+
+    Args:
+        urls (List[str]): URLs to download.
+        download_folder (str): Folder to store downloaded documents.
+        max_workers (int): Global limit on simultaneous downloads (default 1:
+            sequential).
+        per_host_limit (int): Limit on simultaneous downloads per host.
+        session (requests.Session, optional): Session to use; a pooled one
+            is created (and closed) when omitted.
+        timeout (float): Connect and read timeout in seconds.
+        chunk_size (int): Bytes read and written at a time.
+        max_retries (int): Retries per file on transient errors.
+        retry_delay (float): Initial backoff between retries, in seconds.
+        store (DownloadStore, optional): Content-addressed store to download
+            into instead of ``download_folder``; unchanged files are then
+            revalidated rather than downloaded again, interrupted ones are
+            resumed and identical files are stored once.
+
+    Returns:
+        Dict: same shape as download_documents.
+    """
     os.makedirs(download_folder, exist_ok=True)
+    urls = list(dict.fromkeys(urls))
+    filenames = _local_filenames(urls)
+    started = time.perf_counter()
+
+    own_session = session is None
+    if own_session:
+        session = create_session(pool_size=max(max_workers, 1))
+
+    host_limits = {}
+    host_limits_lock = threading.Lock()
+
+    def host_limit(url):
+        host = urlparse(url).netloc
+        with host_limits_lock:
+            if host not in host_limits:
+                host_limits[host] = threading.BoundedSemaphore(per_host_limit)
+            return host_limits[host]
+
+    def download(url):
+        file_path = os.path.join(download_folder, filenames[url])
+        logger.info(f"Attempting to download: {url}")
+        try:
+            with host_limit(url):
+                if store is not None:
+                    result = store.fetch(
+                        url,
+                        session=session,
+                        timeout=timeout,
+                        chunk_size=chunk_size,
+                        max_retries=max_retries,
+                        retry_delay=retry_delay,
+                    )
+                    file_path = result["path"]
+                else:
+                    result = download_file(
+                        url,
+                        file_path,
+                        session=session,
+                        timeout=timeout,
+                        chunk_size=chunk_size,
+                        max_retries=max_retries,
+                        retry_delay=retry_delay,
+                    )
+            logger.info(f"Downloaded: {file_path}")
+            return {"url": url, "path": file_path, **result}
+        except requests.RequestException as e:
+            logger.error(f"Download error for {url}: {str(e)}")
+            return {"url": url, "error": str(e)}
+        except Exception as e:
+            logger.error(f"Unexpected error saving {file_path}: {str(e)}")
+            return {"url": url, "error": str(e)}
+
+    try:
+        if max_workers > 1 and len(urls) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(download, urls))
+        else:
+            results = [download(url) for url in urls]
+    finally:
+        if own_session:
+            session.close()
 
-    soup = BeautifulSoup(html_text, "html.parser")
-    links = soup.find_all("a", href=True)
-
-    downloaded = []
-    failed = []
-
-    for link in links:
-        href = link["href"]
-        if any(href.lower().endswith(ext) for ext in extensions):
-            full_url = urljoin(base_url, href)
-            filename = os.path.basename(href.split("?")[0])
-            file_path = os.path.join(download_folder, filename)
-
-            logger.info(f"Attempting to download: {full_url}")
-            try:
-                response = requests.get(full_url, timeout=10)
-                response.raise_for_status()
-                with open(file_path, "wb") as f:
-                    f.write(response.content)
-                logger.info(f"Downloaded: {file_path}")
-                downloaded.append(file_path)
-            except requests.RequestException as e:
-                error_msg = f"Download error for {full_url}: {str(e)}"
-                logger.error(error_msg)
-                failed.append({"url": full_url, "error": str(e)})
-            except Exception as e:
-                error_msg = f"Unexpected error saving {file_path}: {str(e)}"
-                logger.error(error_msg)
-                failed.append({"url": full_url, "error": str(e)})
-
-    return {"downloaded": downloaded, "failed": failed}
+    downloaded = [result["path"] for result in results if "error" not in result]
+    failed = [
+        {"url": result["url"], "error": result["error"]}
+        for result in results
+        if "error" in result
+    ]
+    succeeded = [result for result in results if "error" not in result]
+    seconds = time.perf_counter() - started
+    total_bytes = sum(result["bytes"] for result in succeeded)
+    stats = {
+        "files": len(succeeded),
+        "failed": len(failed),
+        "bytes": total_bytes,
+        "retries": sum(result["retries"] for result in succeeded),
+        "unchanged": sum(r.get("status") == "unchanged" for r in succeeded),
+        "resumed": sum(r.get("status") == "resumed" for r in succeeded),
+        "deduplicated": sum(bool(r.get("deduplicated")) for r in succeeded),
+        "seconds": round(seconds, 3),
+        "bytes_per_second": round(total_bytes / seconds) if seconds else 0,
+        "slowest_seconds": max((r["seconds"] for r in succeeded), default=0.0),
+    }
+    logger.info(
+        f"Downloaded {stats['files']} files ({total_bytes} bytes) in "
+        f"{stats['seconds']}s, {stats['failed']} failed"
+    )
+    return {"downloaded": downloaded, "failed": failed, "stats": stats}
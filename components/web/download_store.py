@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from components.utils.logger import get_logger
+from components.web.download import DEFAULT_CHUNK_SIZE, check_response, with_retries
+
+logger = get_logger(__name__)
+
+INDEX_FILENAME = "index.json"
+OBJECTS_DIRNAME = "objects"
+PARTIAL_DIRNAME = "partial"
+
+
+def _file_sha256(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest
+
+
+class DownloadStore:
+    """
+    Content-addressed folder of downloaded files with a local URL index.
+
+    Every file is stored once under ``objects/<sha256[:2]>/<sha256><ext>``,
+    however many URLs serve it, so two different ``report.pdf`` links never
+    overwrite each other. ``index.json`` maps each URL to the ETag,
+    Last-Modified, size and sha256 of what it served last, which lets a rerun
+    revalidate it with a conditional request instead of downloading it again.
+
+    Bodies are streamed to ``partial/<sha256(url)>.part``. If a transfer
+    breaks, the part file is kept along with the validators of its response,
+    and the next attempt (or run) resumes it with an HTTP Range request,
+    guarded by If-Range so a changed file is fetched from the start. Only the
+    chunk being read when the connection dropped is fetched again. If the
+    server rejects the Range request (e.g. 416 for a part file that is
+    already complete), the part file is discarded and the download restarts.
+
+    The store is thread-safe; download_documents uses it via ``store=``.
+    """
+
+    def __init__(self, folder: str):
+        """
+        Args:
+            folder (str): Root folder of the store (created if missing).
+        """
+        self.folder = folder
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(folder, OBJECTS_DIRNAME), exist_ok=True)
+        os.makedirs(os.path.join(folder, PARTIAL_DIRNAME), exist_ok=True)
+        index_path = os.path.join(folder, INDEX_FILENAME)
+        if os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(url)
+
+    def object_path(self, sha256: str, extension: str = "") -> str:
+        return os.path.join(
+            self.folder, OBJECTS_DIRNAME, sha256[:2], f"{sha256}{extension}"
+        )
+
+    def path(self, url: str) -> Optional[str]:
+        """
+        Returns the local path of the file last downloaded from a URL.
+        """
+        entry = self.entries.get(url)
+        if entry is None:
+            return None
+        return self.object_path(entry["sha256"], entry["extension"])
+
+    def _partial_paths(self, url: str):
+        name = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.folder, PARTIAL_DIRNAME, name)
+        return f"{base}.part", f"{base}.json"
+
+    def fetch(
+        self,
+        url: str,
+        session: Optional[requests.Session] = None,
+        timeout: float = 10,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_retries: int = 2,
+        retry_delay: float = 0.5,
+    ) -> Dict[str, Any]:
+        """
+        Makes the current version of a URL available in the store.
+
+        Args:
+            url (str): URL to download.
+            session (requests.Session, optional): Session to reuse connections.
+            timeout (float): Connect and read timeout in seconds.
+            chunk_size (int): Bytes read and written at a time.
+            max_retries (int): Retries on transient errors; each retry resumes
+                the partial file.
+            retry_delay (float): Initial backoff between retries, in seconds.
+
+        Returns:
+            Dict: "path", "sha256", "size", "bytes" (transferred this time),
+            "status" ("downloaded", "unchanged" or "resumed"), "deduplicated"
+            (an identical file was already stored), "seconds" and "retries".
+        """
+        session = session or requests
+        started = time.perf_counter()
+        extension = os.path.splitext(urlparse(url).path)[1].lower()
+        part_path, meta_path = self._partial_paths(url)
+        transferred = 0
+        resumed = False
+
+        def attempt(number):
+            nonlocal transferred, resumed
+            headers = {}
+            offset = 0
+            part_meta = None
+            if os.path.exists(part_path) and os.path.exists(meta_path):
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    part_meta = json.load(f)
+                validator = part_meta.get("etag") or part_meta.get("last_modified")
+                offset = os.path.getsize(part_path) if validator else 0
+                if offset:
+                    headers["Range"] = f"bytes={offset}-"
+                    headers["If-Range"] = validator
+
+            entry = self.entries.get(url)
+            if not offset and entry and os.path.exists(self.path(url)):
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+
+            with session.get(
+                url, headers=headers, stream=True, timeout=timeout
+            ) as response:
+                if response.status_code == 304 and not offset:
+                    return self._result(url, "unchanged", False, 0, started, number)
+                if offset and response.status_code >= 400:
+                    # E.g. 416 when the part file already holds the whole body
+                    # (a crash before _commit): start over from byte 0
+                    logger.warning(
+                        f"Resuming {url} failed ({response.status_code}); "
+                        "restarting the download"
+                    )
+                    os.remove(part_path)
+                    os.remove(meta_path)
+                    return attempt(number)
+                check_response(response)
+
+                if response.status_code == 206 and offset:
+                    if not response.headers.get("Content-Range", "").startswith(
+                        f"bytes {offset}-"
+                    ):
+                        os.remove(part_path)
+                        raise requests.HTTPError(
+                            f"Unexpected Content-Range for {url}", response=response
+                        )
+                    resumed = True
+                    digest = _file_sha256(part_path, chunk_size)
+                    meta = part_meta
+                else:
+                    offset = 0
+                    digest = hashlib.sha256()
+                    meta = {
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                    }
+                    with open(meta_path, "w", encoding="utf-8") as f:
+                        json.dump(meta, f)
+
+                with open(part_path, "ab" if offset else "wb") as f:
+                    for chunk in response.iter_content(chunk_size):
+                        f.write(chunk)
+                        digest.update(chunk)
+                        transferred += len(chunk)
+
+            deduplicated = self._commit(url, extension, part_path, digest, meta)
+            os.remove(meta_path)
+            status = "resumed" if resumed else "downloaded"
+            return self._result(url, status, deduplicated, transferred, started, number)
+
+        return with_retries(attempt, url, max_retries, retry_delay)
+
+    def _commit(self, url, extension, part_path, digest, meta) -> bool:
+        sha256 = digest.hexdigest()
+        object_path = self.object_path(sha256, extension)
+        with self._lock:
+            deduplicated = os.path.exists(object_path)
+            if deduplicated:
+                os.remove(part_path)
+            else:
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                os.replace(part_path, object_path)
+
+            previous = self.entries.get(url)
+            self.entries[url] = {
+                "sha256": sha256,
+                "extension": extension,
+                "size": os.path.getsize(object_path),
+                "etag": meta.get("etag"),
+                "last_modified": meta.get("last_modified"),
+                "downloaded_at": time.time(),
+            }
+            if previous and previous["sha256"] != sha256:
+                self._remove_unreferenced(previous["sha256"], previous["extension"])
+            self._save()
+        return deduplicated
+
+    def _remove_unreferenced(self, sha256: str, extension: str):
+        if any(entry["sha256"] == sha256 for entry in self.entries.values()):
+            return
+        path = self.object_path(sha256, extension)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _result(self, url, status, deduplicated, transferred, started, retries):
+        entry = self.entries[url]
+        return {
+            "path": self.path(url),
+            "sha256": entry["sha256"],
+            "size": entry["size"],
+            "bytes": transferred,
+            "status": status,
+            "deduplicated": deduplicated,
+            "seconds": round(time.perf_counter() - started, 3),
+            "retries": retries,
+        }
+
+    def _save(self):
+        index_path = os.path.join(self.folder, INDEX_FILENAME)
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, index_path)
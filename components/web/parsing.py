@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from langchain_core.documents import Document
+
+from components.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Bump when parser output changes, so cached results are not reused
+PARSER_VERSION = 1
+
+# Extension -> parser yielding (text, metadata) units, e.g. one per PDF page
+PARSER_REGISTRY: Dict[str, Callable[[str], Iterator[Tuple[str, Dict]]]] = {}
+
+
+def register_parser(*extensions: str):
+    """
+    Decorator to register a parser for file extensions (e.g. ".pdf").
+
+    Parsers are looked up in the calling process and passed to worker
+    processes by reference, so they must be module-level functions of an
+    importable module.
+    """
+
+    def wrapper(func):
+        for extension in extensions:
+            PARSER_REGISTRY[extension.lower()] = func
+        return func
+
+    return wrapper
+
+
+@register_parser(".txt", ".md")
+def parse_text(path: str) -> Iterator[Tuple[str, Dict]]:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        yield f.read(), {}
+
+
+@register_parser(".pdf")
+def parse_pdf(path: str) -> Iterator[Tuple[str, Dict]]:
+    """
+    Yields the text of a PDF one page at a time, with its 1-based "page".
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    for number, page in enumerate(reader.pages, start=1):
+        yield page.extract_text() or "", {"page": number}
+
+
+@register_parser(".doc", ".docx", ".xls", ".xlsx", ".odt", ".rtf")
+def parse_unstructured(path: str) -> Iterator[Tuple[str, Dict]]:
+    from unstructured.partition.auto import partition
+
+    elements = partition(filename=path)
+    yield "\n\n".join(str(element) for element in elements), {}
+
+
+def get_parser(path: str) -> Callable[[str], Iterator[Tuple[str, Dict]]]:
+    """
+    Returns the parser registered for the file's extension.
+
+    :raises ValueError: If no parser is registered for it
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in PARSER_REGISTRY:
+        raise ValueError(f"No parser registered for {extension!r} files")
+    return PARSER_REGISTRY[extension]
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_path(cache_dir: str, sha256: str) -> str:
+    return os.path.join(cache_dir, sha256[:2], f"{sha256}.v{PARSER_VERSION}.jsonl")
+
+
+def parse_file(
+    path: str,
+    cache_dir: str,
+    parser: Optional[Callable[[str], Iterator[Tuple[str, Dict]]]] = None,
+) -> Dict:
+    """
+    Parse one file into a JSON-lines file of (text, metadata) units under
+    ``cache_dir``, keyed by the file's sha256.
+
+    Units are written as the parser yields them, so a large PDF is never held
+    in memory as a whole. If the cache already holds the file's hash, nothing
+    is parsed.
+
+    :param path: File to parse
+    :param cache_dir: Folder holding parsed output
+    :param parser: Parser to use (default: the one registered for the
+        file's extension in this process)
+    :return: Dict with "path", "sha256", "output", "cached" and "seconds"
+    """
+    started = time.perf_counter()
+    parser = parser or get_parser(path)
+
+    sha256 = file_sha256(path)
+    output = _cache_path(cache_dir, sha256)
+    result = {"path": path, "sha256": sha256, "output": output, "cached": True}
+    if not os.path.exists(output):
+        result["cached"] = False
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for text, metadata in parser(path):
+                    if text.strip():
+                        f.write(json.dumps({"text": text, "metadata": metadata}))
+                        f.write("\n")
+            os.replace(tmp_path, output)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def _normalize_file(item: Union[str, Dict]) -> Dict:
+    if isinstance(item, str):
+        item = {"path": item}
+    if "path" not in item:
+        raise ValueError(f"File definition needs a 'path': {item}")
+    return item
+
+
+def _documents(parsed: Dict, item: Dict) -> Iterator[Document]:
+    source = item.get("source", item["path"])
+    with open(parsed["output"], "r", encoding="utf-8") as f:
+        for line in f:
+            unit = json.loads(line)
+            metadata = {
+                "source": source,
+                "file": source,
+                "file_sha256": parsed["sha256"],
+                **unit["metadata"],
+            }
+            if "page" in metadata:
+                # One Document per page; keep sources unique for syncing
+                metadata["source"] = f"{source}#page={metadata['page']}"
+            metadata.update(item.get("metadata") or {})
+            yield Document(page_content=unit["text"], metadata=metadata)
+
+
+def parse_documents(
+    files: Iterable[Union[str, Dict]],
+    cache_dir: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    stats: Optional[Dict] = None,
+) -> Iterator[Document]:
+    """
+    Parse downloaded files into Documents on a process pool, yielding them
+    lazily as each file finishes.
+
+    Each worker streams its file's parsed units (one per PDF page, one per
+    file otherwise) to a JSON-lines file in ``cache_dir`` named after the
+    file's sha256. The Documents are then read back lazily, so output
+    can go straight into ``index_documents_streaming`` and unchanged
+    files are never parsed again. At most ``2 * max_workers`` files are in
+    flight at once, so a huge input iterable is consumed gradually. Files
+    that fail to parse are logged, counted and skipped.
+
+    :param files: Paths, or dicts with "path" and optional "source" (e.g. the
+        URL the file came from) and "metadata"
+    :param cache_dir: Folder for parsed output; a temporary one is used (and
+        deleted) when omitted, which disables caching across runs
+    :param max_workers: Worker processes (default: CPU count); 0 parses in
+        this process
+    :param stats: Optional dict whose "files", "cached", "failed" and
+        "documents" counters are incremented
+    :return: Iterator of Documents with "source", "file", "file_sha256" and,
+        for PDFs, "page" metadata, in completion order
+    """
+    stats = stats if stats is not None else {}
+    for key in ("files", "cached", "failed", "documents"):
+        stats.setdefault(key, 0)
+    tmp_dir = None
+    if cache_dir is None:
+        tmp_dir = tempfile.TemporaryDirectory(prefix="parsed-")
+        cache_dir = tmp_dir.name
+    files = (_normalize_file(item) for item in files)
+
+    def collect(item, parse):
+        stats["files"] += 1
+        try:
+            parsed = parse()
+        except Exception as e:
+            logger.error(f"Parsing {item['path']} failed: {e}")
+            stats["failed"] += 1
+            return
+        stats["cached"] += parsed["cached"]
+        for document in _documents(parsed, item):
+            stats["documents"] += 1
+            yield document
+
+    try:
+        if max_workers == 0:
+            for item in files:
+                yield from collect(item, partial(parse_file, item["path"], cache_dir))
+            return
+
+        max_workers = max_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+
+            def submit(item):
+                # Resolved here: a spawned worker only sees the parsers that
+                # importing this module registers
+                try:
+                    parser = get_parser(item["path"])
+                except ValueError as e:
+                    future = Future()
+                    future.set_exception(e)
+                    return future
+                return executor.submit(parse_file, item["path"], cache_dir, parser)
+
+            limit = 2 * max_workers
+            pending = {}
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < limit:
+                    item = next(files, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    pending[submit(item)] = item
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from collect(pending.pop(future), future.result)
+    finally:
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+        logger.info(
+            f"Parsed {stats['files']} files into {stats['documents']} documents "
+            f"({stats['cached']} cached, {stats['failed']} failed)"
+        )
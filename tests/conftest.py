@@ -0,0 +1,32 @@
+from unittest.mock import patch
+
+import mongomock
+import pytest
+from langchain_community.embeddings import DeterministicFakeEmbedding
+
+from components.embedding.vectorstore import MongoDBVectorStoreFactory, mongodb_store
+
+
+@pytest.fixture
+def mongo_client_class():
+    """
+    Route the shared MongoClient cache to in-process mongomock clients.
+    """
+    mongodb_store.close_mongo_clients()
+    with patch.object(mongodb_store, "MongoClient", mongomock.MongoClient) as client:
+        yield client
+    mongodb_store.close_mongo_clients()
+
+
+@pytest.fixture
+def mongo_store(mongo_client_class):
+    """
+    MongoDBVectorStoreFactory backed by an in-process mongomock collection.
+    """
+    return MongoDBVectorStoreFactory(
+        DeterministicFakeEmbedding(size=16),
+        connection_string="mongodb://localhost:27017",
+        db_name="test_db",
+        collection_name="test_collection",
+        index_name="vector_index",
+    )
@@ -0,0 +1,156 @@
+import re
+
+import pytest
+import tiktoken
+from langchain.schema import Document
+from langchain.text_splitter import CharacterTextSplitter
+from langchain_community.embeddings import DeterministicFakeEmbedding
+
+from components.embedding.chunking import (
+    ChunkingEngine,
+    HeadingChunks,
+    SentenceChunks,
+    TokenWindows,
+)
+from components.embedding.vectorstore import FAISSVectorStoreFactory, index_documents
+
+TEXT = """# Install
+
+Run the installer. It copies the files and registers the service! Then reboot.
+
+## Configure
+
+Édit the config file — set the port and the host. Déjà vu: défaut values work.
+Every option is documented in the reference manual, which lists defaults.
+
+# Use
+
+Start the service. Check the logs. Stop the service when done, then uninstall.
+"""
+
+
+def make_encoding(text=TEXT):
+    """
+    Byte-level encoding that also knows every word of ``text`` (with its
+    leading space), so common words are single tokens as with a real BPE.
+    """
+    ranks = {bytes([i]): i for i in range(256)}
+    for word in re.findall(r" ?\w+", text):
+        data = word.encode("utf-8")
+        for end in range(2, len(data) + 1):
+            ranks.setdefault(data[:end], len(ranks))
+    return tiktoken.Encoding(
+        name="test_words",
+        pat_str=r""" ?\w+| ?[^\s\w]+|\s+(?!\S)|\s+""",
+        mergeable_ranks=ranks,
+        special_tokens={},
+    )
+
+
+def make_engine(**kwargs):
+    kwargs.setdefault("max_workers", 0)
+    return ChunkingEngine(
+        [TokenWindows(12, 4), SentenceChunks(16), HeadingChunks(20)],
+        encoding=make_encoding(),
+        **kwargs,
+    )
+
+
+def test_offsets_are_shared_and_match_the_encoding():
+    engine = make_engine()
+    tokenized = engine.tokenize(TEXT)
+    _, offsets = engine.encoding.decode_with_offsets(
+        engine.encoding.encode_ordinary(TEXT)
+    )
+    assert tokenized.offsets.tolist() == offsets + [len(TEXT)]
+
+
+def test_chunks_fit_the_token_limit_and_cover_the_text():
+    engine = make_engine()
+    document = Document(page_content=TEXT, metadata={"source": "manual"})
+    chunks = engine.chunk_document(document)
+
+    strategies = {strategy for _, strategy in chunks}
+    assert strategies == {"TokenWindows", "SentenceChunks", "HeadingChunks"}
+    words = set(re.findall(r"\w+", TEXT))
+    for name in strategies:
+        produced = [chunk for chunk, strategy in chunks if strategy == name]
+        limit = {"TokenWindows": 12, "SentenceChunks": 16, "HeadingChunks": 20}[name]
+        for chunk in produced:
+            assert chunk.metadata["tokens"] <= limit
+            assert engine.count_tokens(chunk.page_content) <= engine.max_tokens
+            assert chunk.page_content in TEXT
+            assert TEXT.index(chunk.page_content, chunk.metadata["start_index"]) == (
+                chunk.metadata["start_index"]
+            )
+            assert chunk.metadata["source"] == "manual"
+        covered = {w for c in produced for w in re.findall(r"\w+", c.page_content)}
+        assert covered == words
+
+
+def test_sentence_and_heading_chunks_respect_their_boundaries():
+    engine = make_engine()
+    chunks = engine.chunk_document(Document(page_content=TEXT))
+
+    sentences = [c for c, strategy in chunks if strategy == "SentenceChunks"]
+    assert all(
+        c.page_content[-1] in ".!" or c.page_content[0] == "#" for c in sentences
+    )
+
+    sections = [c for c, strategy in chunks if strategy == "HeadingChunks"]
+    assert not any("\n#" in c.page_content for c in sections)
+    assert [c.metadata["heading"] for c in sections][0] == "Install"
+    assert "Use" in {c.metadata["heading"] for c in sections}
+
+    intro = Document(page_content="Read this first.\n\n" + TEXT)
+    chunks = engine.chunk_document(intro)
+    sections = [c for c, strategy in chunks if strategy == "HeadingChunks"]
+    assert "heading" not in sections[0].metadata
+    assert sections[1].metadata["heading"] == "Install"
+
+
+def test_max_tokens_is_a_hard_limit():
+    engine = ChunkingEngine(
+        [TokenWindows(10, 0)], encoding=make_encoding(""), max_workers=0
+    )
+    # Without learned words every byte is a token: cuts split no character
+    for chunk, _ in engine.chunk_document(Document(page_content="Déjà " * 30)):
+        assert engine.count_tokens(chunk.page_content) <= 10
+        assert chunk.page_content.replace(" ", "") in "Déjà" * 30
+
+    with pytest.raises(ValueError):
+        ChunkingEngine([TokenWindows(512)], encoding=make_encoding(), max_tokens=256)
+
+
+def test_parallel_split_matches_in_process_split():
+    documents = [
+        Document(
+            page_content=TEXT.replace("service", f"service {i}"), metadata={"n": i}
+        )
+        for i in range(6)
+    ]
+    serial = make_engine().split_with_strategies(documents)
+    parallel = make_engine(max_workers=2).split_with_strategies(documents)
+
+    assert parallel[1] == serial[1]
+    assert [c.page_content for c in parallel[0]] == [c.page_content for c in serial[0]]
+    assert [c.metadata for c in parallel[0]] == [c.metadata for c in serial[0]]
+
+
+def test_index_documents_tags_engine_strategies():
+    store = FAISSVectorStoreFactory(DeterministicFakeEmbedding(size=8))
+    documents = [Document(page_content=TEXT, metadata={"source": "manual"})]
+    chunkers = [
+        make_engine(),
+        CharacterTextSplitter(separator="\n\n", chunk_size=1000, chunk_overlap=0),
+    ]
+    index_documents(documents, store, chunkers)
+
+    stored = list(store.index.docstore._dict.values())
+    tags = {tag for doc in stored for tag in doc.metadata["chunkers"]}
+    assert tags == {
+        "TokenWindows",
+        "SentenceChunks",
+        "HeadingChunks",
+        "CharacterTextSplitter",
+    }
@@ -0,0 +1,200 @@
+import asyncio
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from components.web.crawl_checkpoint import CrawlCheckpoint, is_unchanged
+from components.web.deep_crawler import (
+    crawl_website_for_documents,
+    stream_website_documents,
+)
+
+SITE = {
+    "/": '<a href="/a">a</a> <a href="/b">b</a> home',
+    "/a": '<a href="/c">c</a> page a',
+    "/b": '<a href="/c">c</a> <a href="https://other.org/x">x</a> page b',
+    "/c": "page c",
+}
+
+
+@pytest.fixture
+def site():
+    pages = {path: [body, f'"v1{path}"'] for path, body in SITE.items()}
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body, etag = pages[self.path]
+            requests_seen.append((self.path, self.headers.get("If-None-Match")))
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            data = body.encode()
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield SimpleNamespace(url=url, pages=pages, requests=requests_seen)
+    server.shutdown()
+    server.server_close()
+
+
+class FakeCrawler:
+    """
+    Stands in for AsyncWebCrawler: fetches pages over HTTP and uses the raw
+    HTML as markdown.
+    """
+
+    def __init__(self, fail_on_call=None):
+        self.fail_on_call = fail_on_call
+        self.calls = 0
+        self.fetched = []
+
+    async def arun_many(self, urls, config):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise RuntimeError("browser crashed")
+        results = []
+        for url in urls:
+            self.fetched.append(url)
+            response = await asyncio.to_thread(requests.get, url)
+            hrefs = re.findall(r'href="([^"]+)"', response.text)
+            results.append(
+                SimpleNamespace(
+                    url=url,
+                    success=response.ok,
+                    markdown=response.text,
+                    metadata={},
+                    links={"internal": [{"href": href} for href in hrefs]},
+                    response_headers=dict(response.headers),
+                )
+            )
+        return results
+
+
+def paths(site, urls):
+    return sorted(url[len(site.url) :] or "/" for url in urls)
+
+
+@pytest.mark.asyncio
+async def test_crawl_resumes_from_checkpoint(site, tmp_path):
+    start = site.url + "/"
+    checkpoint_path = str(tmp_path / "checkpoint")
+
+    crashing = FakeCrawler(fail_on_call=2)
+    crawled = []
+    with pytest.raises(RuntimeError, match="browser crashed"):
+        async for doc in stream_website_documents(
+            start, crawler=crashing, checkpoint_path=checkpoint_path
+        ):
+            crawled.append(doc.metadata["source"])
+    assert paths(site, crawled) == ["/"]
+
+    checkpoint = CrawlCheckpoint(checkpoint_path, start)
+    assert checkpoint.in_progress
+    assert paths(site, [url for url, _ in checkpoint.frontier]) == ["/a", "/b"]
+
+    crawler = FakeCrawler()
+    documents = await crawl_website_for_documents(
+        start, crawler=crawler, checkpoint_path=checkpoint_path
+    )
+
+    assert paths(site, crawler.fetched) == ["/a", "/b", "/c"]
+    assert paths(site, [doc.metadata["source"] for doc in documents]) == [
+        "/",
+        "/a",
+        "/b",
+        "/c",
+    ]
+    depths = {doc.metadata["source"]: doc.metadata["depth"] for doc in documents}
+    assert depths[site.url + "/c"] == 2
+    assert not CrawlCheckpoint(checkpoint_path, start).in_progress
+
+
+@pytest.mark.asyncio
+async def test_recrawl_revalidates_unchanged_pages(site, tmp_path):
+    start = site.url + "/"
+    checkpoint_path = str(tmp_path / "checkpoint")
+    await crawl_website_for_documents(
+        start, crawler=FakeCrawler(), checkpoint_path=checkpoint_path
+    )
+
+    site.pages["/b"] = ['<a href="/c">c</a> page b, edited', '"v2/b"']
+    site.requests.clear()
+    crawler = FakeCrawler()
+    documents = await crawl_website_for_documents(
+        start, crawler=crawler, checkpoint_path=checkpoint_path
+    )
+
+    assert paths(site, crawler.fetched) == ["/b"]
+    assert ("/a", '"v1/a"') in site.requests  # conditional GET answered 304
+    texts = {doc.metadata["source"]: doc.page_content for doc in documents}
+    assert paths(site, texts) == ["/", "/a", "/b", "/c"]
+    assert texts[site.url + "/b"].endswith("page b, edited")
+    assert texts[site.url + "/c"] == "page c"
+
+    crawler = FakeCrawler()
+    await crawl_website_for_documents(
+        start, crawler=crawler, checkpoint_path=checkpoint_path, revalidate=False
+    )
+    assert paths(site, crawler.fetched) == ["/", "/a", "/b", "/c"]
+
+
+def test_is_unchanged_needs_validators(site):
+    assert not is_unchanged(site.url + "/a", {"etag": None, "last_modified": None})
+    assert is_unchanged(site.url + "/a", {"etag": '"v1/a"'})
+    assert not is_unchanged(site.url + "/a", {"etag": '"stale"'})
+
+
+def test_batches_are_journaled_and_compacted(tmp_path, monkeypatch):
+    path = str(tmp_path / "checkpoint")
+    checkpoint = CrawlCheckpoint(path, "https://a.com/")
+    checkpoint.start()
+    state_path = tmp_path / "checkpoint" / "state.json"
+    state = state_path.read_bytes()
+
+    for i in range(5):
+        url, depth = checkpoint.next_batch(1)[0]
+        checkpoint.store_page(url, depth, f"page {i}", f"hash{i}", [])
+        checkpoint.enqueue([f"https://a.com/{i}"], depth + 1)
+        checkpoint.complete(1)
+
+    # Batches only append to the journal
+    assert state_path.read_bytes() == state
+    resumed = CrawlCheckpoint(path, "https://a.com/")
+    assert resumed.frontier == checkpoint.frontier == [["https://a.com/4", 5]]
+    assert resumed.visited == checkpoint.visited
+    assert resumed.pages == checkpoint.pages
+
+    # A crash while appending loses only the entry being written
+    with open(tmp_path / "checkpoint" / "journal.jsonl", "a") as f:
+        f.write('{"generation": ')
+    resumed = CrawlCheckpoint(path, "https://a.com/")
+    assert resumed.pages == checkpoint.pages
+    resumed.enqueue(["https://a.com/late"], 6)
+    resumed.complete(0)
+    assert CrawlCheckpoint(path, "https://a.com/").frontier[-1] == [
+        "https://a.com/late",
+        6,
+    ]
+
+    monkeypatch.setattr("components.web.crawl_checkpoint.MIN_COMPACT_BYTES", 0)
+    resumed.store_page("https://a.com/4", 5, "page 5", "hash5", [])
+    resumed.complete(1)
+    assert (tmp_path / "checkpoint" / "journal.jsonl").read_bytes() == b""
+    assert CrawlCheckpoint(path, "https://a.com/").pages == resumed.pages
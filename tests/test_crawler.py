@@ -4,7 +4,13 @@ from unittest.mock import AsyncMock, patch
 import pytest
 from langchain.schema import Document
 
-from components.web.deep_crawler import crawl_website_for_documents
+from components.utils.aio import iterate_in_thread
+from components.utils.near_duplicates import NearDuplicateIndex
+from components.web.deep_crawler import (
+    crawl_website_for_documents,
+    crawl_websites_for_documents,
+    stream_website_documents,
+)
 
 
 @pytest.mark.asyncio
@@ -26,6 +32,7 @@ async def test_crawl_returns_documents():
         assert "source" in documents[0].metadata
         assert "page1" in documents[0].metadata["source"]
         assert "# Title" in documents[0].page_content
+        assert len(documents[0].metadata["content_hash"]) == 64
 
 
 @pytest.mark.asyncio
@@ -75,3 +82,175 @@ async def test_metadata_merging():
         assert doc_meta["source_type"] == "news"
         assert doc_meta["campaign"] == "test-run"
         assert doc_meta["source"] == "https://example.com/merge"
+
+
+def make_result(url, markdown="content", depth=0):
+    result = AsyncMock()
+    result.markdown = markdown
+    result.url = url
+    result.metadata = {"depth": depth}
+    return result
+
+
+@pytest.mark.asyncio
+async def test_multi_site_crawl_shares_browsers_and_limits_concurrency():
+    running = {"total": 0, "peak": 0, "a.com": 0, "peak_a.com": 0}
+
+    async def arun(url, config):
+        domain = "a.com" if "a.com" in url else None
+        running["total"] += 1
+        running["peak"] = max(running["peak"], running["total"])
+        if domain:
+            running[domain] += 1
+            running["peak_a.com"] = max(running["peak_a.com"], running[domain])
+        await asyncio.sleep(0.01)
+        running["total"] -= 1
+        if domain:
+            running[domain] -= 1
+        if "broken" in url:
+            raise RuntimeError("navigation failed")
+        return [make_result(f"{url}/page", markdown=f"text of {url}")]
+
+    sites = [f"https://a.com/section{i}" for i in range(4)]
+    sites += [{"url": f"https://site{i}.org", "metadata": {"n": i}} for i in range(6)]
+    sites.append("https://broken.net")
+
+    with patch("components.web.deep_crawler.AsyncWebCrawler") as MockCrawler:
+        instance = MockCrawler.return_value.__aenter__.return_value
+        instance.arun.side_effect = arun
+
+        results = [
+            result
+            async for result in crawl_websites_for_documents(
+                sites, max_concurrency=3, per_domain_concurrency=1, pool_size=2
+            )
+        ]
+
+    assert MockCrawler.call_count == 2  # one pool, not one browser per site
+    assert running["peak"] == 3
+    assert running["peak_a.com"] == 1
+    assert len(results) == len(sites)
+
+    by_site = {result["website"]: result for result in results}
+    assert by_site["https://broken.net"]["error"] == "navigation failed"
+    site2 = by_site["https://site2.org"]
+    assert site2["error"] is None
+    assert site2["stats"]["pages"] == site2["stats"]["documents"] == 1
+    assert site2["documents"][0].metadata["n"] == 2
+
+
+@pytest.mark.asyncio
+async def test_per_domain_limit_caps_page_requests_not_site_crawls():
+    running = {"a.com": 0, "peak": 0}
+    limits = []
+
+    async def arun(url, config):
+        limits.append(config.semaphore_count)
+        running["a.com"] += 1
+        running["peak"] = max(running["peak"], running["a.com"])
+        await asyncio.sleep(0.01)
+        running["a.com"] -= 1
+        return [make_result(f"{url}/page", markdown=f"text of {url}")]
+
+    sites = [f"https://a.com/section{i}" for i in range(3)]
+
+    with patch("components.web.deep_crawler.AsyncWebCrawler") as MockCrawler:
+        instance = MockCrawler.return_value.__aenter__.return_value
+        instance.arun.side_effect = arun
+
+        results = [
+            result
+            async for result in crawl_websites_for_documents(
+                sites, max_concurrency=3, per_domain_concurrency=4
+            )
+        ]
+
+    assert len(results) == 3
+    # Entry points on one host run in turn, each fetching up to 4 pages at once
+    assert running["peak"] == 1
+    assert limits == [4, 4, 4]
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_documents_as_pages_arrive():
+    produced = []
+
+    async def pages():
+        for i, text in enumerate(["first", "second", "first", "", "third"]):
+            produced.append(i)
+            yield make_result(f"https://example.com/{i}", markdown=text, depth=i)
+
+    async def arun(url, config):
+        assert config.stream is True
+        return pages()
+
+    with patch("components.web.deep_crawler.AsyncWebCrawler") as MockCrawler:
+        instance = MockCrawler.return_value.__aenter__.return_value
+        instance.arun.side_effect = arun
+
+        stream = stream_website_documents(
+            "https://example.com", metadata={"campaign": "x"}
+        )
+        first = await stream.__anext__()
+        assert produced == [0]  # nothing crawled ahead of the consumer
+        documents = [first] + [doc async for doc in stream]
+
+    assert [doc.page_content for doc in documents] == ["first", "second", "third"]
+    assert documents[2].metadata["source"] == "https://example.com/4"
+    assert documents[0].metadata["campaign"] == "x"
+    assert "markdown" not in documents[0].metadata
+    MockCrawler.return_value.__aexit__.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_stream_feeds_synchronous_consumer():
+    async def pages():
+        for i in range(3):
+            await asyncio.sleep(0)
+            yield make_result(f"https://example.com/{i}", markdown=f"page {i}")
+
+    crawler = AsyncMock()
+    crawler.arun.side_effect = lambda url, config: pages()
+    stream = stream_website_documents(
+        "https://example.com", crawler=crawler, include_markdown=True
+    )
+
+    loop = asyncio.get_running_loop()
+    documents = await asyncio.to_thread(list, iterate_in_thread(stream, loop))
+
+    assert [doc.metadata["markdown"] for doc in documents] == [
+        "page 0",
+        "page 1",
+        "page 2",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_near_duplicates_are_dropped_across_sites():
+    article = " ".join(f"sentence {i} of the article body." for i in range(80))
+
+    async def arun(url, config):
+        return [
+            make_result(f"{url}/post", markdown=f"{article} Visited {url}."),
+            make_result(f"{url}/about", markdown=f"About page of {url}."),
+        ]
+
+    index = NearDuplicateIndex(threshold=0.8)
+    with patch("components.web.deep_crawler.AsyncWebCrawler") as MockCrawler:
+        instance = MockCrawler.return_value.__aenter__.return_value
+        instance.arun.side_effect = arun
+
+        results = [
+            result
+            async for result in crawl_websites_for_documents(
+                ["https://a.com", "https://mirror.org"],
+                max_concurrency=1,
+                near_duplicates=index,
+            )
+        ]
+
+    stats = {result["website"]: result["stats"] for result in results}
+    assert stats["https://a.com"]["near_duplicates"] == 0
+    assert stats["https://mirror.org"]["near_duplicates"] == 1
+    assert stats["https://mirror.org"]["documents"] == 1
+    assert len(index) == 3
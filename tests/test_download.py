@@ -1,10 +1,18 @@
 import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import pytest
 import requests
 import requests_mock
 
-from components.web.download import download_documents
+from components.web.download import (
+    download_documents,
+    download_urls,
+    extract_document_links,
+    find_document_links,
+)
 
 HTML_TEMPLATE = """
 <html>
@@ -85,3 +93,184 @@ def test_invalid_url(mock_html, tmp_path):
         assert len(result["downloaded"]) == 2
         assert len(result["failed"]) == 1
         assert "Connection failed" in result["failed"][0]["error"]
+
+
+def test_retries_transient_errors_and_reports_stats(tmp_path):
+    html = '<a href="docs/report.pdf">PDF</a> <a href="docs/gone.pdf">Gone</a>'
+    with requests_mock.Mocker() as m:
+        m.get(
+            BASE_URL + "docs/report.pdf",
+            [
+                {"status_code": 503},
+                {"exc": requests.exceptions.ConnectTimeout("timed out")},
+                {"status_code": 200, "content": b"%PDF" * 1000},
+            ],
+        )
+        m.get(BASE_URL + "docs/gone.pdf", status_code=410)
+
+        result = download_documents(
+            html_text=html,
+            base_url=BASE_URL,
+            download_folder=str(tmp_path),
+            retry_delay=0,
+            chunk_size=1024,
+        )
+
+    assert result["downloaded"] == [str(tmp_path / "report.pdf")]
+    assert tmp_path.joinpath("report.pdf").read_bytes() == b"%PDF" * 1000
+    assert "410" in result["failed"][0]["error"]
+    assert m.call_count == 4  # 410 is not retried
+    stats = result["stats"]
+    assert stats["files"] == 1 and stats["failed"] == 1
+    assert stats["bytes"] == 4000
+    assert stats["retries"] == 2
+    assert stats["seconds"] >= 0
+    assert os.listdir(tmp_path) == ["report.pdf"]  # no partial files left
+
+
+def test_gives_up_after_max_retries(tmp_path):
+    html = '<a href="docs/busy.pdf">PDF</a>'
+    with requests_mock.Mocker() as m:
+        m.get(BASE_URL + "docs/busy.pdf", status_code=503)
+        result = download_documents(
+            html_text=html,
+            base_url=BASE_URL,
+            download_folder=str(tmp_path),
+            max_retries=1,
+            retry_delay=0,
+        )
+    assert m.call_count == 2
+    assert "503" in result["failed"][0]["error"]
+
+
+def test_concurrent_downloads_respect_per_host_limit(tmp_path):
+    running = {}
+    peaks = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            host = self.headers["Host"].split(":")[0]
+            with lock:
+                running[host] = running.get(host, 0) + 1
+                peaks[host] = max(peaks.get(host, 0), running[host])
+            time.sleep(0.05)
+            with lock:
+                running[host] -= 1
+            self.send_response(200)
+            self.send_header("Content-Length", "4")
+            self.end_headers()
+            self.wfile.write(b"data")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    try:
+        links = [f"http://127.0.0.1:{port}/f{i}.pdf" for i in range(6)]
+        links += [f"http://localhost:{port}/f{i}.txt" for i in range(6)]
+        html = " ".join(f'<a href="{link}">x</a>' for link in links)
+        result = download_documents(
+            html_text=html,
+            base_url=BASE_URL,
+            download_folder=str(tmp_path),
+            max_workers=6,
+            per_host_limit=2,
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert len(result["downloaded"]) == 12
+    assert result["downloaded"][0].endswith("f0.pdf")  # page order is kept
+    assert peaks == {"127.0.0.1": 2, "localhost": 2}
+
+
+def test_find_document_links_normalizes_and_matches_extensions():
+    html = """
+    <html><head><base href="https://cdn.example.com/files/"></head><body>
+        <a href="report.PDF">upper case</a>
+        <a href="sheet.xlsx?download=1#top">query and fragment</a>
+        <a href="report.PDF#page=2">same file</a>
+        <a href="notes.pdf.html">not a PDF</a>
+        <a href="/img/logo.png">image</a>
+        <a>no href</a>
+    </body></html>
+    """
+    assert find_document_links(html, BASE_URL) == [
+        "https://cdn.example.com/files/report.PDF",
+        "https://cdn.example.com/files/sheet.xlsx?download=1",
+    ]
+    assert find_document_links("", BASE_URL) == []
+    assert find_document_links(
+        '<?xml version="1.0" encoding="utf-8"?><a href="a.txt">x</a>', BASE_URL
+    ) == [BASE_URL + "a.txt"]
+    assert find_document_links('<?xml version="1.0" encoding="utf-8"?>', BASE_URL) == []
+    assert find_document_links(
+        '<a href="src.tar.gz?mirror=2">a</a> <a href="src.gz">b</a>',
+        BASE_URL,
+        extensions=[".TAR.GZ"],
+    ) == [BASE_URL + "src.tar.gz?mirror=2"]
+
+
+@pytest.mark.parametrize("max_workers", [0, 2])
+def test_extract_document_links_dedupes_across_pages(max_workers):
+    pages = [
+        (f'<a href="/shared/terms.pdf">t</a> <a href="own{i}.docx">o</a>', url)
+        for i, url in enumerate(
+            ["https://a.com/x/", "https://a.com/y/", "https://b.org/"]
+        )
+    ]
+    urls = extract_document_links(pages, max_workers=max_workers, chunksize=1)
+    assert urls == [
+        "https://a.com/shared/terms.pdf",
+        "https://a.com/x/own0.docx",
+        "https://a.com/y/own1.docx",
+        "https://b.org/shared/terms.pdf",
+        "https://b.org/own2.docx",
+    ]
+
+
+def test_same_basename_on_two_hosts_is_not_overwritten(tmp_path):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = self.headers["Host"].split(":")[0].encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    try:
+        urls = [
+            f"http://127.0.0.1:{port}/shared/terms.pdf",
+            f"http://localhost:{port}/shared/terms.pdf",
+            f"http://localhost:{port}/other/guide.pdf",
+        ]
+        result = download_urls(urls, str(tmp_path), max_workers=1)
+        reversed_result = download_urls(urls[::-1], str(tmp_path), max_workers=1)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    first, second, guide = result["downloaded"]
+    assert result["stats"]["files"] == 3
+    assert first != second
+    assert os.path.basename(first).startswith("terms-")
+    assert guide == str(tmp_path / "guide.pdf")
+    with open(first, "rb") as f:
+        assert f.read() == b"127.0.0.1"
+    with open(second, "rb") as f:
+        assert f.read() == b"localhost"
+    assert reversed_result["downloaded"] == result["downloaded"][::-1]
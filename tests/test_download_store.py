@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from components.web.download import download_documents
+from components.web.download_store import DownloadStore
+
+
+@pytest.fixture
+def server():
+    files = {
+        "/a/report.pdf": b"%PDF annual report " * 5000,
+        "/b/report.pdf": b"%PDF quarterly report " * 5000,
+        "/mirror/annual.pdf": b"%PDF annual report " * 5000,
+    }
+    state = SimpleNamespace(files=files, truncate_next=set(), requests=[])
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = state.files[self.path]
+            etag = '"%s"' % hashlib.md5(body).hexdigest()
+            state.requests.append((self.path, self.headers.get("Range")))
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            start = 0
+            range_header = self.headers.get("Range")
+            if range_header and self.headers.get("If-Range") == etag:
+                start = int(range_header.split("=")[1].rstrip("-"))
+                if start >= len(body):
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{len(body)}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header(
+                    "Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}"
+                )
+            else:
+                self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body) - start))
+            self.end_headers()
+            if self.path in state.truncate_next:
+                # Drop the connection halfway through the body
+                state.truncate_next.discard(self.path)
+                self.wfile.write(body[start : len(body) // 2])
+                self.close_connection = True
+                return
+            self.wfile.write(body[start:])
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    state.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield state
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def page(server, *paths):
+    return " ".join(f'<a href="{server.url}{path}">x</a>' for path in paths)
+
+
+def test_same_basename_and_identical_content(server, tmp_path):
+    store = DownloadStore(str(tmp_path / "store"))
+    html = page(server, "/a/report.pdf", "/b/report.pdf", "/mirror/annual.pdf")
+
+    result = download_documents(html, server.url, str(tmp_path), store=store)
+
+    annual, quarterly, mirror = result["downloaded"]
+    assert annual != quarterly  # no silent overwrite
+    assert annual == mirror  # identical files stored once
+    assert result["stats"]["deduplicated"] == 1
+    with open(annual, "rb") as f:
+        assert f.read() == server.files["/a/report.pdf"]
+    assert hashlib.sha256(server.files["/b/report.pdf"]).hexdigest() in quarterly
+
+
+def test_rerun_revalidates_unchanged_files(server, tmp_path):
+    html = page(server, "/a/report.pdf", "/b/report.pdf")
+    download_documents(
+        html, server.url, str(tmp_path), store=DownloadStore(str(tmp_path / "s"))
+    )
+    server.files["/b/report.pdf"] = b"%PDF restated report " * 5000
+    old_path = DownloadStore(str(tmp_path / "s")).path(server.url + "/b/report.pdf")
+
+    result = download_documents(
+        html, server.url, str(tmp_path), store=DownloadStore(str(tmp_path / "s"))
+    )
+
+    stats = result["stats"]
+    assert stats["unchanged"] == 1
+    assert stats["bytes"] == len(server.files["/b/report.pdf"])
+    with open(result["downloaded"][1], "rb") as f:
+        assert f.read() == server.files["/b/report.pdf"]
+    assert not os.path.exists(old_path)  # no URL refers to it any more
+
+
+def test_interrupted_download_resumes_with_range(server, tmp_path):
+    url = server.url + "/a/report.pdf"
+    size = len(server.files["/a/report.pdf"])
+
+    server.truncate_next.add("/a/report.pdf")
+    result = DownloadStore(str(tmp_path)).fetch(
+        url, chunk_size=4096, max_retries=1, retry_delay=0
+    )
+
+    # Only the chunk being read when the connection dropped is fetched again
+    assert result["status"] == "resumed"
+    resumed_from = size // 2 // 4096 * 4096
+    assert server.requests[-1] == ("/a/report.pdf", f"bytes={resumed_from}-")
+    assert result["bytes"] == size
+    with open(result["path"], "rb") as f:
+        assert f.read() == server.files["/a/report.pdf"]
+
+
+def test_resume_across_runs_and_restart_on_change(server, tmp_path):
+    url = server.url + "/a/report.pdf"
+    server.truncate_next.add("/a/report.pdf")
+    with pytest.raises(Exception):
+        DownloadStore(str(tmp_path)).fetch(url, chunk_size=4096, max_retries=0)
+
+    # The file changed meanwhile: If-Range fails and it is fetched in full
+    server.files["/a/report.pdf"] = b"%PDF corrected report " * 5000
+    result = DownloadStore(str(tmp_path)).fetch(url)
+
+    assert result["status"] == "downloaded"
+    assert server.requests[-1][1] is not None  # a Range request was tried
+    with open(result["path"], "rb") as f:
+        assert f.read() == server.files["/a/report.pdf"]
+    assert os.listdir(tmp_path / "partial") == []
+
+
+def test_complete_part_file_restarts_after_416(server, tmp_path):
+    url = server.url + "/a/report.pdf"
+    body = server.files["/a/report.pdf"]
+    store = DownloadStore(str(tmp_path))
+    # A crash between the last write and the commit leaves a complete part
+    part_path, meta_path = store._partial_paths(url)
+    with open(part_path, "wb") as f:
+        f.write(body)
+    with open(meta_path, "w") as f:
+        json.dump({"etag": '"%s"' % hashlib.md5(body).hexdigest()}, f)
+
+    result = store.fetch(url, max_retries=0)
+
+    assert [r for _, r in server.requests] == [f"bytes={len(body)}-", None]
+    assert result["status"] == "downloaded"
+    with open(result["path"], "rb") as f:
+        assert f.read() == body
+    assert os.listdir(tmp_path / "partial") == []
@@ -0,0 +1,117 @@
+import os
+
+import numpy as np
+import pytest
+from langchain.embeddings.base import Embeddings
+
+from components.embedding.cache import CachedEmbeddings, EmbeddingCache
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self, dim=8):
+        self.dim = dim
+        self.calls = []
+
+    def _vector(self, text):
+        rng = np.random.default_rng(abs(hash(text)) % (2**32))
+        return rng.random(self.dim).tolist()
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        self.calls.append([text])
+        return self._vector(text)
+
+
+def test_cache_hits_skip_model(tmp_path):
+    model = CountingEmbeddings()
+    cached = CachedEmbeddings(
+        model, EmbeddingCache(str(tmp_path)), provider="fake", model_name="m"
+    )
+
+    first = cached.embed_documents(["a", "b", "a"])
+    second = cached.embed_documents(["b", "c", "a"])
+
+    assert model.calls == [["a", "b"], ["c"]]
+    assert np.allclose(first[0], second[2])
+    assert np.allclose(first[1], second[0])
+    stats = cached.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 4
+    assert stats["entries"] == 3
+
+
+def test_queries_are_cached_apart_from_documents(tmp_path):
+    model = CountingEmbeddings()
+    cached = CachedEmbeddings(
+        model, EmbeddingCache(str(tmp_path)), provider="fake", model_name="m"
+    )
+    cached.embed_documents(["a"])
+
+    first = cached.embed_queries(["a", "b", "a"])
+    second = cached.embed_queries(["b"])
+
+    # Query embeddings come from embed_query, one call per distinct query
+    assert model.calls == [["a"], ["a"], ["b"]]
+    assert np.allclose(first[1], second[0])
+    assert np.allclose(first[0], cached.embed_query("a"))
+    assert len(model.calls) == 3
+
+
+def test_cache_persists_across_instances(tmp_path):
+    model = CountingEmbeddings()
+    cached = CachedEmbeddings(
+        model, EmbeddingCache(str(tmp_path)), provider="fake", model_name="m"
+    )
+    vectors = cached.embed_documents(["hello", "world"])
+    cached.cache.close()
+
+    reopened = CachedEmbeddings(
+        model, EmbeddingCache(str(tmp_path)), provider="fake", model_name="m"
+    )
+    assert np.allclose(reopened.embed_documents(["hello", "world"]), vectors)
+    assert len(model.calls) == 1
+
+    # A different model name must not reuse the vectors
+    other = CachedEmbeddings(
+        model, EmbeddingCache(str(tmp_path)), provider="fake", model_name="other"
+    )
+    other.embed_documents(["hello"])
+    assert len(model.calls) == 2
+
+
+def test_float16_storage_and_dtype_mismatch(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dtype="float16")
+    cache.put_many({"k": [0.5, 0.25, 1.0]})
+    (vector,) = cache.get_many(["k"])
+    assert vector.dtype == np.float32
+    assert vector.tolist() == [0.5, 0.25, 1.0]
+    cache.close()
+
+    with pytest.raises(ValueError):
+        EmbeddingCache(str(tmp_path), dtype="float32")
+
+
+def test_lru_eviction_respects_max_bytes(tmp_path):
+    dim = 4
+    cache = EmbeddingCache(
+        str(tmp_path), max_bytes=3 * dim * 4, shard_bytes=2 * dim * 4
+    )
+    cache.put_many({"a": [1.0] * dim, "b": [2.0] * dim, "c": [3.0] * dim})
+    cache.get_many(["a"])  # "b" is now the least recently used entry
+    cache.put_many({"d": [4.0] * dim})
+
+    a, b, c, d = cache.get_many(["a", "b", "c", "d"])
+    assert b is None
+    assert a is not None and c is not None and d is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 3 * dim * 4
+
+    shard_bytes = sum(
+        os.path.getsize(tmp_path / name)
+        for name in os.listdir(tmp_path)
+        if name.startswith("shard-")
+    )
+    assert shard_bytes <= 4 * dim * 4
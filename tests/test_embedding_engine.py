@@ -0,0 +1,61 @@
+from langchain.embeddings.base import Embeddings
+
+from components.embedding.engine import ParallelEmbeddings, make_batches
+
+
+class LengthEmbeddings(Embeddings):
+    """Deterministic stand-in model: the vector encodes the text itself."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def embed_documents(self, texts):
+        self.batch_sizes.append(len(texts))
+        return [[float(len(t)), float(sum(map(ord, t)))] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def length_model_factory(model_name, max_batch_size):
+    return LengthEmbeddings()
+
+
+TEXTS = ["a" * n for n in (50, 3, 700, 12, 12, 90, 1, 400)]
+
+
+def test_make_batches_sorts_and_bounds_padding():
+    batches = make_batches(TEXTS, max_batch_size=3, max_batch_chars=800)
+    flat = [i for batch in batches for i in batch]
+
+    assert sorted(flat) == list(range(len(TEXTS)))
+    assert [len(TEXTS[i]) for i in flat] == sorted(len(t) for t in TEXTS)
+    for batch in batches:
+        assert len(batch) <= 3
+        longest = max(len(TEXTS[i]) for i in batch)
+        assert len(batch) == 1 or len(batch) * longest <= 800
+
+
+def test_in_process_engine_preserves_order():
+    engine = ParallelEmbeddings(
+        "fake", num_workers=0, max_batch_size=2, model_factory=length_model_factory
+    )
+    vectors = engine.embed_documents(TEXTS)
+
+    assert [v[0] for v in vectors] == [float(len(t)) for t in TEXTS]
+    assert engine._local_model.batch_sizes == [2, 2, 2, 2]
+
+
+def test_process_pool_engine_preserves_order():
+    with ParallelEmbeddings(
+        "fake",
+        num_workers=2,
+        max_batch_size=2,
+        threads_per_worker=0,
+        model_factory=length_model_factory,
+    ) as engine:
+        vectors = engine.embed_documents(TEXTS)
+        query = engine.embed_query("abc")
+
+    assert [v[0] for v in vectors] == [float(len(t)) for t in TEXTS]
+    assert query == [3.0, float(sum(map(ord, "abc")))]
@@ -0,0 +1,145 @@
+import datetime
+import os
+
+import numpy as np
+import pytest
+from langchain.schema import Document
+from langchain_community.embeddings import DeterministicFakeEmbedding
+
+from components.embedding.vectorstore import FAISSVectorStoreFactory
+from components.embedding.vectorstore.faiss_store import build_faiss_index
+
+
+def make_documents(n):
+    return [
+        Document(page_content=f"document number {i}", metadata={"i": i})
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat", "ivf_pq", "hnsw"])
+def test_index_types_return_exact_match(index_type):
+    store = FAISSVectorStoreFactory(
+        DeterministicFakeEmbedding(size=32),
+        index_type=index_type,
+        nlist=8,
+        pq_m=8,
+        pq_nbits=4,
+    )
+    store.from_documents(make_documents(400))
+
+    # Visiting every list makes IVF search exhaustive over the coarse quantizer
+    results = store.similarity_search("document number 42", k=3, nprobe=8)
+    assert results[0].metadata["i"] == 42
+    assert store.index.index.ntotal == 400
+
+
+def test_trained_index_accepts_more_documents():
+    store = FAISSVectorStoreFactory(
+        DeterministicFakeEmbedding(size=32), index_type="ivf_flat", nlist=4
+    )
+    documents = make_documents(200)
+    store.add_documents(documents[:50])
+
+    # Too few vectors to train 4 lists: they are kept in an exact index
+    assert not hasattr(store.index.index, "nlist")
+    assert store.similarity_search("document number 7", k=1)[0].metadata["i"] == 7
+
+    store.add_documents(documents[50:])
+    assert store.index.index.nlist == 4 and store.index.index.ntotal == 200
+    store.add_documents([Document(page_content="late arrival", metadata={"i": -1})])
+
+    assert store.similarity_search("late arrival", k=1, nprobe=4)[0].metadata["i"] == -1
+    assert (
+        store.similarity_search("document number 7", k=1, nprobe=4)[0].metadata["i"]
+        == 7
+    )
+
+
+def test_build_clamps_to_small_training_sets(caplog):
+    vectors = np.random.default_rng(0).random((20, 16), dtype=np.float32)
+    index = build_faiss_index(vectors, "ivf_pq", nlist=1024, pq_m=4, pq_nbits=8)
+    assert index.is_trained
+    assert index.nlist == 20
+
+    assert "Training 20 IVF lists on 20 vectors" in caplog.text
+
+    with pytest.raises(ValueError):
+        build_faiss_index(vectors, "ivf_pq", pq_m=5)
+    with pytest.raises(ValueError):
+        FAISSVectorStoreFactory(DeterministicFakeEmbedding(size=16), index_type="lsh")
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat"])
+def test_mmap_load_matches_in_memory_load(tmp_path, index_type):
+    embedding = DeterministicFakeEmbedding(size=32)
+    store = FAISSVectorStoreFactory(embedding, index_type=index_type, nlist=4)
+    store.from_documents(make_documents(200))
+    store.save_local(str(tmp_path / "pickle"))
+    store.save_local(str(tmp_path / "sqlite"), docstore_format="sqlite")
+
+    in_memory = FAISSVectorStoreFactory(embedding, nprobe=4)
+    in_memory.load_local(str(tmp_path / "pickle"))
+    mapped = FAISSVectorStoreFactory(embedding, nprobe=4)
+    mapped.load_local(str(tmp_path / "sqlite"), mmap=True)
+
+    expected = in_memory.similarity_search_with_score("document number 7", k=5)
+    actual = mapped.similarity_search_with_score("document number 7", k=5)
+    assert [d.page_content for d, _ in actual] == [d.page_content for d, _ in expected]
+    assert [d.metadata for d, _ in actual] == [d.metadata for d, _ in expected]
+    assert [s for _, s in actual] == pytest.approx([s for _, s in expected])
+    assert len(mapped.index.index_to_docstore_id) == 200
+
+
+def test_mmap_load_requires_sqlite_docstore(tmp_path):
+    embedding = DeterministicFakeEmbedding(size=32)
+    store = FAISSVectorStoreFactory(embedding)
+    store.from_documents(make_documents(10))
+    store.save_local(str(tmp_path))
+
+    with pytest.raises(FileNotFoundError):
+        FAISSVectorStoreFactory(embedding).load_local(str(tmp_path), mmap=True)
+
+
+class QueryPrefixEmbedding(DeterministicFakeEmbedding):
+    """Embeds queries differently from documents, like instruction models."""
+
+    def embed_query(self, text):
+        return super().embed_query(f"query: {text}")
+
+
+@pytest.mark.parametrize(
+    "index_type,normalize_L2", [("flat", False), ("flat", True), ("hnsw", True)]
+)
+def test_batch_search_matches_single_queries(index_type, normalize_L2):
+    store = FAISSVectorStoreFactory(
+        QueryPrefixEmbedding(size=32),
+        index_type=index_type,
+        normalize_L2=normalize_L2,
+    )
+    store.from_documents(make_documents(50))
+    queries = ["document number 3", "document number 17", "unrelated"]
+
+    batched = store.similarity_search_batch_with_score(queries, k=4)
+
+    assert len(batched) == len(queries)
+    for query, hits in zip(queries, batched):
+        single = store.similarity_search_with_score(query, k=4)
+        assert [d.page_content for d, _ in hits] == [d.page_content for d, _ in single]
+        assert [s for _, s in hits] == pytest.approx([s for _, s in single], rel=1e-5)
+    assert store.similarity_search_batch(queries[:1], k=1)[0] == [batched[0][0][0]]
+    if normalize_L2:
+        assert all(0 <= s <= 4 for hits in batched for _, s in hits)
+    assert store.similarity_search_batch([], k=1) == []
+
+
+def test_sqlite_docstore_rejects_metadata_that_is_not_json(tmp_path):
+    store = FAISSVectorStoreFactory(DeterministicFakeEmbedding(size=32))
+    store.from_documents(
+        [Document(page_content="dated", metadata={"fetched": datetime.date.today()})]
+    )
+
+    with pytest.raises(TypeError, match="not JSON"):
+        store.save_local(str(tmp_path), docstore_format="sqlite")
+    assert not os.path.exists(tmp_path / "docstore.sqlite")
+    assert not os.path.exists(tmp_path / "docstore.sqlite.tmp")
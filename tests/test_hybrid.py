@@ -0,0 +1,108 @@
+import pytest
+from langchain.schema import Document
+from langchain_community.embeddings import DeterministicFakeEmbedding
+
+from components.embedding.vectorstore import (
+    BM25Index,
+    FAISSVectorStoreFactory,
+    reciprocal_rank_fusion,
+)
+from components.embedding.vectorstore.hybrid import tokenize
+
+
+def test_tokenize_keeps_codes_and_their_parts():
+    assert tokenize("Error ERR-404 in v2.1") == [
+        "error",
+        "err-404",
+        "err",
+        "404",
+        "in",
+        "v2.1",
+        "v2",
+        "1",
+    ]
+
+
+def test_bm25_updates_incrementally():
+    index = BM25Index()
+    index.add(["a", "b", "c"], ["red apple", "green apple pie", "blue sky"])
+
+    assert [doc_id for doc_id, _ in index.search("apple pie")] == ["b", "a"]
+
+    index.delete(["b"])
+    index.add(["d"], ["apple apple apple"])
+    index.add(["a"], ["blue ocean"])  # re-adding an ID replaces its text
+
+    assert [doc_id for doc_id, _ in index.search("apple")] == ["d"]
+    assert [doc_id for doc_id, _ in index.search("ocean", k=1)] == ["a"]
+    assert len(index) == 3
+    assert index.search("missing") == []
+
+
+def test_bm25_save_and_load(tmp_path):
+    index = BM25Index(k1=1.2)
+    index.add(["a", "b"], ["alpha beta", "beta gamma gamma"])
+    index.delete(["a"])
+    index.add(["c"], ["alpha"])
+    path = str(tmp_path / "bm25.json")
+    index.save(path)
+
+    loaded = BM25Index.load(path)
+    assert loaded.k1 == 1.2
+    assert loaded.search("gamma alpha") == index.search("gamma alpha")
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c"]], k=60)
+    assert [doc_id for doc_id, _ in fused] == ["b", "c", "a"]
+
+
+def test_faiss_hybrid_search_finds_exact_codes(tmp_path):
+    documents = [
+        Document(page_content=f"generic troubleshooting note {i}", metadata={"i": i})
+        for i in range(200)
+    ]
+    documents.append(
+        Document(page_content="Replace fuse on part XK-9931", metadata={"i": -1})
+    )
+    store = FAISSVectorStoreFactory(DeterministicFakeEmbedding(size=16), hybrid=True)
+    store.add_documents(documents[:100])
+    ids = store.add_documents(documents[100:])
+
+    # The fake embeddings carry no meaning, so only BM25 can surface the code
+    assert -1 in [doc.metadata["i"] for doc in store.hybrid_search("xk-9931", k=3)]
+
+    store.save_local(str(tmp_path))
+    loaded = FAISSVectorStoreFactory(DeterministicFakeEmbedding(size=16), hybrid=True)
+    loaded.load_local(str(tmp_path))
+    assert -1 in [doc.metadata["i"] for doc in loaded.hybrid_search("XK-9931", k=3)]
+
+    store.delete(ids[-1:])
+    assert ids[-1] not in store.sparse_index
+    assert all(doc.metadata["i"] != -1 for doc in store.hybrid_search("XK-9931"))
+
+    dense_only = FAISSVectorStoreFactory(DeterministicFakeEmbedding(size=16))
+    dense_only.add_documents(documents[:10])
+    dense_only.save_local(str(tmp_path / "dense"))
+    with pytest.raises(FileNotFoundError):
+        loaded.load_local(str(tmp_path / "dense"))
+
+
+def test_bm25_reclaims_deleted_document_numbers():
+    index = BM25Index()
+    live = {}
+    for start in range(0, 5000, 100):
+        texts = {str(i): f"note {i} word{i % 7}" for i in range(start, start + 100)}
+        index.add(list(texts), list(texts.values()))
+        live.update(texts)
+        stale = [str(i) for i in range(start - 100, start - 10)] if start else []
+        index.delete(stale)
+        for doc_id in stale:
+            del live[doc_id]
+
+    assert len(index) == len(live) == 590
+    assert len(index._ids) <= 2 * 1024
+    rebuilt = BM25Index()
+    rebuilt.add(list(live), list(live.values()))
+    assert index.search("word3 note", k=50) == rebuilt.search("word3 note", k=50)
+    assert index.search("note 4999", k=1)[0][0] == "4999"
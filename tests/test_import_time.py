@@ -0,0 +1,70 @@
+import subprocess
+import sys
+
+import pytest
+
+# Generous enough for slow CI machines; eager backend imports took several times this
+IMPORT_BUDGET_SECONDS = 1.5
+HEAVY_MODULES = {
+    "faiss",
+    "langchain_community",
+    "langchain_huggingface",
+    "langchain_mongodb",
+    "openai",
+    "pymongo",
+    "sentence_transformers",
+    "torch",
+}
+
+
+def import_profile(statement):
+    """
+    Returns {module: cumulative seconds} from ``python -X importtime``.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            profile[name.strip()] = int(cumulative) / 1e6
+    return profile
+
+
+@pytest.mark.parametrize(
+    "module", ["components.embedding.vectorstore", "components.embedding.embeddings"]
+)
+def test_import_skips_heavy_backends_and_fits_budget(module):
+    profile = import_profile(f"import {module}")
+
+    assert not HEAVY_MODULES & set(profile)
+    assert profile[module] < IMPORT_BUDGET_SECONDS
+
+
+def test_backends_still_resolve_on_first_use():
+    # The lazy imports happen on first use: list what is loaded by then
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys\n"
+            "from components.embedding.vectorstore import create_vector_store\n"
+            "from langchain_core.embeddings import FakeEmbeddings\n"
+            "create_vector_store('numpy', FakeEmbeddings(size=4))\n"
+            "from components.embedding.vectorstore import MongoDBVectorStoreFactory\n"
+            "print(' '.join(sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = set(result.stdout.split())
+    assert "components.embedding.vectorstore.numpy_store" in modules
+    assert "langchain_mongodb" in modules
+    assert "components.embedding.vectorstore.faiss_store" not in modules
@@ -0,0 +1,148 @@
+import pytest
+from langchain.schema import Document
+from langchain.text_splitter import CharacterTextSplitter
+from langchain_community.embeddings import DeterministicFakeEmbedding
+
+from components.embedding.vectorstore import (
+    FAISSVectorStoreFactory,
+    IndexingError,
+    index_documents,
+    index_documents_streaming,
+)
+
+
+def make_documents(n):
+    return (
+        Document(
+            page_content=f"page {i} first part.\n\npage {i} second part.",
+            metadata={"source": f"https://example.com/{i}"},
+        )
+        for i in range(n)
+    )
+
+
+def make_chunkers():
+    return [CharacterTextSplitter(separator="\n\n", chunk_size=20, chunk_overlap=0)]
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    embedded: list = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+class FlakyStore(FAISSVectorStoreFactory):
+    def __init__(self, *args, fail_on_call, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = 0
+        self.fail_on_call = fail_on_call
+        self.uploaded = []
+
+    def add_embeddings(self, documents, embeddings):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise ConnectionError("upload failed")
+        self.uploaded.extend(doc.page_content for doc in documents)
+        return super().add_embeddings(documents, embeddings)
+
+
+def test_streaming_indexes_in_batches():
+    store = FAISSVectorStoreFactory(DeterministicFakeEmbedding(size=16))
+    progress = []
+
+    report = index_documents_streaming(
+        make_documents(25),
+        store,
+        make_chunkers(),
+        batch_size=10,
+        queue_size=1,
+        on_batch=progress.append,
+    )
+
+    assert report["chunks"] == 50
+    assert report["batches"] == 5
+    assert report["next_batch"] == 5
+    assert [p["batch_index"] for p in progress] == [0, 1, 2, 3, 4]
+    assert store.index.index.ntotal == 50
+    top = store.similarity_search("page 3 second part.", k=1)[0]
+    assert top.metadata["source"] == "https://example.com/3"
+
+
+def test_streaming_resumes_after_failed_batch():
+    store = FlakyStore(DeterministicFakeEmbedding(size=16), fail_on_call=3)
+
+    with pytest.raises(IndexingError) as excinfo:
+        index_documents_streaming(
+            make_documents(25), store, make_chunkers(), batch_size=10, max_retries=0
+        )
+    report = excinfo.value.report
+    assert report["next_batch"] == 2
+    assert report["chunks"] == 20
+
+    report = index_documents_streaming(
+        make_documents(25),
+        store,
+        make_chunkers(),
+        batch_size=10,
+        start_batch=report["next_batch"],
+    )
+    assert report["chunks"] == 30
+    assert len(store.uploaded) == 50
+    assert len(set(store.uploaded)) == 50
+
+
+def test_streaming_retries_transient_failures():
+    store = FlakyStore(DeterministicFakeEmbedding(size=16), fail_on_call=1)
+
+    report = index_documents_streaming(
+        make_documents(5), store, make_chunkers(), batch_size=4, retry_delay=0
+    )
+
+    assert report["chunks"] == 10
+    assert store.index.index.ntotal == 10
+
+
+def test_identical_chunks_across_chunkers_are_stored_once():
+    embedding = CountingEmbedding(size=16, embedded=[])
+    store = FAISSVectorStoreFactory(embedding)
+    documents = [
+        Document(page_content="short page", metadata={"source": "a"}),
+        Document(page_content="short page", metadata={"source": "b"}),
+        Document(
+            page_content="long part one.\n\nlong part two.", metadata={"source": "c"}
+        ),
+    ]
+    chunkers = [
+        CharacterTextSplitter(separator="\n\n", chunk_size=20, chunk_overlap=0),
+        CharacterTextSplitter(separator="\n\n", chunk_size=1000, chunk_overlap=0),
+    ]
+
+    index_documents(documents, store, chunkers)
+
+    stored = list(store.index.docstore._dict.values())
+    assert len(stored) == 5
+    short = [d for d in stored if d.page_content == "short page"]
+    assert {d.metadata["source"] for d in short} == {"a", "b"}
+    assert short[0].metadata["chunkers"] == [
+        "CharacterTextSplitter",
+        "CharacterTextSplitter#2",
+    ]
+    whole = [d for d in stored if d.page_content.startswith("long part one.\n")]
+    assert whole[0].metadata["chunkers"] == ["CharacterTextSplitter#2"]
+    # Identical text from different sources is still embedded only once
+    assert embedding.embedded.count("short page") == 1
+
+
+def test_streaming_deduplicates_per_document():
+    store = FAISSVectorStoreFactory(DeterministicFakeEmbedding(size=16))
+    chunkers = make_chunkers() * 2
+
+    report = index_documents_streaming(make_documents(3), store, chunkers)
+    assert report["chunks"] == 6
+
+    report = index_documents_streaming(
+        make_documents(3), store, chunkers, deduplicate=False
+    )
+    assert report["chunks"] == 12
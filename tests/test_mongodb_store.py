@@ -0,0 +1,287 @@
+import asyncio
+from unittest.mock import patch
+
+import bson
+import numpy as np
+import pymongo
+import pytest
+from langchain.schema import Document
+from langchain_community.embeddings import DeterministicFakeEmbedding
+
+from components.embedding.vectorstore import MongoDBVectorStoreFactory
+from components.embedding.vectorstore.mongodb_store import (
+    VECTOR_DTYPES,
+    decode_vector,
+    document_id,
+    encode_vector,
+)
+
+
+def test_batch_search_embeds_queries_and_keeps_query_order(mongo_store):
+    queries = [f"query {i}" for i in range(20)] + ["query 0"]
+    embedded = {
+        tuple(v): q
+        for q, v in zip(queries, mongo_store.embedding_model.embed_documents(queries))
+    }
+
+    def fake_search(embedding, k):
+        query = embedded[tuple(embedding)]
+        return [
+            (Document(page_content=f"{query} hit {j}"), 1.0 - j / 10) for j in range(k)
+        ]
+
+    with patch.object(
+        mongo_store.vector_store,
+        "_similarity_search_with_score",
+        side_effect=fake_search,
+    ), patch.object(
+        DeterministicFakeEmbedding,
+        "embed_query",
+        autospec=True,
+        side_effect=DeterministicFakeEmbedding.embed_query,
+    ) as embed:
+        results = mongo_store.similarity_search_batch_with_score(queries, k=3)
+        docs = mongo_store.similarity_search_batch(queries[:2], k=1)
+
+    # Query embeddings, once per distinct query of each batch
+    assert embed.call_count == 20 + 2
+    assert [hits[0][0].page_content for hits in results] == [
+        f"{q} hit 0" for q in queries
+    ]
+    assert all(len(hits) == 3 for hits in results)
+    assert [d[0].page_content for d in docs] == ["query 0 hit 0", "query 1 hit 0"]
+
+
+def test_factories_share_one_client_per_connection_string(mongo_client_class):
+    embedding = DeterministicFakeEmbedding(size=16)
+    config = dict(db_name="db", collection_name="c", index_name="idx")
+
+    first = MongoDBVectorStoreFactory(
+        embedding, connection_string="mongodb://host-a", **config
+    )
+    second = MongoDBVectorStoreFactory(
+        embedding, connection_string="mongodb://host-a", **config
+    )
+    other = MongoDBVectorStoreFactory(
+        embedding, connection_string="mongodb://host-b", **config
+    )
+
+    assert first.client is second.client
+    assert first.client is not other.client
+
+
+@pytest.mark.asyncio
+async def test_async_add_and_search(mongo_store):
+    documents = [Document(page_content=f"doc {i}", metadata={"i": i}) for i in range(5)]
+
+    ids = await mongo_store.aadd_documents(documents)
+    assert len(ids) == 5
+    assert mongo_store.vector_store._collection.count_documents({}) == 5
+
+    def fake_search(embedding, k):
+        return [(Document(page_content="doc 0"), 0.9)][:k]
+
+    with patch.object(
+        mongo_store.vector_store,
+        "_similarity_search_with_score",
+        side_effect=fake_search,
+    ):
+        hits = await asyncio.gather(
+            mongo_store.asimilarity_search("doc 0", k=1),
+            mongo_store.asimilarity_search_with_score("doc 0", k=1),
+        )
+
+    assert hits[0][0].page_content == "doc 0"
+    assert hits[1][0][1] == 0.9
+
+
+def test_bulk_upsert_is_idempotent_across_retries(mongo_store):
+    documents = [
+        Document(page_content=f"chunk {i}", metadata={"source": f"page-{i % 3}"})
+        for i in range(25)
+    ]
+    batches = []
+
+    first = mongo_store.bulk_upsert(
+        documents, batch_size=10, max_workers=3, on_batch=batches.append
+    )
+    retry = mongo_store.bulk_upsert(documents[:12], batch_size=5)
+
+    collection = mongo_store.vector_store._collection
+    assert collection.count_documents({}) == 25
+    assert collection.find_one({"_id": document_id(documents[7])})["text"] == "chunk 7"
+    assert first["batches"] == 3
+    assert first["upserted"] == 25
+    assert first["failed"] == 0 and first["errors"] == []
+    assert sorted(b["batch_size"] for b in batches) == [5, 10, 10]
+    assert retry["upserted"] == 0
+    assert retry["documents"] == 12
+
+
+def test_bulk_upsert_raises_errors_other_than_pymongo_errors(mongo_store):
+    documents = [Document(page_content=f"chunk {i}") for i in range(6)]
+
+    def on_batch(stats):
+        if stats["batch_index"] == 0:
+            raise ValueError("callback failed")
+
+    # The first batch fails while later batches are still being queued
+    with pytest.raises(ValueError, match="callback failed"):
+        mongo_store.bulk_upsert(
+            documents, batch_size=1, max_workers=1, on_batch=on_batch
+        )
+
+    unencodable = [Document(page_content="chunk", metadata={"bad": object()})]
+    with pytest.raises(bson.errors.InvalidDocument):
+        mongo_store.bulk_upsert(unencodable)
+
+
+def test_document_id_depends_on_source_and_text():
+    doc = Document(page_content="same text", metadata={"source": "a"})
+
+    assert document_id(doc) == document_id(
+        Document(page_content="same text", metadata={"source": "a", "x": 1})
+    )
+    assert document_id(doc) != document_id(
+        Document(page_content="same text", metadata={"source": "b"})
+    )
+
+
+def test_hybrid_search_fetches_sparse_only_hits(mongo_client_class):
+    config = dict(
+        connection_string="mongodb://localhost:27017",
+        db_name="test_db",
+        collection_name="hybrid",
+        index_name="vector_index",
+    )
+    embedding = DeterministicFakeEmbedding(size=16)
+    # Written before the hybrid store exists, e.g. by an earlier run
+    ids = MongoDBVectorStoreFactory(embedding, **config).add_documents(
+        [
+            Document(page_content="general setup guide", metadata={"n": 0}),
+            Document(page_content="error E-1234 on startup", metadata={"n": 1}),
+        ]
+    )
+    store = MongoDBVectorStoreFactory(embedding, hybrid=True, **config)
+
+    def fake_search(embedding, k):
+        # Dense search only ever returns the setup guide
+        return [
+            (
+                Document(page_content="general setup guide", metadata={"_id": ids[0]}),
+                0.9,
+            )
+        ]
+
+    with patch.object(
+        store.vector_store, "_similarity_search_with_score", side_effect=fake_search
+    ):
+        hits = store.hybrid_search_with_score("E-1234", k=2)
+
+    assert [doc.page_content for doc, _ in hits] == [
+        "general setup guide",
+        "error E-1234 on startup",
+    ]
+    assert hits[1][0].metadata == {"_id": ids[1], "n": 1}
+
+    # Later writes update the index only once they are stored
+    upserted = Document(page_content="error E-5678 on shutdown")
+    with patch.object(
+        store.vector_store._collection,
+        "bulk_write",
+        side_effect=pymongo.errors.AutoReconnect("down"),
+    ):
+        assert store.bulk_upsert([upserted])["failed"] == 1
+    assert document_id(upserted) not in store.sparse_index
+    store.bulk_upsert([upserted])
+    assert document_id(upserted) in store.sparse_index
+    store.delete([ids[1]])
+    assert ids[1] not in store.sparse_index
+
+
+def test_encode_vector_sizes_and_round_trip():
+    vector = np.random.default_rng(0).standard_normal(768).astype(np.float32)
+
+    sizes = {
+        dtype: len(bson.encode({"v": encode_vector(vector, dtype)}))
+        for dtype in VECTOR_DTYPES
+    }
+    assert sizes["double"] > 6000
+    assert sizes["float32"] < 3100
+    assert sizes["int8"] < 800
+    assert sizes["int1"] < 120
+
+    assert np.allclose(decode_vector(encode_vector(vector, "float32")), vector)
+    int8 = decode_vector(encode_vector(vector, "int8"))
+    assert np.corrcoef(int8, vector)[0, 1] > 0.999
+    bits = decode_vector(encode_vector(vector[:13], "int1"))
+    assert bits.tolist() == np.where(vector[:13] > 0, 1.0, -1.0).tolist()
+
+
+def test_migrate_and_rescore_quantized_vectors(mongo_client_class):
+    config = dict(
+        connection_string="mongodb://localhost:27017",
+        db_name="test_db",
+        collection_name="quantized",
+        index_name="vector_index",
+    )
+    embedding = DeterministicFakeEmbedding(size=16)
+    MongoDBVectorStoreFactory(embedding, **config).add_documents(
+        [Document(page_content=f"doc {i}") for i in range(10)]
+    )
+    store = MongoDBVectorStoreFactory(
+        embedding, vector_dtype="int1", rescore_factor=4, **config
+    )
+
+    assert store.migrate_vectors(batch_size=3) == 10
+    assert store.migrate_vectors() == 0
+    records = list(store.vector_store._collection.find())
+    assert all(isinstance(r["embedding"], bson.Binary) for r in records)
+    assert store.vector_index_definition(16)["fields"][0]["similarity"] == "euclidean"
+
+    def fake_search(query_vector, k):
+        # Candidates in arbitrary order, as a coarse 1-bit search would return
+        assert isinstance(query_vector, bson.Binary) and k == 8
+        return [
+            (
+                Document(
+                    page_content=r["text"],
+                    metadata={
+                        "_id": str(r["_id"]),
+                        "embedding_full": r["embedding_full"],
+                    },
+                ),
+                0.5,
+            )
+            for r in records[:k]
+        ]
+
+    with patch.object(
+        store.vector_store, "_similarity_search_with_score", side_effect=fake_search
+    ):
+        hits = store.similarity_search_with_score("doc 5", k=2)
+
+    assert hits[0][0].page_content == "doc 5"
+    assert hits[0][1] == pytest.approx(1.0)
+    assert "embedding_full" not in hits[0][0].metadata
+
+
+def test_empty_sparse_index_is_built_once(mongo_client_class):
+    store = MongoDBVectorStoreFactory(
+        DeterministicFakeEmbedding(size=16),
+        connection_string="mongodb://localhost:27017",
+        db_name="test_db",
+        collection_name="empty_hybrid",
+        index_name="vector_index",
+        hybrid=True,
+    )
+
+    with patch.object(
+        store.vector_store, "_similarity_search_with_score", return_value=[]
+    ), patch.object(
+        store, "rebuild_sparse_index", wraps=store.rebuild_sparse_index
+    ) as rebuild:
+        assert store.hybrid_search("anything") == []
+        assert store.hybrid_search("anything else") == []
+
+    assert rebuild.call_count == 1
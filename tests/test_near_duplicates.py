@@ -0,0 +1,111 @@
+import random
+
+import numpy as np
+import pytest
+
+from components.utils.near_duplicates import (
+    NearDuplicateIndex,
+    optimal_bands,
+    shingle_hashes,
+)
+
+
+def random_text(rng, words=400):
+    return " ".join(f"word{rng.randrange(20_000)}" for _ in range(words))
+
+
+def test_shingle_hashes_ignore_case_and_punctuation():
+    assert np.array_equal(
+        shingle_hashes("The quick, brown fox!", 2),
+        shingle_hashes("the QUICK brown   fox", 2),
+    )
+    assert len(shingle_hashes("a b c d e f", 5)) == 2
+    assert len(shingle_hashes("short text", 5)) == 1
+    assert len(shingle_hashes("...", 5)) == 0
+
+
+def test_optimal_bands_fit_permutations():
+    for threshold in (0.5, 0.8, 0.95):
+        bands, rows = optimal_bands(threshold, 128)
+        assert bands * rows <= 128
+        # The S-curve's steepest point lands near the threshold
+        assert abs((1 / bands) ** (1 / rows) - threshold) < 0.1
+
+
+def test_near_duplicates_are_found_and_distinct_pages_are_kept():
+    rng = random.Random(0)
+    index = NearDuplicateIndex(threshold=0.8)
+    page = random_text(rng)
+
+    assert index.find_or_add("https://a.com/post", page) is None
+    edited = page + " Last updated 2024-05-01. Subscribe to our newsletter."
+    assert index.find_or_add("https://a.com/post?utm=x", edited) == (
+        "https://a.com/post"
+    )
+    assert index.find_or_add("https://a.com/other", random_text(rng)) is None
+    assert len(index) == 2
+
+    hits = index.query(edited)
+    assert hits[0][0] == "https://a.com/post"
+    assert 0.8 <= hits[0][1] <= 1.0
+
+
+def test_page_is_not_a_duplicate_of_itself():
+    rng = random.Random(1)
+    index = NearDuplicateIndex()
+    page = random_text(rng)
+    assert index.find_or_add("https://a.com/", page) is None
+    assert index.find_or_add("https://a.com/", page) is None
+    assert len(index) == 1
+
+
+def test_recrawled_page_that_changed_replaces_its_old_text(tmp_path):
+    rng = random.Random(3)
+    index = NearDuplicateIndex()
+    old, new = random_text(rng), random_text(rng)
+    assert index.find_or_add("https://a.com/", old) is None
+    assert index.find_or_add("https://a.com/", new) is None
+
+    assert len(index) == 1
+    assert index.query(old) == []
+    # A new page with the old content is no longer suppressed
+    assert index.find_or_add("https://b.org/copy", old) is None
+    assert index.find_or_add("https://b.org/copy2", new) == "https://a.com/"
+
+    path = str(tmp_path / "near_duplicates.npz")
+    index.save(path)
+    loaded = NearDuplicateIndex.load(path)
+    assert loaded.find_or_add("https://a.com/", random_text(rng)) is None
+    assert len(loaded) == 2
+    assert loaded.query(new) == []
+
+
+def test_texts_without_words_are_ignored():
+    index = NearDuplicateIndex()
+    assert index.find_or_add("a", "---") is None
+    assert index.find_or_add("b", "***") is None
+    assert len(index) == 0
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    rng = random.Random(2)
+    index = NearDuplicateIndex(threshold=0.7, initial_capacity=2)
+    pages = {f"https://a.com/{i}": random_text(rng) for i in range(5)}
+    for key, text in pages.items():
+        index.add(key, text)
+
+    path = str(tmp_path / "near_duplicates.npz")
+    index.save(path)
+    loaded = NearDuplicateIndex.load(path)
+
+    assert len(loaded) == 5
+    assert loaded.threshold == 0.7
+    assert loaded.query(pages["https://a.com/3"])[0][0] == "https://a.com/3"
+    assert loaded.find_or_add("https://b.org/mirror", pages["https://a.com/1"]) == (
+        "https://a.com/1"
+    )
+
+
+def test_invalid_threshold():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(threshold=0)
@@ -0,0 +1,115 @@
+import datetime
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from langchain.schema import Document
+from langchain_community.embeddings import DeterministicFakeEmbedding
+
+from components.embedding.vectorstore import (
+    FAISSVectorStoreFactory,
+    NumpyVectorStoreFactory,
+    create_vector_store,
+)
+from components.embedding.vectorstore.numpy_store import top_k_scores
+
+
+def make_documents(n):
+    return [
+        Document(page_content=f"document number {i}", metadata={"i": i})
+        for i in range(n)
+    ]
+
+
+def test_registry_creates_every_backend():
+    embedding = DeterministicFakeEmbedding(size=8)
+    assert isinstance(create_vector_store("numpy", embedding), NumpyVectorStoreFactory)
+    assert isinstance(create_vector_store("faiss", embedding), FAISSVectorStoreFactory)
+    with pytest.raises(ValueError):
+        create_vector_store("chroma", embedding)
+
+
+def test_top_k_scores_matches_full_sort_across_blocks(monkeypatch):
+    monkeypatch.setattr(
+        "components.embedding.vectorstore.numpy_store.SEARCH_BLOCK_ROWS", 7
+    )
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((50, 4)).astype(np.float32)
+    queries = rng.standard_normal((3, 4)).astype(np.float32)
+
+    scores, rows = top_k_scores(queries, matrix, 5)
+
+    expected = np.argsort(-(queries @ matrix.T), axis=1)[:, :5]
+    assert rows.tolist() == expected.tolist()
+    assert np.allclose(scores, np.take_along_axis(queries @ matrix.T, expected, 1))
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_add_grow_delete_and_search(dtype):
+    store = NumpyVectorStoreFactory(
+        DeterministicFakeEmbedding(size=32), dtype=dtype, initial_capacity=4
+    )
+    ids = store.add_documents(make_documents(30))
+
+    assert len(store) == 30 and len(store.vectors) >= 30
+    hits = store.similarity_search_with_score("document number 7", k=3)
+    assert hits[0][0].metadata["i"] == 7
+    assert hits[0][1] == pytest.approx(1.0, abs=1e-2)
+
+    store.delete(ids[:10])
+    assert len(store) == 20
+    assert store.similarity_search("document number 7", k=1)[0].metadata["i"] != 7
+    assert [
+        hits[0].metadata["i"]
+        for hits in store.similarity_search_batch(
+            ["document number 25", "document number 12"], k=1
+        )
+    ] == [25, 12]
+    with patch.object(
+        DeterministicFakeEmbedding,
+        "embed_documents",
+        side_effect=AssertionError("queries are embedded with embed_query"),
+    ):
+        assert store.similarity_search_batch(["document number 25"], k=1)
+
+
+def test_save_and_mmap_load(tmp_path):
+    embedding = DeterministicFakeEmbedding(size=16)
+    store = NumpyVectorStoreFactory(embedding, dtype="float16")
+    store.add_documents(make_documents(20))
+    store.save_local(str(tmp_path))
+
+    loaded = NumpyVectorStoreFactory(embedding)
+    loaded.load_local(str(tmp_path), mmap=True)
+
+    assert isinstance(loaded.vectors, np.memmap)
+    assert loaded.vectors.dtype == np.float16
+    assert loaded.similarity_search("document number 3", k=1)[0].metadata["i"] == 3
+
+    # Writing promotes the read-only map to an in-memory matrix
+    loaded.add_documents([Document(page_content="late", metadata={"i": -1})])
+    assert not isinstance(loaded.vectors, np.memmap)
+    assert loaded.similarity_search("late", k=1)[0].metadata["i"] == -1
+
+
+def test_save_rejects_metadata_that_is_not_json(tmp_path):
+    store = NumpyVectorStoreFactory(DeterministicFakeEmbedding(size=16))
+    store.add_documents(make_documents(3))
+    store.save_local(str(tmp_path))
+    store.add_documents(
+        [Document(page_content="dated", metadata={"fetched": datetime.date.today()})]
+    )
+
+    with pytest.raises(TypeError, match="not JSON"):
+        store.save_local(str(tmp_path))
+
+    # The earlier save is left intact
+    assert sorted(os.listdir(tmp_path)) == [
+        "documents.jsonl",
+        "meta.json",
+        "vectors.npy",
+    ]
+    loaded = NumpyVectorStoreFactory(DeterministicFakeEmbedding(size=16))
+    loaded.load_local(str(tmp_path))
+    assert len(loaded) == 3
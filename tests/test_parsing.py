@@ -0,0 +1,151 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pytest
+
+from components.web import parsing
+from components.web.parsing import PARSER_REGISTRY, parse_documents, parse_file
+
+
+def make_pdf(path, pages):
+    """
+    Writes a minimal PDF with one line of Helvetica text per page.
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i, text in enumerate(pages):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+
+    data = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        data += b"%010d 00000 n \n" % offset
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    path.write_bytes(bytes(data))
+    return str(path)
+
+
+def write_texts(tmp_path, count):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"note{i}.txt"
+        path.write_text(f"Note number {i}")
+        paths.append(str(path))
+    return paths
+
+
+def test_parse_files_in_worker_processes(tmp_path):
+    paths = write_texts(tmp_path, 7)
+    stats = {}
+    documents = list(
+        parse_documents(
+            paths[1:] + [{"path": paths[0], "source": "https://a.com/note0.txt"}],
+            cache_dir=str(tmp_path / "cache"),
+            max_workers=2,
+            stats=stats,
+        )
+    )
+
+    assert stats == {"files": 7, "cached": 0, "failed": 0, "documents": 7}
+    by_source = {doc.metadata["source"]: doc for doc in documents}
+    assert by_source[paths[3]].page_content == "Note number 3"
+    assert by_source["https://a.com/note0.txt"].page_content == "Note number 0"
+    assert len(by_source[paths[3]].metadata["file_sha256"]) == 64
+
+
+def test_unchanged_files_are_not_reparsed(tmp_path):
+    paths = write_texts(tmp_path, 3)
+    cache_dir = str(tmp_path / "cache")
+    list(parse_documents(paths, cache_dir=cache_dir, max_workers=0))
+
+    with open(paths[1], "w") as f:
+        f.write("Edited note")
+    stats = {}
+    documents = list(
+        parse_documents(paths, cache_dir=cache_dir, max_workers=0, stats=stats)
+    )
+
+    assert stats["cached"] == 2
+    assert sorted(doc.page_content for doc in documents) == [
+        "Edited note",
+        "Note number 0",
+        "Note number 2",
+    ]
+
+
+def test_documents_are_yielded_lazily(tmp_path):
+    paths = iter(write_texts(tmp_path, 20))
+    documents = parse_documents(paths, max_workers=2)
+
+    next(documents)
+    assert len(list(paths)) >= 20 - 4 - 1  # at most 2 per worker in flight
+    documents.close()
+
+
+def test_failures_are_skipped(tmp_path):
+    good = write_texts(tmp_path, 1)[0]
+    unknown = tmp_path / "image.png"
+    unknown.write_bytes(b"\x89PNG")
+    stats = {}
+    documents = list(parse_documents([str(unknown), good], max_workers=2, stats=stats))
+    assert [doc.page_content for doc in documents] == ["Note number 0"]
+    assert stats["failed"] == 1
+
+
+def parse_shout(path):
+    with open(path, encoding="utf-8") as f:
+        yield f.read().upper(), {}
+
+
+def test_runtime_parsers_work_in_spawned_workers(tmp_path, monkeypatch):
+    monkeypatch.setitem(PARSER_REGISTRY, ".shout", parse_shout)
+    spawn = multiprocessing.get_context("spawn")
+    monkeypatch.setattr(
+        parsing, "ProcessPoolExecutor", partial(ProcessPoolExecutor, mp_context=spawn)
+    )
+    path = tmp_path / "note.shout"
+    path.write_text("quiet please")
+    stats = {}
+
+    documents = list(parse_documents([str(path)], max_workers=1, stats=stats))
+
+    assert [doc.page_content for doc in documents] == ["QUIET PLEASE"]
+    assert stats["failed"] == 0
+
+
+def test_pdf_is_parsed_page_by_page(tmp_path):
+    pytest.importorskip("pypdf")
+    pdf = make_pdf(tmp_path / "report.pdf", ["First page", "Second page"])
+
+    parsed = parse_file(pdf, str(tmp_path / "cache"))
+    assert os.path.exists(parsed["output"]) and not parsed["cached"]
+
+    documents = list(
+        parse_documents(
+            [{"path": pdf, "source": "https://a.com/report.pdf"}],
+            cache_dir=str(tmp_path / "cache"),
+        )
+    )
+    assert [doc.page_content for doc in documents] == ["First page", "Second page"]
+    assert documents[1].metadata["page"] == 2
+    assert documents[1].metadata["source"] == "https://a.com/report.pdf#page=2"
+    assert documents[1].metadata["file"] == "https://a.com/report.pdf"
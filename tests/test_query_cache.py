@@ -0,0 +1,64 @@
+from unittest.mock import patch
+
+from langchain.schema import Document
+from langchain_community.embeddings import DeterministicFakeEmbedding
+
+from components.embedding.vectorstore import FAISSVectorStoreFactory, QueryCache
+from components.embedding.vectorstore.query_cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["hit_rate"] == 2 / 3
+
+
+def test_lru_cache_expires_entries():
+    cache = LRUCache(ttl=10)
+    with patch("components.embedding.vectorstore.query_cache.time.monotonic") as now:
+        now.return_value = 100.0
+        cache.put("a", 1)
+        now.return_value = 105.0
+        assert cache.get("a") == 1
+        now.return_value = 111.0
+        assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_faiss_store_caches_until_documents_change():
+    embedding = DeterministicFakeEmbedding(size=16)
+    cache = QueryCache()
+    store = FAISSVectorStoreFactory(embedding, query_cache=cache)
+    store.add_documents([Document(page_content=f"doc {i}") for i in range(20)])
+
+    with patch.object(
+        DeterministicFakeEmbedding,
+        "embed_query",
+        autospec=True,
+        side_effect=DeterministicFakeEmbedding.embed_query,
+    ) as embed, patch.object(
+        store.index,
+        "similarity_search_with_score_by_vector",
+        wraps=store.index.similarity_search_with_score_by_vector,
+    ) as search:
+        first = store.similarity_search("doc 3", k=2)
+        assert store.similarity_search("doc 3", k=2) == first
+        store.similarity_search("doc 3", k=4)
+        assert (embed.call_count, search.call_count) == (1, 2)
+
+        store.add_documents([Document(page_content="doc 3")])
+        store.similarity_search("doc 3", k=2)
+        assert (embed.call_count, search.call_count) == (1, 3)
+
+    stats = cache.stats()
+    assert stats["generation"] == 2
+    assert stats["embeddings"]["hits"] == 3
+    assert stats["results"]["hits"] == 1
+    assert stats["results"]["misses"] == 3
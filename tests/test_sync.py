@@ -0,0 +1,104 @@
+import json
+
+import pytest
+from langchain.schema import Document
+from langchain.text_splitter import CharacterTextSplitter
+from langchain_community.embeddings import DeterministicFakeEmbedding
+
+from components.embedding.vectorstore import FAISSVectorStoreFactory, sync_documents
+
+CHUNKERS = [CharacterTextSplitter(separator="\n\n", chunk_size=12, chunk_overlap=0)]
+
+
+def page(url, text):
+    return Document(page_content=text, metadata={"source": url})
+
+
+def first_crawl():
+    return [
+        page("https://example.com/a", "alpha one.\n\nalpha two."),
+        page("https://example.com/b", "beta one.\n\nbeta two."),
+        page("https://example.com/c", "gamma."),
+    ]
+
+
+def second_crawl():
+    return [
+        page("https://example.com/a", "alpha one.\n\nalpha two."),
+        page("https://example.com/b", "beta one, revised.\n\nbeta two."),
+        page("https://example.com/d", "delta."),
+    ]
+
+
+def test_sync_faiss(tmp_path):
+    manifest_path = str(tmp_path / "manifest.json")
+    store = FAISSVectorStoreFactory(DeterministicFakeEmbedding(size=16))
+
+    stats = sync_documents(first_crawl(), store, CHUNKERS, manifest_path)
+    assert stats["added"] == 3
+    assert stats["chunks_added"] == 5
+    assert store.index.index.ntotal == 5
+
+    stats = sync_documents(second_crawl(), store, CHUNKERS, manifest_path)
+    assert stats == {
+        "added": 1,
+        "updated": 1,
+        "unchanged": 1,
+        "deleted": 1,
+        "chunks_added": 3,
+        "chunks_deleted": 3,
+    }
+    texts = sorted(d.page_content for d in store.index.docstore._dict.values())
+    assert texts == sorted(
+        ["alpha one.", "alpha two.", "beta one, revised.", "beta two.", "delta."]
+    )
+
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    assert set(manifest) == {
+        "https://example.com/a",
+        "https://example.com/b",
+        "https://example.com/d",
+    }
+    assert len(manifest["https://example.com/b"]["chunk_ids"]) == 2
+
+    stats = sync_documents(second_crawl(), store, CHUNKERS, manifest_path)
+    assert stats["unchanged"] == 3
+    assert stats["chunks_added"] == 0
+
+
+def test_sync_mongodb(tmp_path, mongo_store):
+    manifest_path = str(tmp_path / "manifest.json")
+    collection = mongo_store.vector_store._collection
+
+    sync_documents(first_crawl(), mongo_store, CHUNKERS, manifest_path)
+    assert collection.count_documents({}) == 5
+
+    stats = sync_documents(second_crawl(), mongo_store, CHUNKERS, manifest_path)
+    assert stats["chunks_deleted"] == 3
+    texts = sorted(doc["text"] for doc in collection.find())
+    assert texts == sorted(
+        ["alpha one.", "alpha two.", "beta one, revised.", "beta two.", "delta."]
+    )
+
+
+def test_sync_rejects_hnsw_faiss_store(tmp_path):
+    manifest_path = tmp_path / "manifest.json"
+    store = FAISSVectorStoreFactory(
+        DeterministicFakeEmbedding(size=16), index_type="hnsw"
+    )
+    assert not store.supports_delete
+
+    with pytest.raises(ValueError, match="HNSW"):
+        sync_documents(first_crawl(), store, CHUNKERS, str(manifest_path))
+    assert store.index is None
+    assert not manifest_path.exists()
+
+    store.from_documents(first_crawl())
+    with pytest.raises(RuntimeError, match="HNSW"):
+        store.delete([next(iter(store.index.index_to_docstore_id.values()))])
+
+    # The loaded index decides, not the index type the factory was built with
+    loaded = FAISSVectorStoreFactory(DeterministicFakeEmbedding(size=16))
+    loaded.index = store.index
+    assert not loaded.supports_delete